@@ -0,0 +1,187 @@
+import atexit
+import multiprocessing
+import queue
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from position import Position
+
+# Сколько лучших ходов показывает подсказка
+DEFAULT_MULTIPV = 5
+# До какой глубины анализируется позиция, если её не сменили раньше
+ANALYSIS_DEPTH = 12
+# Сколько позиций хранит кэш анализа
+CACHE_SIZE = 4096
+
+# Ход анализа: (столбец, строка, оценка с точки зрения ходящего)
+Line = Tuple[int, int, int]
+# Запрос: (номер, размер поля, рэндзю, история ходов, цвет, число лучших ходов, максимальная глубина)
+Request = Tuple[int, int, bool, List[Tuple[int, int]], int, int, int]
+# Результат: (номер запроса, хеш позиции, глубина, лучшие ходы, закончен ли анализ)
+Result = Tuple[int, int, int, List[Line], bool]
+
+
+def _analyse(requests: multiprocessing.Queue, results: multiprocessing.Queue, current) -> None:
+    """
+    Цикл процесса анализа: углубляет поиск в позиции запроса и после каждой итерации
+    отправляет лучшие ходы, пока не достигнута максимальная глубина или не пришёл новый запрос.
+
+    Таблица транспозиций у процесса одна на все запросы, поэтому возврат к уже
+    разобранной позиции или к соседней по партии находит большую часть дерева в ней.
+    """
+    # Импорт здесь, чтобы главный процесс не строил таблицы движка дважды при запуске через spawn
+    from search import Searcher, SearchBudget, TranspositionTable
+
+    table = TranspositionTable()
+    while True:
+        request: Optional[Request] = requests.get()
+        if request is None:
+            break
+        request_id, size, renju, history, color, multipv, max_depth = request
+        if current.value != request_id:
+            continue
+        position = Position(size, renju)
+        for index, stone in history:
+            x, y = position.coords(index)
+            position.place(x, y, stone)
+        key = position.hash
+
+        def stop(request_id: int = request_id) -> bool:
+            return current.value != request_id
+
+        def report(depth: int, top: List[Tuple[int, int]], request_id: int = request_id) -> None:
+            results.put((request_id, key, depth, [(*position.coords(move), score) for move, score in top], False))
+
+        searcher = Searcher(position, table)
+        searcher.iterate(SearchBudget(None, max_depth=max_depth, stop=stop), color, multipv=multipv,
+                         on_iteration=report)
+        searcher.close()
+        if not stop():
+            results.put((request_id, key, max_depth,
+                         [(*position.coords(move), score) for move, score in searcher.top_moves], True))
+
+
+class Analyzer:
+    def __init__(self, multipv: int = DEFAULT_MULTIPV, max_depth: int = ANALYSIS_DEPTH,
+                 cache_size: int = CACHE_SIZE) -> None:
+        """
+        Фоновый анализ позиции: несколько лучших ходов с оценками, уточняемые с каждой глубиной.
+
+        Как и BotWorker, анализ идёт в отдельном процессе и не блокирует цикл событий pygame.
+        Результаты складываются в кэш по хешу позиции: при листании партии назад и вперёд
+        уже разобранные позиции показываются сразу, а законченный анализ не повторяется.
+
+        Параметры:
+        multipv (int): Сколько лучших ходов оценивать.
+        max_depth (int): До какой глубины анализировать позицию.
+        cache_size (int): Сколько позиций хранить в кэше (давно не показанные вытесняются).
+        """
+        self.multipv: int = multipv
+        self.max_depth: int = max_depth
+        self.cache_size: int = cache_size
+        # Хеш позиции -> (глубина, лучшие ходы, закончен ли анализ)
+        self._cache: 'OrderedDict[int, Tuple[int, List[Line], bool]]' = OrderedDict()
+        self._requests: multiprocessing.Queue = multiprocessing.Queue()
+        self._results: multiprocessing.Queue = multiprocessing.Queue()
+        self._current = multiprocessing.Value('i', 0)
+        self._pending: Optional[int] = None
+        self._process: multiprocessing.Process = multiprocessing.Process(
+            target=_analyse, args=(self._requests, self._results, self._current), daemon=True)
+        self._process.start()
+
+    @property
+    def running(self) -> bool:
+        """
+        Идёт ли сейчас анализ.
+        """
+        return self._pending is not None
+
+    def lines(self, position: Position) -> Optional[Tuple[int, List[Line]]]:
+        """
+        Результат анализа позиции из кэша: (глубина, лучшие ходы) или None.
+        """
+        entry = self._cache.get(position.hash)
+        if entry is None:
+            return None
+        self._cache.move_to_end(position.hash)
+        return entry[0], entry[1]
+
+    def analyse(self, position: Position, color: Optional[int] = None) -> None:
+        """
+        Начинает анализ позиции, отменяя предыдущий. Если позиция уже разобрана
+        до конца, анализ не запускается и результат берётся из кэша.
+        """
+        entry = self._cache.get(position.hash)
+        if entry is not None and entry[2]:
+            self.cancel()
+            return
+        with self._current.get_lock():
+            self._current.value += 1
+            request_id = self._current.value
+        self._pending = request_id
+        self._requests.put((request_id, position.size, position.renju, position.history[:],
+                            position.side_to_move if color is None else color, self.multipv, self.max_depth))
+
+    def poll(self) -> bool:
+        """
+        Забирает без ожидания готовые результаты в кэш.
+
+        Возвращает:
+        bool: Пришло ли что-нибудь новое по текущему запросу.
+        """
+        updated = False
+        while True:
+            try:
+                request_id, key, depth, lines, done = self._results.get_nowait()
+            except queue.Empty:
+                break
+            entry = self._cache.get(key)
+            if entry is None or entry[0] <= depth or done:
+                self._store(key, (depth, lines, done))
+            if request_id == self._pending:
+                updated = True
+                if done:
+                    self._pending = None
+        return updated
+
+    def _store(self, key: int, entry: Tuple[int, List[Line], bool]) -> None:
+        """
+        Сохраняет результат в кэш, вытесняя давно не показанные позиции.
+        """
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def cancel(self) -> None:
+        """
+        Останавливает текущий анализ; уже полученные глубины остаются в кэше.
+        """
+        with self._current.get_lock():
+            self._current.value += 1
+        self._pending = None
+
+    def close(self) -> None:
+        """
+        Останавливает процесс анализа.
+        """
+        self.cancel()
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+
+
+_shared_analyzer: Optional[Analyzer] = None
+
+
+def shared_analyzer() -> Analyzer:
+    """
+    Возвращает общий для всех партий процесс анализа, запуская его при первом обращении.
+    """
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        _shared_analyzer = Analyzer()
+        atexit.register(_shared_analyzer.close)
+    return _shared_analyzer
@@ -0,0 +1,380 @@
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Set, Tuple
+
+from position import Position, BLACK, WHITE, EMPTY, opponent
+
+# Результат партии: (номер, цвет победителя или EMPTY при ничьей, число ходов)
+GameResult = Tuple[int, int, int]
+
+
+class PlayerConfig:
+    def __init__(self, name: str, kind: str = 'search', node_limit: Optional[int] = 20000,
+                 time_limit: Optional[float] = None, max_depth: int = 20, book: bool = False) -> None:
+        """
+        Настройки одного участника матча.
+
+        Параметры:
+        name (str): Имя в отчёте.
+        kind (str): 'search' — основной бот (select_move), 'greedy' — исходный бот игры
+                    (robot_logic.original_move).
+        node_limit (int): Лимит узлов на ход; при лимите узлов партии воспроизводимы.
+        time_limit (float): Лимит времени на ход в секундах или None.
+        max_depth (int): Максимальная глубина итеративного углубления.
+        book (bool): Пользоваться ли книгой дебютов (выбор из книги случаен, партии невоспроизводимы).
+        """
+        self.name: str = name
+        self.kind: str = kind
+        self.node_limit: Optional[int] = node_limit
+        self.time_limit: Optional[float] = time_limit
+        self.max_depth: int = max_depth
+        self.book: bool = book
+
+    @classmethod
+    def parse(cls, spec: str) -> 'PlayerConfig':
+        """
+        Разбирает описание участника из командной строки: 'greedy', 'search', 'search:20000'
+        (лимит узлов) или 'search:0.5s' (лимит времени).
+        """
+        kind, _, limit = spec.partition(':')
+        if kind not in ('greedy', 'search'):
+            raise ValueError(f'Неизвестный тип участника: {kind}')
+        if not limit:
+            return cls(spec, kind)
+        if limit.endswith('s'):
+            return cls(spec, kind, node_limit=None, time_limit=float(limit[:-1]))
+        return cls(spec, kind, node_limit=int(limit))
+
+
+def random_opening(size: int, renju: bool, moves: int, rng: random.Random) -> List[Tuple[int, int]]:
+    """
+    Случайный дебют: первый ход в центр, остальные — в пустые клетки рядом с уже стоящими фишками.
+
+    Ходы, дающие пятёрку или запрещённые для чёрных, не выбираются.
+
+    Возвращает:
+    list: Ходы дебюта (столбец, строка) по очереди начиная с чёрных.
+    """
+    from renju import ForbiddenDetector, is_legal_move
+
+    position = Position(size, renju)
+    forbidden = ForbiddenDetector(position)
+    centre = size // 2
+    opening = [(centre, centre)]
+    position.place(centre, centre, BLACK)
+    color = WHITE
+    while len(opening) < moves:
+        candidates = sorted(position.iter_bits(position.neighbourhood(1)))
+        rng.shuffle(candidates)
+        for x, y in candidates:
+            if not is_legal_move(position, forbidden, x, y, color):
+                continue
+            position.place(x, y, color)
+            if position.is_win_at(x, y, color):
+                position.undo()
+                continue
+            opening.append((x, y))
+            break
+        else:
+            break
+        color = opponent(color)
+    forbidden.detach()
+    return opening
+
+
+def play_record(seed: int, black: PlayerConfig, white: PlayerConfig, size: int = 15, renju: bool = True,
+                opening_moves: int = 4) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Играет одну партию между двумя участниками и возвращает её запись.
+
+    Все случайные решения (дебют, ходы жадного бота) берутся из генератора с зерном seed,
+    а общая таблица транспозиций процесса очищается, поэтому при лимитах по узлам
+    партия не зависит от того, какие партии процесс играл раньше.
+
+    Параметры:
+    seed (int): Зерно генератора партии.
+    black (PlayerConfig): Участник за чёрных.
+    white (PlayerConfig): Участник за белых.
+    size (int): Размер поля.
+    renju (bool): Правила рэндзю.
+    opening_moves (int): Число ходов случайного дебюта.
+
+    Возвращает:
+    tuple: (ходы партии (столбец, строка) начиная с чёрных, цвет победителя или EMPTY при ничьей).
+    """
+    # Импорт здесь, чтобы главный процесс не строил таблицы движка
+    from renju import ForbiddenDetector, is_legal_move
+    from robot_logic import original_move, select_move
+    from search import SearchBudget, clear_shared_table
+
+    rng = random.Random(seed)
+    clear_shared_table()
+    position = Position(size, renju)
+    forbidden = ForbiddenDetector(position)
+    players = {BLACK: black, WHITE: white}
+    color = BLACK
+    winner = EMPTY
+    for x, y in random_opening(size, renju, opening_moves, rng):
+        position.place(x, y, color)
+        color = opponent(color)
+    while position.empty:
+        player = players[color]
+        if player.kind == 'greedy':
+            move = original_move(position, color, rng)
+        else:
+            move = select_move(position, color, SearchBudget(player.time_limit, player.node_limit, player.max_depth),
+                               use_book=player.book)
+        if move is None or not is_legal_move(position, forbidden, move[0], move[1], color):
+            # Ход невозможен или запрещён (жадный бот не знает правил рэндзю): поражение
+            winner = opponent(color)
+            break
+        position.place(move[0], move[1], color)
+        if position.is_win_at(move[0], move[1], color):
+            winner = color
+            break
+        color = opponent(color)
+    moves = [position.coords(index) for index, _ in position.history]
+    forbidden.detach()
+    return moves, winner
+
+
+def play_game(index: int, seed: int, black: PlayerConfig, white: PlayerConfig, size: int = 15,
+              renju: bool = True, opening_moves: int = 4) -> GameResult:
+    """
+    Играет одну партию матча; вызывается в процессе пула.
+
+    Возвращает:
+    tuple: (номер партии, цвет победителя или EMPTY при ничьей, число ходов).
+    """
+    moves, winner = play_record(seed, black, white, size, renju, opening_moves)
+    return index, winner, len(moves)
+
+
+def elo_from_score(score: float) -> float:
+    """
+    Разница рейтингов Эло, соответствующая доле набранных очков.
+    """
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_from_elo(elo: float) -> float:
+    """
+    Ожидаемая доля очков при разнице рейтингов elo.
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+# Число воображаемых партий (половина — победы, половина — поражения), добавляемых
+# к выборке при оценке дисперсии; см. MatchStats.variance
+PRIOR_GAMES = 1
+
+
+class MatchStats:
+    def __init__(self, elo0: float = 0.0, elo1: float = 10.0, alpha: float = 0.05, beta: float = 0.05) -> None:
+        """
+        Потоковая статистика матча: победы, ничьи, поражения, оценка Эло и SPRT.
+
+        SPRT проверяет гипотезу H0 (разница elo0) против H1 (разница elo1) по нормальному
+        приближению логарифма отношения правдоподобия; результаты добавляются по одному.
+
+        Параметры:
+        elo0 (float): Разница Эло гипотезы H0.
+        elo1 (float): Разница Эло гипотезы H1.
+        alpha (float): Вероятность ошибки первого рода.
+        beta (float): Вероятность ошибки второго рода.
+        """
+        self.wins: int = 0
+        self.draws: int = 0
+        self.losses: int = 0
+        self.elo0: float = elo0
+        self.elo1: float = elo1
+        self.lower: float = math.log(beta / (1 - alpha))
+        self.upper: float = math.log((1 - beta) / alpha)
+
+    @property
+    def games(self) -> int:
+        """
+        Число сыгранных партий.
+        """
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        """
+        Доля набранных очков первого участника.
+        """
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.5
+
+    def add(self, score: float) -> None:
+        """
+        Добавляет результат партии с точки зрения первого участника: 1, 0.5 или 0.
+        """
+        if score > 0.5:
+            self.wins += 1
+        elif score < 0.5:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def variance(self) -> float:
+        """
+        Дисперсия очков за партию с поправкой: к выборке добавляется PRIOR_GAMES партий,
+        поровну побед и поражений.
+
+        Без поправки при одностороннем счёте (например, все победы против слабого бота)
+        дисперсия равна нулю, llr не определён и SPRT не останавливается ни на одной партии.
+        Поправка только увеличивает дисперсию (решение принимается чуть позже, ошибки SPRT
+        не растут), а её вклад убывает как 1/n. Доля очков в score и llr не поправляется.
+        """
+        if not self.games:
+            return 0.0
+        s = self.score
+        wins, losses = self.wins + PRIOR_GAMES / 2, self.losses + PRIOR_GAMES / 2
+        return ((wins * (1 - s) ** 2 + self.draws * (0.5 - s) ** 2 + losses * s ** 2)
+                / (self.games + PRIOR_GAMES))
+
+    def elo(self) -> Tuple[float, float]:
+        """
+        Оценка разницы Эло и полуширина её 95% доверительного интервала.
+        """
+        s = self.score
+        if self.games < 2:
+            return elo_from_score(s), math.inf
+        margin = 1.96 * math.sqrt(self.variance() / self.games)
+        return elo_from_score(s), (elo_from_score(s + margin) - elo_from_score(s - margin)) / 2
+
+    def llr(self) -> float:
+        """
+        Логарифм отношения правдоподобия H1 к H0.
+        """
+        variance = self.variance()
+        if not variance:
+            return 0.0
+        s0, s1 = score_from_elo(self.elo0), score_from_elo(self.elo1)
+        return self.games * (s1 - s0) * (2 * self.score - s0 - s1) / (2 * variance)
+
+    def decision(self) -> Optional[str]:
+        """
+        Решение SPRT: 'H1' (изменение сильнее), 'H0' (не сильнее) или None, если данных мало.
+        """
+        llr = self.llr()
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def report(self) -> str:
+        """
+        Строка отчёта о текущем состоянии матча.
+        """
+        elo, margin = self.elo()
+        return (f'Партий {self.games}: +{self.wins} ={self.draws} -{self.losses}, '
+                f'очки {self.score:.3f}, Эло {elo:+.1f} ± {margin:.1f}, '
+                f'LLR {self.llr():.2f} [{self.lower:.2f}, {self.upper:.2f}]')
+
+
+def run_match(engine: PlayerConfig, baseline: PlayerConfig, games: int = 100, workers: Optional[int] = None,
+              seed: int = 0, size: int = 15, renju: bool = True, opening_moves: int = 4,
+              stats: Optional[MatchStats] = None, report_every: int = 10, sprt_stop: bool = True) -> MatchStats:
+    """
+    Матч двух участников на пуле процессов.
+
+    Партии играются парами: каждый дебют (одно и то же зерно) разыгрывается дважды со сменой
+    цветов. Партии независимы, поэтому число партий в час растёт линейно с числом ядер.
+    В пул отправляется не больше двух партий на процесс сразу, чтобы при решении SPRT
+    матч остановился без долгого ожидания уже отправленных партий.
+
+    Параметры:
+    engine (PlayerConfig): Проверяемый участник.
+    baseline (PlayerConfig): Участник для сравнения.
+    games (int): Максимальное число партий.
+    workers (int): Число процессов (по умолчанию — число ядер).
+    seed (int): Зерно матча; зерно партии выводится из него и номера пары.
+    size (int): Размер поля.
+    renju (bool): Правила рэндзю.
+    opening_moves (int): Число ходов случайного дебюта.
+    stats (MatchStats): Статистика с настройками SPRT (по умолчанию — elo0=0, elo1=10).
+    report_every (int): Печатать отчёт каждые report_every партий (0 — не печатать).
+    sprt_stop (bool): Останавливать матч по решению SPRT.
+
+    Возвращает:
+    MatchStats: Итоговая статистика с точки зрения engine.
+    """
+    stats = stats or MatchStats()
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    total_moves = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Dict[Future, bool] = {}
+        scheduled = 0
+
+        def schedule() -> None:
+            nonlocal scheduled
+            while scheduled < games and len(pending) < 2 * workers:
+                # Чётные партии — engine за чёрных, нечётные — тот же дебют со сменой цветов
+                engine_black = scheduled % 2 == 0
+                game_seed = seed * 1000003 + scheduled // 2
+                black, white = (engine, baseline) if engine_black else (baseline, engine)
+                future = pool.submit(play_game, scheduled, game_seed, black, white, size, renju, opening_moves)
+                pending[future] = engine_black
+                scheduled += 1
+
+        schedule()
+        while pending:
+            done: Set[Future]
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                engine_black = pending.pop(future)
+                _, winner, moves = future.result()
+                total_moves += moves
+                engine_color = BLACK if engine_black else WHITE
+                stats.add(0.5 if winner == EMPTY else 1.0 if winner == engine_color else 0.0)
+                if report_every and stats.games % report_every == 0:
+                    print(stats.report(), flush=True)
+            if sprt_stop and stats.decision() is not None:
+                for future in pending:
+                    future.cancel()
+                break
+            schedule()
+    elapsed = time.perf_counter() - started
+    print(stats.report())
+    decision = stats.decision()
+    if decision is not None:
+        print(f'SPRT: принята гипотеза {decision}')
+    print(f'{stats.games} партий за {elapsed:.1f} с на {workers} процессах: '
+          f'{stats.games * 3600 / elapsed:.0f} партий/час, {total_moves / max(stats.games, 1):.1f} ходов в партии')
+    return stats
+
+
+def main() -> None:
+    """
+    Консольная точка входа арены.
+    """
+    parser = argparse.ArgumentParser(description='Матч двух конфигураций бота на всех ядрах.')
+    parser.add_argument('--engine', default='search:20000', help="Проверяемый бот: 'search[:узлы|:секундыs]'")
+    parser.add_argument('--baseline', default='greedy', help="Бот для сравнения, например 'greedy'")
+    parser.add_argument('--games', type=int, default=200, help='Максимальное число партий')
+    parser.add_argument('--workers', type=int, default=None, help='Число процессов (по умолчанию — все ядра)')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно матча')
+    parser.add_argument('--size', type=int, default=15, help='Размер поля')
+    parser.add_argument('--gomoku', action='store_true', help='Свободный гомоку вместо рэндзю')
+    parser.add_argument('--opening-moves', type=int, default=4, help='Ходов случайного дебюта')
+    parser.add_argument('--elo0', type=float, default=0.0, help='Разница Эло гипотезы H0')
+    parser.add_argument('--elo1', type=float, default=10.0, help='Разница Эло гипотезы H1')
+    parser.add_argument('--report-every', type=int, default=10, help='Печатать отчёт каждые N партий')
+    parser.add_argument('--no-sprt-stop', action='store_true', help='Играть все партии независимо от SPRT')
+    args = parser.parse_args()
+    run_match(PlayerConfig.parse(args.engine), PlayerConfig.parse(args.baseline), games=args.games,
+              workers=args.workers, seed=args.seed, size=args.size, renju=not args.gomoku,
+              opening_moves=args.opening_moves, stats=MatchStats(args.elo0, args.elo1),
+              report_every=args.report_every, sprt_stop=not args.no_sprt_stop)
+
+
+if __name__ == '__main__':
+    main()
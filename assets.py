@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import pygame
+
+# Изображения, нужные с первого кадра и первого хода: фишки, фоны, картинки итогов
+PRELOAD_IMAGES: Tuple[Tuple[str, Optional[Tuple[int, int]], Union[bool, int]], ...] = (
+    ('images/black.png', (40, 40), True),
+    ('images/white.png', (40, 40), True),
+    ('images/black.png', (40, 40), 128),
+    ('images/white.png', (40, 40), 128),
+    ('images/black.png', None, True),
+    ('images/white.png', None, True),
+    ('images/background.png', None, False),
+    ('images/grid0.jpg', None, False),
+    ('images/grid1.jpg', None, False),
+    ('images/grid2.jpg', None, False),
+    ('images/winner.png', (290, 150), True),
+    ('images/robot.png', (290, 190), True),
+    ('images/player.png', (290, 190), True),
+)
+
+Color = Tuple[int, int, int]
+
+
+class AssetCache:
+    def __init__(self, max_surfaces: int = 128, max_texts: int = 256) -> None:
+        """
+        Общий кэш изображений, масштабированных поверхностей и отрисованного текста.
+
+        Изображения хранятся по ключу (путь, размер, прозрачность), текст — по ключу
+        (шрифт, размер, текст, цвет, фон). Оба кэша ограничены и вытесняют давно
+        не использованные записи. Возвращаемые поверхности общие: изменять их нельзя.
+
+        Параметры:
+        max_surfaces (int): Сколько изображений хранить.
+        max_texts (int): Сколько надписей хранить.
+        """
+        self.max_surfaces: int = max_surfaces
+        self.max_texts: int = max_texts
+        self._surfaces: 'OrderedDict[Tuple, pygame.Surface]' = OrderedDict()
+        self._texts: 'OrderedDict[Tuple, pygame.Surface]' = OrderedDict()
+        self._fonts: Dict[Tuple[Optional[str], int], pygame.font.Font] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def image(self, path: str, size: Optional[Tuple[int, int]] = None,
+              alpha: Union[bool, int] = True) -> pygame.Surface:
+        """
+        Изображение из файла, при необходимости масштабированное.
+
+        Параметры:
+        path (str): Путь к файлу.
+        size (tuple): Размер (ширина, высота) или None для исходного.
+        alpha (bool или int): True — с альфа-каналом, False — без него (фоны),
+                              число 0–255 — с альфа-каналом и общей полупрозрачностью.
+        """
+        key = (path, size, alpha)
+        surface = self._get(self._surfaces, key)
+        if surface is None:
+            surface = pygame.image.load(path)
+            surface = surface.convert() if alpha is False else surface.convert_alpha()
+            if size is not None and surface.get_size() != size:
+                surface = pygame.transform.scale(surface, size)
+            if alpha is not True and alpha is not False:
+                surface.set_alpha(alpha)
+            self._put(self._surfaces, key, surface, self.max_surfaces)
+        return surface
+
+    def font(self, size: int, name: Optional[str] = None) -> pygame.font.Font:
+        """
+        Шрифт заданного размера (None — шрифт pygame по умолчанию).
+        """
+        key = (name, size)
+        if key not in self._fonts:
+            self._fonts[key] = pygame.font.Font(name, size)
+        return self._fonts[key]
+
+    def text(self, text: str, size: int, color: Color, background: Optional[Color] = None,
+             font: Optional[str] = None) -> pygame.Surface:
+        """
+        Отрисованная сглаженная надпись.
+        """
+        key = (font, size, text, color, background)
+        surface = self._get(self._texts, key)
+        if surface is None:
+            surface = self.font(size, font).render(text, True, color, background)
+            self._put(self._texts, key, surface, self.max_texts)
+        return surface
+
+    def preload(self, images: Iterable[Tuple[str, Optional[Tuple[int, int]], Union[bool, int]]] = PRELOAD_IMAGES) \
+            -> None:
+        """
+        Загружает изображения заранее, чтобы первый кадр и первый ход не ждали диска.
+        Требует созданного окна (convert работает только при заданном режиме экрана).
+        """
+        for path, size, alpha in images:
+            self.image(path, size, alpha)
+
+    def clear_fonts(self) -> None:
+        """
+        Забывает шрифты; вызывается перед pygame.quit, после которого они недействительны.
+        """
+        self._fonts.clear()
+
+    def _get(self, cache: 'OrderedDict[Tuple, pygame.Surface]', key: Tuple) -> Optional[pygame.Surface]:
+        """
+        Достаёт запись и отмечает её как недавно использованную.
+        """
+        surface = cache.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        cache.move_to_end(key)
+        return surface
+
+    @staticmethod
+    def _put(cache: 'OrderedDict[Tuple, pygame.Surface]', key: Tuple, surface: pygame.Surface, limit: int) -> None:
+        """
+        Кладёт запись, вытесняя самые давно использованные сверх лимита.
+        """
+        cache[key] = surface
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+
+_shared_cache: Optional[AssetCache] = None
+
+
+def shared_cache() -> AssetCache:
+    """
+    Возвращает общий для всех окон кэш ресурсов, создавая его при первом обращении.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = AssetCache()
+    return _shared_cache
@@ -0,0 +1,111 @@
+import random
+import time
+from typing import Tuple
+
+import numpy as np
+
+from position import Position, DIRECTIONS, BLACK, WHITE, opponent
+from line_table import RADIUS, OFFSETS, DIGIT_OWN, DIGIT_BLOCKED, TABLE_CLASS, TABLE_SCORE, LineEvaluator
+
+# Таблицы line_table в виде массивов для выборки по массиву кодов
+SCORE_ARRAY: np.ndarray = np.array(TABLE_SCORE, dtype=np.int64)
+CLASS_ARRAY: np.ndarray = np.frombuffer(bytes(TABLE_CLASS), dtype=np.uint8)
+WEIGHTS: Tuple[int, ...] = tuple(3 ** j for j in range(len(OFFSETS)))
+
+
+def plane(position: Position, color: int) -> np.ndarray:
+    """
+    Плоскость фишек цвета color: массив int8 размера size x size (1 — фишка, 0 — нет).
+
+    Битборд разворачивается в байты и распаковывается по битам за один вызов,
+    столбец-разделитель отбрасывается.
+    """
+    size, stride = position.size, position.stride
+    cells = size * stride
+    raw = np.frombuffer(position.boards[color].to_bytes((cells + 7) // 8, 'little'), dtype=np.uint8)
+    bits = np.unpackbits(raw, bitorder='little')[:cells]
+    return bits.reshape(size, stride)[:, :size].view(np.int8)
+
+
+def window_codes(position: Position, color: int) -> np.ndarray:
+    """
+    Коды окон line_table для всех клеток сразу: массив int32 формы (4, size, size).
+
+    Поле переводится в цифры кода (своя фишка, чужая фишка или край — заблокировано)
+    и обкладывается рамкой заблокированных клеток шириной RADIUS. Код направления
+    складывается из 2 * RADIUS сдвинутых срезов этой плоскости, то есть совпадает
+    с кодом, который LineEvaluator поддерживает инкрементально.
+    """
+    size = position.size
+    digits = DIGIT_OWN * plane(position, color) + DIGIT_BLOCKED * plane(position, opponent(color))
+    padded = np.pad(digits, RADIUS, constant_values=DIGIT_BLOCKED).astype(np.int32)
+    codes = np.zeros((len(DIRECTIONS), size, size), dtype=np.int32)
+    for d, (dr, dc) in enumerate(DIRECTIONS):
+        for k, weight in zip(OFFSETS, WEIGHTS):
+            row, col = RADIUS + dr * k, RADIUS + dc * k
+            codes[d] += weight * padded[row:row + size, col:col + size]
+    return codes
+
+
+def score_map(position: Position, color: int) -> np.ndarray:
+    """
+    Оценка хода цвета color в каждую клетку, как LineEvaluator.score, массивом size x size.
+
+    Для занятых клеток значение не имеет смысла и не используется.
+    """
+    return SCORE_ARRAY[window_codes(position, color)].sum(axis=0)
+
+
+def class_map(position: Position, color: int) -> np.ndarray:
+    """
+    Сильнейший класс линии для хода цвета color в каждую клетку, как LineEvaluator.move_class.
+    """
+    return CLASS_ARRAY[window_codes(position, color)].min(axis=0)
+
+
+def _random_position(rng: random.Random, size: int, stones: int) -> Position:
+    """
+    Случайная позиция с фишками, расставленными по очереди.
+    """
+    position = Position(size)
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    for i, (x, y) in enumerate(rng.sample(cells, stones)):
+        position.place(x, y, BLACK if i % 2 == 0 else WHITE)
+    return position
+
+
+def benchmark(positions: int = 200, size: int = 15, seed: int = 0) -> None:
+    """
+    Сравнивает скорость векторной и скалярной оценки всех клеток на случайных позициях
+    (совпадение оценок проверяет tests/test_batch_eval.py).
+
+    Скалярная оценка меряется дважды: с построением LineEvaluator для позиции
+    (разовая оценка, как в векторной версии) и только выборкой из уже построенного оценщика
+    (как в поиске, где коды поддерживаются инкрементально).
+    """
+    rng = random.Random(seed)
+    samples = [_random_position(rng, size, rng.randrange(1, size * size // 3)) for _ in range(positions)]
+    scalar_build = scalar_lookup = vector = 0.0
+    for position in samples:
+        started = time.perf_counter()
+        evaluator = LineEvaluator(position)
+        built = time.perf_counter()
+        indices = [position.bit(x, y) for y in range(size) for x in range(size)]
+        for color in (BLACK, WHITE):
+            [evaluator.score(i, color) for i in indices]
+        looked_up = time.perf_counter()
+        for color in (BLACK, WHITE):
+            score_map(position, color).ravel().tolist()
+        done = time.perf_counter()
+        evaluator.detach()
+        scalar_build += built - started
+        scalar_lookup += looked_up - built
+        vector += done - looked_up
+    print(f'{positions} позиций {size}x{size}')
+    print(f'скалярно с построением оценщика: {scalar_build + scalar_lookup:.3f} с')
+    print(f'скалярно, только выборка:        {scalar_lookup:.3f} с')
+    print(f'векторно:                        {vector:.3f} с')
+
+
+if __name__ == '__main__':
+    benchmark()
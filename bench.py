@@ -0,0 +1,304 @@
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from position import Position, BLACK, WHITE, opponent
+from patterns import PatternTracker
+from robot_logic import find_threat_or_win, find_best_move_near_bot, greedy_move, select_move
+from search import Searcher, SearchBudget, TranspositionTable
+import parallel
+from threat_search import ThreatSolver
+
+Point = Tuple[int, int]
+
+
+class BenchPosition:
+    def __init__(self, name: str, category: str, black: Sequence[Point], white: Sequence[Point], to_move: int,
+                 solutions: Optional[Sequence[Point]] = None) -> None:
+        """
+        Позиция корпуса бенчмарка.
+
+        Параметры:
+        name (str): Имя позиции в отчёте.
+        category (str): Категория: 'win' (форсированный выигрыш), 'block' (обязательная защита),
+                        'quiet' (спокойная середина игры) или 'full' (почти заполненное поле).
+        black (list): Чёрные фишки (столбец, строка).
+        white (list): Белые фишки.
+        to_move (int): Цвет, который ходит.
+        solutions (list): Правильные ходы или None, если правильного хода нет.
+        """
+        self.name: str = name
+        self.category: str = category
+        self.black: Sequence[Point] = black
+        self.white: Sequence[Point] = white
+        self.to_move: int = to_move
+        self.solutions: Optional[FrozenSet[Point]] = frozenset(solutions) if solutions is not None else None
+
+    def position(self) -> Position:
+        """
+        Собирает позицию: сначала чёрные фишки, затем белые.
+        """
+        position = Position(15)
+        for x, y in self.black:
+            position.place(x, y, BLACK)
+        for x, y in self.white:
+            position.place(x, y, WHITE)
+        return position
+
+
+def _random_position(name: str, seed: int, stones: int, spread: int) -> BenchPosition:
+    """
+    Случайная позиция без пятёрок и четвёрок: фишки ставятся по очереди в квадрат
+    spread x spread вокруг центра, ходы, дающие ряд из четырёх, пропускаются.
+    """
+    rng = random.Random(seed)
+    position = Position(15)
+    low = 7 - spread // 2
+    cells = [(x, y) for y in range(low, low + spread) for x in range(low, low + spread)]
+    rng.shuffle(cells)
+    placed: Dict[int, List[Point]] = {BLACK: [], WHITE: []}
+    color = BLACK
+    for x, y in cells:
+        if len(placed[BLACK]) + len(placed[WHITE]) >= stones:
+            break
+        position.place(x, y, color)
+        if any(position.run_length(x, y, d, color) >= 4 for d in range(4)):
+            position.undo()
+            continue
+        placed[color].append((x, y))
+        color = opponent(color)
+    category = 'full' if stones > 150 else 'quiet'
+    return BenchPosition(name, category, placed[BLACK], placed[WHITE], color)
+
+
+# Корпус: форсированные выигрыши, обязательные защиты, спокойные позиции и почти полное поле
+CORPUS: List[BenchPosition] = [
+    BenchPosition('win-in-1-row', 'win', [(5, 7), (6, 7), (7, 7), (8, 7)], [(5, 8), (6, 8), (7, 8)], BLACK,
+                  [(4, 7), (9, 7)]),
+    BenchPosition('win-in-1-diagonal', 'win', [(4, 4), (5, 5), (6, 6), (7, 7)], [(3, 3), (4, 5), (5, 6), (6, 7)],
+                  BLACK, [(8, 8)]),
+    BenchPosition('vcf-four-three', 'win', [(5, 5), (6, 5), (7, 5), (8, 7), (8, 8)],
+                  [(4, 5), (0, 0), (14, 14), (0, 14), (14, 0)], BLACK, [(8, 5)]),
+    BenchPosition('vct-open-three', 'win', [(7, 7), (8, 7), (7, 8), (7, 9)], [(0, 0), (14, 14), (0, 14), (14, 0)],
+                  BLACK, [(7, 6), (7, 10)]),
+    BenchPosition('white-win-in-1', 'win', [(0, 0), (2, 2), (4, 4), (14, 14), (12, 0)],
+                  [(6, 9), (7, 9), (8, 9), (9, 9)], WHITE, [(5, 9), (10, 9)]),
+    BenchPosition('block-four', 'block', [(3, 3), (4, 4), (12, 12), (11, 2)], [(6, 6), (6, 7), (6, 8), (6, 9)],
+                  BLACK, [(6, 5), (6, 10)]),
+    BenchPosition('block-closed-four', 'block', [(6, 5), (4, 4), (12, 12), (11, 2)],
+                  [(6, 6), (6, 7), (6, 8), (6, 9)], BLACK, [(6, 10)]),
+    BenchPosition('block-open-three', 'block', [(3, 3), (11, 11), (12, 3)], [(6, 7), (7, 7), (8, 7)], BLACK,
+                  [(5, 7), (9, 7), (4, 7), (10, 7)]),
+    _random_position('quiet-early', 1, 12, 7),
+    _random_position('quiet-middle', 2, 24, 9),
+    _random_position('quiet-late', 3, 40, 11),
+    _random_position('near-full', 4, 200, 15),
+]
+
+
+def _timed(function: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    """
+    Среднее время одного вызова и результат последнего вызова.
+    """
+    started = time.perf_counter()
+    result = None
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def run_benchmarks(corpus: Sequence[BenchPosition] = CORPUS, node_limit: int = 5000, repeat: int = 20) \
+        -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Замеряет функции движка на каждой позиции корпуса.
+
+    Для каждой позиции измеряются find_threat_or_win, find_best_move_near_bot, проверка
+    победителя (Position.is_win_at, на которой построен Board.check_winner) по всем фишкам,
+    жадный бот, полный выбор хода бота (select_move без книги), поиск Searcher и поиск угроз.
+    Поиск ограничен узлами, поэтому число узлов и найденные ходы воспроизводимы.
+
+    Возвращает:
+    dict: '<позиция>/<замер>' -> {'time': секунды, 'nodes': узлы, 'nps': узлы в секунду,
+          'solved': решена ли позиция (None, если правильного хода нет)}.
+    """
+    results: Dict[str, Dict[str, Optional[float]]] = {}
+
+    def record(case: BenchPosition, name: str, seconds: float, move: object = None,
+               nodes: Optional[int] = None, checked: bool = False) -> None:
+        solved = move in case.solutions if checked and case.solutions is not None else None
+        results[f'{case.name}/{name}'] = {
+            'time': seconds,
+            'nodes': nodes,
+            'nps': nodes / seconds if nodes and seconds else None,
+            'solved': solved,
+        }
+
+    for case in corpus:
+        position = case.position()
+        color = case.to_move
+        stones = [position.coords(index) for index, _ in position.history]
+
+        seconds, _ = _timed(lambda: find_threat_or_win(position, color, 5), repeat)
+        record(case, 'find_threat_or_win', seconds)
+        rng = random.Random(0)
+        seconds, _ = _timed(lambda: find_best_move_near_bot(position, color, rng), repeat)
+        record(case, 'find_best_move_near_bot', seconds)
+        seconds, _ = _timed(lambda: [position.is_win_at(x, y, position.get(x, y)) for x, y in stones], repeat)
+        record(case, 'check_winner', seconds)
+
+        threats = PatternTracker(position)
+        seconds, move = _timed(lambda: greedy_move(position, threats, color, random.Random(0)), repeat)
+        threats.detach()
+        record(case, 'greedy_move', seconds, move, checked=True)
+
+        budget = SearchBudget(time_limit=None, node_limit=node_limit)
+        seconds, move = _timed(lambda: select_move(position, color, budget, use_book=False), 1)
+        record(case, 'bot_move', seconds, move, checked=True)
+
+        searcher = Searcher(position, TranspositionTable())
+        seconds, move = _timed(lambda: searcher.iterate(budget, color), 1)
+        record(case, 'search', seconds, move, searcher.nodes, checked=True)
+        searcher.close()
+
+        solver = ThreatSolver(position, time_limit=None, node_limit=node_limit)
+        seconds, move = _timed(lambda: solver.vcf(color) or solver.vct(color), 1)
+        # Поиск угроз ищет только собственный выигрыш, поэтому проверяется лишь на позициях 'win'
+        record(case, 'threat_search', seconds, move, solver.nodes, checked=case.category == 'win')
+        solver.close()
+    return results
+
+
+def summarize(results: Dict[str, Dict[str, Optional[float]]]) -> Dict[str, Optional[float]]:
+    """
+    Итоги: доля решённых позиций по каждому замеру, суммарная скорость поиска и общее время.
+    """
+    summary: Dict[str, Optional[float]] = {}
+    for measure in ('greedy_move', 'bot_move', 'search', 'threat_search'):
+        solved = [entry['solved'] for key, entry in results.items()
+                  if key.endswith('/' + measure) and entry['solved'] is not None]
+        summary[f'solve_rate/{measure}'] = sum(solved) / len(solved) if solved else None
+    searches = [entry for key, entry in results.items() if key.endswith('/search')]
+    total_time = sum(entry['time'] for entry in searches)
+    summary['search_nps'] = sum(entry['nodes'] or 0 for entry in searches) / total_time if total_time else None
+    summary['total_time'] = sum(entry['time'] for entry in results.values())
+    return summary
+
+
+def run_smp_benchmark(corpus: Sequence[BenchPosition] = CORPUS, threads: Sequence[int] = (1, 2, 4),
+                      time_limit: float = 1.0) -> Dict[str, Dict[str, float]]:
+    """
+    Замеряет параллельный поиск (parallel.LazySMP) при фиксированном времени на ход.
+
+    Каждая позиция корпуса без собственного выигрыша и не почти заполненная ищется с одним и тем же
+    лимитом времени при каждом числе процессов. Для каждого числа процессов считаются средняя
+    завершённая глубина, суммарная скорость всех процессов и её отношение к одному процессу.
+    Ускорение возможно, только пока процессов не больше, чем ядер.
+
+    Возвращает:
+    dict: '<число процессов>' -> {'depth': средняя глубина, 'nps': узлов в секунду,
+          'speedup': отношение nps к одному процессу, 'depth_gain': прирост средней глубины}.
+    """
+    # В позициях с выигрышем поиск останавливается на первой итерации и глубину не показывает
+    cases = [case for case in corpus if case.category in ('quiet', 'block')]
+    report: Dict[str, Dict[str, float]] = {}
+    for count in threads:
+        depths: List[int] = []
+        nodes = 0
+        seconds = 0.0
+        for case in cases:
+            position = case.position()
+            stats: Dict[str, float] = {}
+            parallel.choose_move(position, SearchBudget(time_limit, threads=count), case.to_move, stats)
+            if 'depth' in stats:
+                depths.append(stats['depth'])
+                nodes += stats['nodes']
+                seconds += stats['search_time']
+        parallel.close_shared_smp()
+        report[str(count)] = {'depth': sum(depths) / len(depths) if depths else 0.0,
+                              'nps': nodes / seconds if seconds else 0.0}
+    single = report[str(threads[0])]
+    for entry in report.values():
+        entry['speedup'] = entry['nps'] / single['nps'] if single['nps'] else 0.0
+        entry['depth_gain'] = entry['depth'] - single['depth']
+    return report
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.2, min_time: float = 0.001) -> List[str]:
+    """
+    Сравнивает результаты с сохранёнными и возвращает описания регрессий.
+
+    Регрессией считается рост времени замера больше чем в (1 + threshold) раз (для замеров
+    дольше min_time, чтобы не ловить шум), падение скорости поиска больше чем на threshold
+    и потеря решённой позиции.
+    """
+    regressions: List[str] = []
+    for key, entry in current['results'].items():
+        old = baseline['results'].get(key)
+        if old is None:
+            continue
+        if old['time'] >= min_time and entry['time'] > old['time'] * (1 + threshold):
+            regressions.append(f'{key}: время {old["time"] * 1000:.2f} → {entry["time"] * 1000:.2f} мс')
+        if old['nps'] and entry['nps'] and entry['nps'] < old['nps'] * (1 - threshold):
+            regressions.append(f'{key}: узлов/с {old["nps"]:.0f} → {entry["nps"]:.0f}')
+        if old['solved'] and entry['solved'] is False:
+            regressions.append(f'{key}: позиция больше не решается')
+    old_nps, new_nps = baseline['summary'].get('search_nps'), current['summary'].get('search_nps')
+    if old_nps and new_nps and new_nps < old_nps * (1 - threshold):
+        regressions.append(f'search_nps: {old_nps:.0f} → {new_nps:.0f}')
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, Optional[float]]], summary: Dict[str, Optional[float]]) -> None:
+    """
+    Печатает таблицу замеров и итоги.
+    """
+    for key, entry in results.items():
+        solved = {None: '', True: 'решено', False: 'НЕ РЕШЕНО'}[entry['solved']]
+        nps = f'{entry["nps"]:.0f} узл/с' if entry['nps'] else ''
+        print(f'{key:45} {entry["time"] * 1000:10.3f} мс {nps:>14} {solved}')
+    for key, value in summary.items():
+        print(f'{key:45} {value if value is None else round(value, 3)}')
+
+
+def main() -> None:
+    """
+    Консольная точка входа: прогон корпуса, запись JSON и сравнение с базовым прогоном.
+    """
+    parser = argparse.ArgumentParser(description='Бенчмарк движка на корпусе позиций.')
+    parser.add_argument('--nodes', type=int, default=5000, help='Лимит узлов поиска на позицию')
+    parser.add_argument('--repeat', type=int, default=20, help='Повторов для быстрых функций')
+    parser.add_argument('--output', default=None, help='Записать результаты в JSON-файл')
+    parser.add_argument('--baseline', default=None, help='JSON-файл прошлого прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Допустимое ухудшение (доля)')
+    parser.add_argument('--threads', type=int, nargs='*', default=None,
+                        help='Замерить параллельный поиск на этих числах процессов, например 1 2 4 8')
+    parser.add_argument('--smp-time', type=float, default=1.0, help='Время на ход при замере параллельного поиска')
+    args = parser.parse_args()
+
+    results = run_benchmarks(node_limit=args.nodes, repeat=args.repeat)
+    summary = summarize(results)
+    print_report(results, summary)
+    report = {'node_limit': args.nodes, 'results': results, 'summary': summary}
+    if args.threads:
+        report['smp'] = run_smp_benchmark(threads=args.threads, time_limit=args.smp_time)
+        for count, entry in report['smp'].items():
+            print(f'smp/{count:>3} процессов: глубина {entry["depth"]:.2f} ({entry["depth_gain"]:+.2f}), '
+                  f'{entry["nps"]:.0f} узл/с, ускорение {entry["speedup"]:.2f}x')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f'РЕГРЕССИЯ {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
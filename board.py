@@ -1,96 +1,180 @@
-import random
 import pygame
-from robot_logic import find_threat_or_win, find_best_move_near_bot
+from analysis import Analyzer, shared_analyzer
+from assets import shared_cache
+from bot_worker import BotWorker, shared_worker
+from engine import Engine
 from window import Window
-from typing import Callable, Optional, Tuple, List
+from typing import Callable, List, Optional, Tuple
 from button import ColorPath
+from position import Position, BLACK, WHITE, EMPTY
+from records import MAX_SIZE, GameRecord, save_game
+from scene import SceneManager
+from search import WIN_SCORE, WIN_THRESHOLD
+from stats import DEFAULT_LOG, Stats, shared_stats
+from timecontrol import DEFAULT_DIFFICULTY, Difficulty, TimeManager
+
+# Клавиша, показывающая и скрывающая панель статистики
+STATS_KEY = pygame.K_F3
+STATS_PANEL = pygame.Rect(640, 300, 200, 150)
+
+# Размеры поля на экране настроек. По правилам рэндзю играют на стандартном поле,
+# на остальных — свободный гомоку (побеждают пять и более в ряд)
+BOARD_SIZES: Tuple[int, ...] = (15, 19, 30)
+RENJU_SIZE = 15
+DEFAULT_SIZE = RENJU_SIZE
+# Поле занимает квадрат BOARD_AREA слева в окне, клетки — GRID_AREA пикселей по центру квадрата
+BOARD_AREA = 640
+GRID_AREA = 600
+GRID_COLOR = (70, 45, 25)
+
+# Кнопки анализа под кнопками управления и цвет включённого режима
+UNDO_BUTTON = (640, 210)
+REDO_BUTTON = (740, 210)
+HINT_BUTTON = (640, 255)
+ANALYSIS_BUTTON = (740, 255)
+ACTIVE_COLOR = (170, 220, 170)
+# Цвета подсказки от лучшего хода к худшему из показанных
+HEAT_BEST = (220, 40, 30)
+HEAT_WORST = (240, 210, 60)
 
 
 class Board:
     def __init__(self,
+                 manager: SceneManager,
                  player_color: str,
                  theme: str,
                  exit_to_lobby: Callable[[], None],
-                 exit_to_options: Callable[[], None]):
+                 exit_to_options: Callable[[], None],
+                 difficulty: Difficulty = DEFAULT_DIFFICULTY,
+                 threads: int = 1,
+                 size: int = DEFAULT_SIZE):
         """
         Инициализирует игровое поле и необходимые параметры.
 
         Параметры:
+        manager (SceneManager): Менеджер экранов, через который выполняются переходы.
         player_color (str): Цвет фишки игрока (путь к изображению фишки).
         theme (str): Тема игры.
         exit_to_lobby (Callable): Функция для выхода в лобби.
         exit_to_options (Callable): Функция для выхода в настройки.
+        difficulty (Difficulty): Уровень сложности бота (бюджет поиска хода).
+        threads (int): Число процессов поиска бота; больше одного — параллельный поиск Lazy SMP.
+        size (int): Размер поля; клетки масштабируются так, чтобы поле поместилось в окно.
         """
-        self._restart_board: Optional[Board] = None
+        self._manager: SceneManager = manager
         self._theme: str = theme
         self._board: Window = Window(icon='images/icon.png', width=840, height=640,
                                      background=self._theme, caption="RENJU")
         self._player_color: str = player_color
         self._bot_color: str = ColorPath.BLACK if player_color == ColorPath.WHITE else ColorPath.WHITE
+        self._player_stone: int = BLACK if player_color == ColorPath.BLACK else WHITE
+        self._bot_stone: int = BLACK if self._bot_color == ColorPath.BLACK else WHITE
         self._game_end: bool = False
         self._winner: Optional[pygame.Surface] = None
         self._exit_to_lobby_callback: Callable[[], None] = exit_to_lobby
         self._exit_to_options_callback: Callable[[], None] = exit_to_options
 
+        # Инициализация сетки: сторона клетки и отступ поля от края окна
+        self._grid_size: int = size
+        self._cell: int = GRID_AREA // size
+        self._margin: int = (BOARD_AREA - self._cell * size) // 2
+        if size != RENJU_SIZE:
+            self._board.change_background(self.grid_background())
+
         # Создание кнопок для игрового поля
-        size: int = 15
         for x in range(size):
             for y in range(size):
-                self._board.add_button(x=20 + 40 * x, y=20 + 40 * y, width=40, height=40,
+                pos = self.cell_pos(x, y)
+                self._board.add_button(x=pos[0], y=pos[1], width=self._cell, height=self._cell,
                                        size=36, color=(0, 0, 0),
                                        hover_color=(0, 0, 0),
                                        function=self.handle_click,
                                        on_close=False,
-                                       args=(20 + 40 * x, 20 + 40 * y),
+                                       args=pos,
                                        is_transparent=True,
                                        obj=player_color,
                                        text='')
 
         # Кнопки для управления игрой
-        self._board.add_button(640, 0, 200, 100, 26, (255, 255, 255), (185, 186, 189),
+        self._board.add_button(640, 0, 200, 70, 26, (255, 255, 255), (185, 186, 189),
                                self.restart,
                                True, None, False, None,
                                'Перезапуск')
-        self._board.add_button(640, 100, 200, 100, 26, (255, 255, 255), (185, 186, 189),
+        self._board.add_button(640, 70, 200, 70, 26, (255, 255, 255), (185, 186, 189),
                                self.exit_to_lobby,
                                True, None, False, None,
                                'Выход в '
                                'главное меню')
-        self._board.add_button(640, 200, 200, 100, 26, (255, 255, 255), (185, 186, 189),
+        self._board.add_button(640, 140, 200, 70, 26, (255, 255, 255), (185, 186, 189),
                                self.exit_to_options,
                                True, None, False, None,
                                'Выход в '
                                'настройки')
 
+        # Кнопки анализа: отмена и возврат хода, подсказка и режим анализа
+        self._board.add_button(*UNDO_BUTTON, 100, 45, 26, (255, 255, 255), (185, 186, 189),
+                               self.undo, False, None, False, None, '<')
+        self._board.add_button(*REDO_BUTTON, 100, 45, 26, (255, 255, 255), (185, 186, 189),
+                               self.redo, False, None, False, None, '>')
+        self._board.add_button(*HINT_BUTTON, 100, 45, 20, (255, 255, 255), (185, 186, 189),
+                               self.toggle_hint, False, None, False, None, 'Подсказка')
+        self._board.add_button(*ANALYSIS_BUTTON, 100, 45, 20, (255, 255, 255), (185, 186, 189),
+                               self.toggle_analysis, False, None, False, None, 'Анализ')
+
         # Загрузка изображений для победителя и бота
-        winner = pygame.transform.scale(pygame.image.load("images/winner.png"), (290, 150))
-        self._robot: pygame.Surface = pygame.transform.scale(pygame.image.load("images/robot.png"), (290, 190))
-        self._player: pygame.Surface = pygame.transform.scale(pygame.image.load("images/player.png"), (290, 190))
-        self._board.draw_figure(winner, 593, 300)
-
-        # Инициализация сетки
-        self._grid_size: int = 15
-        self._grid: List[List[Optional[str]]] = [[None for _ in range(self._grid_size)] for _ in range(self._grid_size)]
-        self._grid[7][7] = ColorPath.BLACK
-        self._board.buttons[(300, 300)].obj = (
-            pygame.transform.scale(pygame.image.load(ColorPath.BLACK).convert_alpha(), (40, 40)))
-        self._board.buttons[(300, 300)].is_transparent = False
+        assets = shared_cache()
+        winner = assets.image("images/winner.png", (290, 150))
+        self._robot: pygame.Surface = assets.image("images/robot.png", (290, 190))
+        self._player: pygame.Surface = assets.image("images/player.png", (290, 190))
+        self._board.set_figure('title', winner, 593, 300)
+
+        self._difficulty: Difficulty = difficulty
+        self._time: TimeManager = difficulty.time_manager(threads)
+        self._engine: Engine = Engine(size, renju=size == RENJU_SIZE)
+        self._position: Position = self._engine.position
+        centre = size // 2
+        self._position.place(centre, centre, BLACK)
+        self._worker: BotWorker = shared_worker()
+        self._thinking: pygame.Surface = assets.text('Бот думает...', 30, (0, 0, 0), (255, 255, 255))
+        start = self._board.buttons[self.cell_pos(centre, centre)]
+        start.obj = assets.image(ColorPath.BLACK, (self._cell, self._cell))
+        start.is_transparent = False
+
+        # Отменённые ходы (x, y, цвет) для возврата; новый ход очищает их
+        self._redo: List[Tuple[int, int, int]] = []
+        # В режиме анализа бот не отвечает, а нажатия ставят фишку того, чья очередь хода
+        self._analysing: bool = False
+        self._hint: bool = False
+        self._analyzer: Optional[Analyzer] = None
+        self._hint_shown: Optional[Tuple[int, int]] = None
+        self._recorded: bool = False
+
+        # Панель статистики под кнопками управления (F3); пока она скрыта, статистика не собирается
+        self._stats: Stats = shared_stats()
+        self._stats_shown: Optional[Tuple[int, int]] = None
+        if self._stats.enabled:
+            self.draw_stats()
 
         if player_color == ColorPath.BLACK:
             self.bot_move()
 
     def restart(self, args: Optional[Tuple[int, int]]) -> None:
         """
-        Перезапускает игру, создавая новое игровое поле.
+        Перезапускает игру, переключая на новое игровое поле.
         """
+        self._worker.cancel()
+        self.stop_analysis()
         self._board.on_close()
-        restart_board = Board(self._player_color, self._theme, self._exit_to_lobby_callback, self._exit_to_options_callback)
-        restart_board.run()
+        self._manager.switch(Board(self._manager, self._player_color, self._theme,
+                                   self._exit_to_lobby_callback, self._exit_to_options_callback,
+                                   self._difficulty, self._time.threads, self._grid_size))
 
     def exit_to_lobby(self, args: Optional[Tuple[int, int]]) -> None:
         """
         Выход в лобби.
         """
+        self._worker.cancel()
+        self.stop_analysis()
         self._board.on_close()
         self._exit_to_lobby_callback()
 
@@ -98,121 +182,372 @@ class Board:
         """
         Выход в настройки.
         """
+        self._worker.cancel()
+        self.stop_analysis()
         self._board.on_close()
         self._exit_to_options_callback()
 
-    def check_winner(self, row: int, col: int) -> bool:
+    def cell_pos(self, x: int, y: int) -> Tuple[int, int]:
         """
-        Проверяет наличие 5 фишек одного цвета в ряду.
+        Позиция кнопки клетки (x, y) в окне (левый верхний угол).
         """
-        directions: List[Tuple[int, int]] = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        current_color: Optional[str] = self._grid[row][col]
+        return self._margin + self._cell * x, self._margin + self._cell * y
 
-        for dr, dc in directions:
-            count: int = 1
-            for i in range(1, 5):
-                r, c = row + dr * i, col + dc * i
-                if 0 <= r < self._grid_size and 0 <= c < self._grid_size and self._grid[r][c] == current_color:
-                    count += 1
-                else:
-                    break
-            for i in range(1, 5):
-                r, c = row - dr * i, col - dc * i
-                if 0 <= r < self._grid_size and 0 <= c < self._grid_size and self._grid[r][c] == current_color:
-                    count += 1
-                else:
-                    break
+    def grid_background(self) -> pygame.Surface:
+        """
+        Фон для поля нестандартного размера.
 
-            if count >= 5:
-                return True
+        На фонах тем нарисована сетка 15x15, поэтому область поля приглушается
+        средним цветом темы и поверх рисуется сетка нужного размера.
+        """
+        background = shared_cache().image(self._theme, alpha=False).copy()
+        side = self._cell * self._grid_size
+        area = pygame.Rect(self._margin, self._margin, side, side)
+        shade = pygame.Surface(area.size)
+        shade.fill(pygame.transform.average_color(background, area)[:3])
+        shade.set_alpha(235)
+        background.blit(shade, area)
+        for i in range(self._grid_size + 1):
+            offset = self._margin + self._cell * i
+            pygame.draw.line(background, GRID_COLOR, (offset, area.top), (offset, area.bottom))
+            pygame.draw.line(background, GRID_COLOR, (area.left, offset), (area.right, offset))
+        return background
 
-        return False
+    def check_winner(self, row: int, col: int) -> bool:
+        """
+        Проверяет наличие 5 фишек одного цвета в ряду (для чёрных — ровно 5 по правилам рэндзю).
+        """
+        current_color: int = self._position.get(col, row)
+        if current_color == EMPTY:
+            return False
+        return self._position.is_win_at(col, row, current_color)
 
     def handle_click(self, pos: Tuple[int, int]) -> None:
         """
         Обрабатывает нажатие на поле и ставит фишку в нужное место.
+
+        Занятые клетки, запрещённые для чёрных по правилам рэндзю ходы и нажатия,
+        пока бот думает, игнорируются. В режиме анализа ставится фишка того, чья очередь хода,
+        и бот не отвечает.
         """
-        if not self._game_end:
+        if not self._game_end and not self._worker.thinking:
             x, y = pos
-            gridx = (x - 20) // 40
-            gridy = (y - 20) // 40
-            if self._grid[gridy][gridx] is None:
-                self._grid[gridy][gridx] = self._player_color
-                self._board.buttons[pos].is_transparent = False
-                if self.check_winner(gridy, gridx):
-                    self._game_end = True
-                    self._winner = self._player
-                    return
-                self.bot_move()
+            gridx = (x - self._margin) // self._cell
+            gridy = (y - self._margin) // self._cell
+            color = self._position.side_to_move if self._analysing else self._player_stone
+            if self._engine.is_legal(gridx, gridy, color):
+                self._redo.clear()
+                self.place_stone(gridx, gridy, color)
+                if not self._game_end and not self._analysing:
+                    self.bot_move()
+                self.refresh_hint()
 
-    def bot_move(self) -> None:
+    def place_stone(self, x: int, y: int, color: int) -> None:
+        """
+        Ставит фишку цвета color в клетку (x, y) и завершает партию, если ход выигрывает.
+        """
+        self._position.place(x, y, color)
+        button = self._board.buttons[self.cell_pos(x, y)]
+        button.obj = shared_cache().image(ColorPath.BLACK if color == BLACK else ColorPath.WHITE,
+                                          (self._cell, self._cell))
+        button.is_transparent = False
+        self._board.invalidate(button.rect)
+        if self.check_winner(y, x):
+            self.finish(self._player if color == self._player_stone else self._robot, color)
+
+    def take_back(self) -> None:
+        """
+        Снимает последнюю фишку с поля и запоминает её для возврата.
+        """
+        color = self._position.history[-1][1]
+        x, y = self._position.undo()
+        self._redo.append((x, y, color))
+        button = self._board.buttons[self.cell_pos(x, y)]
+        button.obj = shared_cache().image(self._player_color, (self._cell, self._cell))
+        button.is_transparent = True
+        self._board.invalidate(button.rect)
+        if self._game_end:
+            self._game_end = False
+            self._winner = None
+            self._board.remove_figure('winner')
+
+    def undo(self, args: Optional[Tuple[int, int]] = None) -> None:
         """
-        Логика хода бота.
+        Отменяет ход. В игре отменяется и ход игрока, и ответ бота, чтобы снова был ход игрока;
+        первый ход партии (и ответ бота на него, если игрок играет чёрными) не отменяется.
         """
-        # 1. Поиск победного хода
-        winning_move: Optional[Tuple[int, int]] = find_threat_or_win(self._grid_size, self._grid, self._bot_color, 5)
-        if winning_move:
-            self.place_bot_move(winning_move)
+        if self._worker.thinking:
+            return
+        first = 1 if self._analysing or self._player_stone == WHITE else 2
+        if len(self._position.history) <= first:
             return
+        self.take_back()
+        while (not self._analysing and len(self._position.history) > first
+               and self._position.side_to_move != self._player_stone):
+            self.take_back()
+        self.refresh_hint()
 
-        # 2. Блокировка игрока, если у него есть 4 фишки подряд
-        threat_move: Optional[Tuple[int, int]] = find_threat_or_win(self._grid_size, self._grid, self._player_color, 5)
-        if threat_move:
-            self.place_bot_move(threat_move)
+    def redo(self, args: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Возвращает отменённый ход. В игре возвращается и ответ бота; если его нет среди
+        отменённых ходов, бот ищет ответ заново.
+        """
+        if self._worker.thinking or self._game_end or not self._redo:
             return
+        self.place_stone(*self._redo.pop())
+        while (not self._analysing and not self._game_end and self._redo
+               and self._position.side_to_move != self._player_stone):
+            self.place_stone(*self._redo.pop())
+        if not self._analysing and not self._game_end and self._position.side_to_move == self._bot_stone:
+            self.bot_move()
+        self.refresh_hint()
+
+    def toggle_analysis(self, args: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Включает или выключает режим анализа. В режиме анализа сразу показывается подсказка;
+        после выхода из него, если очередь хода за ботом, бот продолжает партию.
+        """
+        if self._worker.thinking:
+            return
+        self._analysing = not self._analysing
+        self.mark_button(ANALYSIS_BUTTON, self._analysing)
+        if self._analysing and not self._hint:
+            self.toggle_hint()
+        if not self._analysing and not self._game_end and self._position.side_to_move == self._bot_stone:
+            self.bot_move()
+            self.refresh_hint()
+
+    def toggle_hint(self, args: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Показывает или скрывает подсказку: лучшие ходы текущей позиции с оценками,
+        которые уточняются фоновым анализом.
+        """
+        self._hint = not self._hint
+        self.mark_button(HINT_BUTTON, self._hint)
+        if self._hint:
+            self.refresh_hint()
+        else:
+            self.stop_analysis()
+
+    def mark_button(self, pos: Tuple[int, int], active: bool) -> None:
+        """
+        Выделяет цветом кнопку включённого режима.
+        """
+        button = self._board.buttons[pos]
+        button.color = ACTIVE_COLOR if active else (255, 255, 255)
+        self._board.invalidate(button.rect)
+
+    @property
+    def analyzer(self) -> Analyzer:
+        """
+        Фоновый анализ; процесс запускается при первой подсказке.
+        """
+        if self._analyzer is None:
+            self._analyzer = shared_analyzer()
+        return self._analyzer
+
+    def stop_analysis(self) -> None:
+        """
+        Останавливает фоновый анализ и убирает подсказку с поля.
+        """
+        if self._analyzer is not None:
+            self._analyzer.cancel()
+        self._board.remove_figure('hint')
+        self._hint_shown = None
 
-        # 3. Блокировка игрока, если у него есть 3 фишки подряд
-        threat_move = find_threat_or_win(self._grid_size, self._grid, self._player_color, 4)
-        if threat_move:
-            self.place_bot_move(threat_move)
+    def refresh_hint(self) -> None:
+        """
+        Запускает анализ новой позиции, если подсказка включена. Разобранная ранее позиция
+        показывается сразу из кэша анализа. Пока бот думает или партия окончена, подсказки нет.
+        """
+        if not self._hint:
+            return
+        if self._game_end or self._worker.thinking:
+            self.stop_analysis()
             return
+        self.analyzer.analyse(self._position)
+        self.draw_hint()
 
-        # 4. Поиск хода рядом с фишками бота
-        best_move: Optional[Tuple[int, int]] = find_best_move_near_bot(self._grid_size, self._grid, self._bot_color)
-        if best_move:
-            self.place_bot_move(best_move)
+    def draw_hint(self) -> None:
+        """
+        Рисует лучшие ходы анализа поверх поля: клетки окрашиваются от красного (лучший ход)
+        к жёлтому, в каждой — оценка хода с точки зрения ходящего.
+        """
+        result = self.analyzer.lines(self._position)
+        shown = (self._position.hash, result[0]) if result is not None else None
+        if shown == self._hint_shown:
+            return
+        self._hint_shown = shown
+        if result is None:
+            self._board.remove_figure('hint')
             return
+        depth, lines = result
+        overlay = pygame.Surface((BOARD_AREA, BOARD_AREA), pygame.SRCALPHA)
+        # Числа меняются с каждой глубиной, поэтому рисуются шрифтом напрямую, минуя кэш надписей
+        font = shared_cache().font(max(12, self._cell // 2))
+        for rank, (x, y, score) in enumerate(lines):
+            share = rank / max(1, len(lines) - 1)
+            color = tuple(int(best + (worst - best) * share) for best, worst in zip(HEAT_BEST, HEAT_WORST))
+            cell = pygame.Rect(self.cell_pos(x, y), (self._cell, self._cell)).inflate(-2, -2)
+            overlay.fill((*color, 170), cell)
+            label = font.render(self.score_text(score), True, (0, 0, 0))
+            overlay.blit(label, label.get_rect(center=cell.center))
+        caption = shared_cache().font(16).render(f'Анализ: глубина {depth}', True, (0, 0, 0))
+        overlay.blit(caption, (self._margin, BOARD_AREA - self._margin + 2))
+        self._board.set_figure('hint', overlay, 0, 0)
 
-        # 5. Если нет угроз и победных ходов, делаем случайный ход
-        available_moves: List[Tuple[int, int]] = [(x, y) for x in range(self._grid_size) for y in range(self._grid_size)
-                                                  if self._grid[y][x] is None]
-        if available_moves:
-            self.place_bot_move(random.choice(available_moves))
+    @staticmethod
+    def score_text(score: int) -> str:
+        """
+        Короткая запись оценки хода: «В3» — выигрыш за 3 своих хода, «П2» — проигрыш, иначе оценка в сотнях очков.
+        """
+        if abs(score) > WIN_THRESHOLD:
+            moves = (WIN_SCORE - abs(score) + 1) // 2
+            return f'В{moves}' if score > 0 else f'П{moves}'
+        return f'{score / 100:+.1f}'
+
+    def bot_move(self) -> None:
+        """
+        Отправляет позицию боту; ход ищется в фоновом процессе и забирается в poll_bot_move.
+        Время на ход распределяется по уровню сложности и характеру позиции.
+        """
+        budget = self._time.budget(self._position, self._bot_stone)
+        self._worker.submit(self._position, self._bot_stone, budget,
+                            collect_stats=self._stats.enabled)
+
+    def poll_bot_move(self) -> None:
+        """
+        Размещает ход бота, если фоновый процесс его уже нашёл.
+        """
+        done, move = self._worker.poll()
+        if done and self._stats.enabled and self._worker.last_stats is not None:
+            self._stats.record('engine', self._worker.last_stats)
+        if done and move:
+            self.place_bot_move(move)
 
     def place_bot_move(self, move: Tuple[int, int]) -> None:
         """
         Размещает фишку бота на поле.
         """
         x, y = move
-        button_pos = (x * 40 + 20, y * 40 + 20)
+        button_pos = self.cell_pos(x, y)
 
         if button_pos in self._board.buttons:
-            self._grid[y][x] = self._bot_color
-            self._board.buttons[button_pos].obj = (
-                pygame.transform.scale(pygame.image.load(self._bot_color).convert_alpha(), (40, 40))
-            )
-            self._board.buttons[button_pos].is_transparent = False
-
-            if self.check_winner(y, x):
-                self._game_end = True
-                self._winner = self._robot
+            self.place_stone(x, y, self._bot_stone)
+            self.refresh_hint()
         else:
             print(f"Invalid button position: {button_pos}")
 
-    def run(self) -> None:
+    def toggle_stats(self) -> None:
+        """
+        Показывает или скрывает панель статистики. Пока панель показана, статистика
+        движка и кадров собирается и дописывается в журнал stats.DEFAULT_LOG.
+        """
+        if self._stats.enabled:
+            self._stats.disable()
+            self._board.remove_figure('stats')
+            self._stats_shown = None
+        else:
+            self._stats.enable(DEFAULT_LOG)
+            self.draw_stats()
+
+    def draw_stats(self) -> None:
         """
-        Запуск игрового цикла.
+        Перерисовывает панель статистики, если с прошлого раза появились новые записи.
         """
-        while self._board.running:
-            self._board.draw_interface(0, 0)
-            pygame.display.update()
+        stats = self._stats
+        shown = (stats.counts.get('engine', 0), stats.counts.get('frame', 0))
+        if shown == self._stats_shown:
+            return
+        self._stats_shown = shown
+        engine = stats.last.get('engine', {})
+        frame = stats.last.get('frame', {})
+        probes = engine.get('tt_probes', 0)
+        lines = [
+            'Бот думает...' if self._worker.thinking else
+            f"Ход: {engine.get('phase', '-')} {engine.get('total_time', 0) * 1000:.0f} мс",
+            f"Выигрыш/защита: {engine.get('win_time', 0) * 1000:.0f}/{engine.get('block_time', 0) * 1000:.0f} мс",
+            f"Поиск: {engine.get('search_time', 0) * 1000:.0f} мс",
+            f"Узлы: {engine.get('nodes', 0)}, глубина {engine.get('depth', 0)}",
+            f"ТТ: {100 * engine.get('tt_hits', 0) / probes if probes else 0:.0f}%, "
+            f"отсечения {engine.get('cutoffs', 0)}",
+            f"Кадр: {frame.get('frame_time', 0) * 1000:.1f} мс, blit {frame.get('blits', 0)}",
+            f"События: {frame.get('event_time', 0) * 1000:.1f} мс",
+            f"Средний кадр: {stats.mean('frame', 'frame_time') * 1000:.1f} мс",
+        ]
+        # Числа меняются каждый кадр, поэтому строки рисуются шрифтом напрямую, минуя кэш надписей
+        font = shared_cache().font(18)
+        panel = pygame.Surface(STATS_PANEL.size)
+        panel.fill((255, 255, 255))
+        for row, line in enumerate(lines):
+            panel.blit(font.render(line, True, (0, 0, 0)), (6, 4 + 18 * row))
+        self._board.set_figure('stats', panel, STATS_PANEL.x, STATS_PANEL.y)
+
+    def finish(self, winner_image: pygame.Surface, winner: int) -> None:
+        """
+        Завершает партию: показывает победителя и сохраняет запись партии.
+        """
+        self._game_end = True
+        self._winner = winner_image
+        self._board.set_figure('winner', winner_image, 593, 450)
+        # Партия сохраняется один раз: позиции режима анализа и повторы после отмены ходов не сохраняются
+        if not self._analysing and not self._recorded:
+            self._recorded = True
+            self.save_record(winner)
+
+    def save_record(self, winner: int) -> None:
+        """
+        Сохраняет законченную партию в файл партий (records.DEFAULT_PATH).
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self._board.on_close()
-                if event.type == pygame.MOUSEMOTION:
-                    self._board.update_buttons(event.pos)
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    self._board.clicked(event.pos)
-                if self._board.running and self._game_end:
-                    self._board.draw_figure(self._winner, 593, 450)
+        Формат хранит ход в одном байте, поэтому партии на полях больше records.MAX_SIZE не сохраняются.
+        """
+        if self._grid_size > MAX_SIZE:
+            return
+        moves = [self._position.coords(index) for index, _ in self._position.history]
+        black, white = ('player', 'bot') if self._player_stone == BLACK else ('bot', 'player')
+        save_game(GameRecord(moves, winner, self._position.renju, black, white), size=self._grid_size)
+
+    @property
+    def window(self) -> Window:
+        """
+        Окно экрана для менеджера экранов.
+        """
+        return self._board
+
+    @property
+    def animating(self) -> bool:
+        """
+        Пока бот думает или идёт анализ подсказки, фоновые процессы опрашиваются с частотой кадров.
+        """
+        return self._worker.thinking or (self._hint and self._analyzer is not None and self._analyzer.running)
+
+    def update(self) -> None:
+        """
+        Забирает готовый ход бота и показывает, думает ли бот. Кадр после этого
+        перерисовывается только в изменившихся областях.
+        """
+        self.poll_bot_move()
+        if self._hint and self._analyzer is not None and self._analyzer.poll():
+            self.draw_hint()
+        # Панель статистики закрывает надпись, поэтому при ней бот думает в первой строке панели
+        if self._worker.thinking and not self._stats.enabled:
+            if 'thinking' not in self._board.figures:
+                self._board.set_figure('thinking', self._thinking, 660, 320)
+        else:
+            self._board.remove_figure('thinking')
+        if self._stats.enabled:
+            self.draw_stats()
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        """
+        Обрабатывает событие игрового поля.
+        """
+        if event.type == pygame.QUIT:
+            self._worker.cancel()
+            self._board.on_close()
+        if event.type == pygame.MOUSEMOTION:
+            self._board.update_buttons(event.pos)
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self._board.clicked(event.pos)
+        if event.type == pygame.KEYDOWN and event.key == STATS_KEY:
+            self.toggle_stats()
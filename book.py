@@ -0,0 +1,265 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from position import Position, BLACK, EMPTY, opponent
+from renju import ForbiddenDetector, is_legal_move
+from symmetry import SymmetricHash, canonical, inverse, transform
+
+# Заголовок файла: сигнатура, версия, размер поля, правила (1 — рэндзю, 0 — гомоку), число записей
+HEADER = struct.Struct('<4sBBBxI')
+MAGIC = b'RJBK'
+VERSION = 2
+# Запись: ключ позиции, ход (столбец, строка) в канонической ориентации, вес хода
+ENTRY = struct.Struct('<QBBH')
+MAX_WEIGHT = 0xFFFF
+
+DEFAULT_PATH = 'setting/book.bin'
+
+
+class BookBuilder:
+    def __init__(self, size: int = 15, renju: bool = True, max_ply: int = 12) -> None:
+        """
+        Собирает статистику ходов из записей партий для книги дебютов.
+
+        Позиции приводятся к канонической ориентации, поэтому симметричные дебюты
+        складываются в одну запись. Вес хода — очки, которые он принёс сделавшему его
+        цвету: 2 за победу, 1 за ничью.
+
+        Параметры:
+        size (int): Размер поля.
+        renju (bool): Правила рэндзю.
+        max_ply (int): Сколько первых ходов партии попадает в книгу.
+        """
+        self.size: int = size
+        self.renju: bool = renju
+        self.max_ply: int = max_ply
+        # (ключ, столбец, строка) -> вес
+        self.weights: Dict[Tuple[int, int, int], int] = {}
+
+    def add_game(self, moves: Sequence[Tuple[int, int]], winner: int) -> None:
+        """
+        Добавляет партию: ходы (столбец, строка) по очереди начиная с чёрных и цвет победителя
+        (EMPTY — ничья).
+        """
+        position = Position(self.size, self.renju)
+        hashes = SymmetricHash(position)
+        color = BLACK
+        for x, y in moves[:self.max_ply]:
+            points = 1 if winner == EMPTY else 2 if winner == color else 0
+            if points:
+                key, symmetry = hashes.canonical()
+                cx, cy = transform(x, y, self.size, symmetry)
+                entry = (key, cx, cy)
+                self.weights[entry] = self.weights.get(entry, 0) + points
+            position.place(x, y, color)
+            color = opponent(color)
+        hashes.detach()
+
+    def write(self, path: str, min_weight: int = 2) -> int:
+        """
+        Записывает книгу: заголовок и записи фиксированной длины, отсортированные по ключу.
+
+        Параметры:
+        path (str): Путь к файлу книги.
+        min_weight (int): Ходы с меньшим весом в книгу не попадают.
+
+        Возвращает:
+        int: Число записанных записей.
+        """
+        entries = sorted((key, x, y, min(weight, MAX_WEIGHT))
+                         for (key, x, y), weight in self.weights.items() if weight >= min_weight)
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.size, int(self.renju), len(entries)))
+            for entry in entries:
+                f.write(ENTRY.pack(*entry))
+        return len(entries)
+
+
+class OpeningBook:
+    def __init__(self, path: str) -> None:
+        """
+        Книга дебютов, открытая через mmap.
+
+        Файл не читается целиком: при поиске двоичным поиском затрагиваются только
+        нужные страницы, поэтому большая книга не требует времени на загрузку и памяти.
+        Книга отвечает только для позиций с теми же размером поля и правилами, что и у неё.
+
+        Параметры:
+        path (str): Путь к файлу книги.
+
+        Исключения:
+        ValueError: Если файл не является книгой дебютов.
+        """
+        self._file = open(path, 'rb')
+        self._map: mmap.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f'{path} не является книгой дебютов')
+        magic, version, self.size, renju, self.count = HEADER.unpack_from(self._map, 0)
+        self.renju: bool = bool(renju)
+        if magic != MAGIC or version != VERSION \
+                or len(self._map) != HEADER.size + self.count * ENTRY.size:
+            self.close()
+            raise ValueError(f'{path} не является книгой дебютов')
+
+    def close(self) -> None:
+        """
+        Закрывает отображение и файл.
+        """
+        self._map.close()
+        self._file.close()
+
+    def _entry(self, i: int) -> Tuple[int, int, int, int]:
+        """
+        Запись с номером i: (ключ, столбец, строка, вес).
+        """
+        return ENTRY.unpack_from(self._map, HEADER.size + i * ENTRY.size)
+
+    def _lower_bound(self, key: int) -> int:
+        """
+        Номер первой записи с ключом не меньше key.
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def moves(self, position: Position) -> List[Tuple[int, int, int]]:
+        """
+        Ходы книги для позиции в её собственной ориентации.
+
+        Возвращает:
+        list: (столбец, строка, вес) для ходов, допустимых для очереди хода (свободная клетка,
+              для чёрных в рэндзю — не запрещённая); пустой список, если позиции нет в книге.
+        """
+        if position.size != self.size or position.renju != self.renju:
+            return []
+        key, symmetry = canonical(position)
+        result: List[Tuple[int, int, int]] = []
+        i = self._lower_bound(key)
+        while i < self.count:
+            entry_key, cx, cy, weight = self._entry(i)
+            if entry_key != key:
+                break
+            x, y = inverse(cx, cy, self.size, symmetry)
+            if position.is_empty(x, y):
+                result.append((x, y, weight))
+            i += 1
+        if result and position.renju and position.side_to_move == BLACK:
+            detector = ForbiddenDetector(position)
+            try:
+                result = [move for move in result if is_legal_move(position, detector, move[0], move[1], BLACK)]
+            finally:
+                detector.detach()
+        return result
+
+    def choose(self, position: Position, rng: Optional[random.Random] = None) -> Optional[Tuple[int, int]]:
+        """
+        Выбирает ход книги случайно пропорционально весам или возвращает None.
+        """
+        moves = self.moves(position)
+        if not moves:
+            return None
+        x, y, _ = (rng or random).choices(moves, weights=[weight for _, _, weight in moves])[0]
+        return x, y
+
+
+_default_book: Optional[OpeningBook] = None
+_default_loaded: bool = False
+
+
+def default_book() -> Optional[OpeningBook]:
+    """
+    Книга из DEFAULT_PATH, открываемая при первом обращении, или None, если файла нет.
+    """
+    global _default_book, _default_loaded
+    if not _default_loaded:
+        _default_loaded = True
+        if os.path.exists(DEFAULT_PATH):
+            try:
+                _default_book = OpeningBook(DEFAULT_PATH)
+            except (OSError, ValueError):
+                _default_book = None
+    return _default_book
+
+
+def _self_play(seed: int, node_limit: int, size: int, renju: bool, opening_moves: int) \
+        -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Партия основного бота с самим собой для построения книги; вызывается в процессе пула.
+    """
+    from arena import PlayerConfig, play_record
+
+    player = PlayerConfig('search', node_limit=node_limit)
+    return play_record(seed, player, player, size, renju, opening_moves)
+
+
+def build_from_self_play(path: str, games: int, node_limit: int = 20000, size: int = 15, renju: bool = True,
+                         opening_moves: int = 4, max_ply: int = 12, seed: int = 0,
+                         workers: Optional[int] = None) -> int:
+    """
+    Строит книгу по партиям основного бота с самим собой, сыгранным на всех ядрах.
+
+    Возвращает:
+    int: Число записей в книге.
+    """
+    builder = BookBuilder(size, renju, max_ply)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        seeds = range(seed, seed + games)
+        for moves, winner in pool.map(_self_play, seeds, [node_limit] * games, [size] * games,
+                                      [renju] * games, [opening_moves] * games):
+            builder.add_game(moves, winner)
+    return builder.write(path)
+
+
+def build_from_records(path: str, records: Iterable[Tuple[Sequence[Tuple[int, int]], int]], size: int = 15,
+                       renju: bool = True, max_ply: int = 12) -> int:
+    """
+    Строит книгу по записям партий (ходы, цвет победителя).
+
+    Возвращает:
+    int: Число записей в книге.
+    """
+    builder = BookBuilder(size, renju, max_ply)
+    for moves, winner in records:
+        builder.add_game(moves, winner)
+    return builder.write(path)
+
+
+def main() -> None:
+    """
+    Консольная точка входа: строит книгу по партиям самоигры или по файлу партий.
+    """
+    parser = argparse.ArgumentParser(description='Построение книги дебютов по партиям самоигры.')
+    parser.add_argument('--output', default=DEFAULT_PATH, help='Файл книги')
+    parser.add_argument('--records', default=None, help='Файл партий (records.py) вместо самоигры')
+    parser.add_argument('--games', type=int, default=200, help='Число партий')
+    parser.add_argument('--nodes', type=int, default=20000, help='Лимит узлов на ход')
+    parser.add_argument('--max-ply', type=int, default=12, help='Сколько первых ходов попадает в книгу')
+    parser.add_argument('--opening-moves', type=int, default=4, help='Ходов случайного дебюта')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно первой партии')
+    parser.add_argument('--workers', type=int, default=None, help='Число процессов (по умолчанию — все ядра)')
+    args = parser.parse_args()
+    if args.records:
+        from records import read_records
+
+        records = ((record.moves, record.result) for _, record in read_records(args.records))
+        count = build_from_records(args.output, records, max_ply=args.max_ply)
+        print(f'{args.output}: {count} записей')
+        return
+    count = build_from_self_play(args.output, args.games, args.nodes, opening_moves=args.opening_moves,
+                                 max_ply=args.max_ply, seed=args.seed, workers=args.workers)
+    print(f'{args.output}: {count} записей')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+import atexit
+import multiprocessing
+import queue
+import time
+from typing import Dict, List, Optional, Tuple
+
+from position import Position, opponent
+from search import SearchBudget, choose_move, probe_move
+
+# Запрос: (номер, размер поля, рэндзю, история ходов, цвет бота, лимит времени, лимит узлов, глубина,
+# мягкий лимит времени, число процессов поиска, собирать ли статистику)
+Request = Tuple[int, int, bool, List[Tuple[int, int]], int, Optional[float], Optional[int], int, Optional[float], int,
+                bool]
+
+# Во сколько раз обдумывание без ответа соперника может быть дольше лимита хода
+PONDER_FACTOR = 4.0
+
+
+def _serve(requests: multiprocessing.Queue, results: multiprocessing.Queue, current, ponder: bool) -> None:
+    """
+    Цикл рабочего процесса: принимает позиции, считает ходы и возвращает результаты.
+
+    Поиск прерывается, как только номер текущего запроса в общей памяти перестаёт
+    совпадать с номером обрабатываемого (запрос отменён или заменён новым).
+    Если включено обдумывание, после ответа процесс продолжает считать ход на
+    предсказанный ответ соперника, пока не придёт следующий запрос (см. _ponder).
+    Вместе с ходом возвращается статистика его поиска, если она запрошена, иначе None.
+    """
+    # Импорт здесь, чтобы главный процесс не строил таблицы движка дважды при запуске через spawn
+    from robot_logic import select_move
+    from parallel import close_shared_smp
+
+    pondered: Optional[Tuple[Tuple, Optional[Tuple[int, int]]]] = None
+    waiting: List[Optional[Request]] = []
+    while True:
+        request: Optional[Request] = waiting.pop() if waiting else requests.get()
+        if request is None:
+            break
+        (request_id, size, renju, history, color, time_limit, node_limit, max_depth, soft_limit, threads,
+         collect) = request
+        if current.value != request_id:
+            continue
+        position = Position(size, renju)
+        for index, stone in history:
+            x, y = position.coords(index)
+            position.place(x, y, stone)
+
+        def stop(request_id: int = request_id) -> bool:
+            return current.value != request_id
+
+        budget = SearchBudget(time_limit, node_limit, max_depth, stop=stop, threads=threads, soft_limit=soft_limit)
+        stats: Optional[Dict[str, float]] = {} if collect else None
+        if pondered is not None and pondered[0] == _ponder_key(request):
+            # Соперник сыграл предсказанный ход, и обдумывание успело закончиться: ответ уже посчитан
+            move = pondered[1]
+            if stats is not None:
+                stats.update(phase='ponder', total_time=0.0)
+        else:
+            move = select_move(position, color, budget, stats=stats)
+        pondered = None
+        results.put((request_id, move, stats))
+        while ponder and move is not None:
+            watch = _PonderStop(requests, current, request)
+            answer = _ponder(position, color, move, watch, select_move)
+            if not watch.hit:
+                if watch.arrived:
+                    waiting.append(watch.arrived[0])
+                elif answer is not None:
+                    pondered = answer
+                break
+            # Ponderhit: обдумывание продолжилось как поиск хода на пришедший запрос
+            request = watch.arrived[0]
+            move = answer[1] if answer is not None else None
+            stats = {'phase': 'ponder', 'total_time': time.perf_counter() - watch.hit_time} if request[-1] else None
+            results.put((request[0], move, stats))
+    # Процесс завершается без atexit, поэтому помощников параллельного поиска нужно остановить явно
+    close_shared_smp()
+
+
+def _ponder_key(request: Request) -> Tuple:
+    """
+    Ключ запроса для сравнения с обдуманной позицией: поле, история, цвет бота и ограничения поиска,
+    кроме времени.
+    """
+    _, size, renju, history, color, _, node_limit, max_depth, _, threads, _ = request
+    return size, renju, tuple(history), color, node_limit, max_depth, threads
+
+
+class _PonderStop:
+    def __init__(self, requests: multiprocessing.Queue, current, request: Request) -> None:
+        """
+        Функция отмены обдумывания, которая следит за новыми запросами.
+
+        Пока номер текущего запроса прежний, обдумывание идёт не дольше PONDER_FACTOR лимитов хода.
+        Когда номер меняется, пришедший запрос забирается из очереди. Если он о позиции, которую
+        сейчас обдумывает процесс (key), это ponderhit: поиск не прерывается, а становится
+        поиском хода на этот запрос с лимитами времени этого запроса. Время обдумывания
+        засчитывается в время хода, поэтому после долгого обдумывания ответ приходит почти сразу.
+        Иначе поиск прерывается, а запрос сохраняется в arrived для основного цикла.
+
+        Параметры:
+        requests (Queue): Очередь запросов рабочего процесса.
+        current (Value): Номер текущего запроса в общей памяти.
+        request (Request): Запрос, после ответа на который идёт обдумывание.
+        """
+        self.requests: multiprocessing.Queue = requests
+        self.current = current
+        self.request_id: int = request[0]
+        time_limit = request[5]
+        self.deadline: Optional[float] = \
+            time.perf_counter() + PONDER_FACTOR * time_limit if time_limit is not None else None
+        # Ключ обдуманной позиции (_ponder_key) или None, пока ответ соперника не предсказан,
+        # и начало поиска ответа на предсказанный ход
+        self.key: Optional[Tuple] = None
+        self.started: float = 0.0
+        self.template: Request = request
+        self.hit: bool = False
+        self.hit_time: float = 0.0
+        self.cancelled: bool = False
+        self.arrived: List[Optional[Request]] = []
+
+    def __call__(self) -> bool:
+        if self.current.value == self.request_id:
+            return self.deadline is not None and time.perf_counter() >= self.deadline
+        if self.hit or self.arrived or self.cancelled:
+            return True
+        try:
+            # Номер меняется до отправки запроса, поэтому он приходит почти сразу; без запроса это отмена
+            request = self.requests.get(timeout=0.05)
+        except queue.Empty:
+            self.cancelled = True
+            return True
+        self.arrived.append(request)
+        if request is None or request[0] != self.current.value or self.key is None \
+                or _ponder_key(request) != self.key:
+            return True
+        self.hit = True
+        self.hit_time = time.perf_counter()
+        self.request_id = request[0]
+        # Время хода берётся из пришедшего запроса (мягкий лимит, а без него — жёсткий):
+        # бюджет на этот ход мог измениться с момента запроса, после которого шло обдумывание
+        time_limit, soft_limit = request[5], request[8]
+        move_time = soft_limit if soft_limit is not None else time_limit
+        self.deadline = max(self.hit_time, self.started + move_time) if move_time is not None else None
+        return False
+
+    def expect(self, position: Position, color: int) -> None:
+        """
+        Запоминает обдумываемую позицию: ход цвета color в position.
+        """
+        _, size, renju, _, _, time_limit, node_limit, max_depth, soft_limit, threads, collect = self.template
+        self.key = _ponder_key((0, size, renju, position.history[:], color, time_limit, node_limit, max_depth,
+                                soft_limit, threads, collect))
+        self.started = time.perf_counter()
+
+
+def _ponder(position: Position, color: int, move: Tuple[int, int], watch: _PonderStop, select_move) \
+        -> Optional[Tuple[Tuple, Optional[Tuple[int, int]]]]:
+    """
+    Считает ответ бота на предсказанный ход соперника.
+
+    Предсказание берётся из таблицы транспозиций, прогретой только что законченным поиском,
+    а при её промахе — коротким поиском за соперника. Если соперник сыграет предсказанный ход,
+    пока идёт обдумывание, поиск продолжается как настоящий (watch.hit), и его лучший ход
+    становится ответом без повторного поиска. Прерванное другим ходом обдумывание ничего не стоит:
+    его вклад остаётся в таблице транспозиций.
+
+    Возвращает:
+    tuple или None: (ключ обдуманной позиции, ход бота) или None, если обдумывать нечего
+                    или обдумывание прервано.
+    """
+    x, y = move
+    position.place(x, y, color)
+    if position.is_win_at(x, y, color):
+        return None
+    other = opponent(color)
+    reply = probe_move(position)
+    if reply is None:
+        reply = choose_move(position, SearchBudget(0.1, stop=watch), other)
+    if reply is None or watch():
+        return None
+    position.place(reply[0], reply[1], other)
+    if position.is_win_at(reply[0], reply[1], other):
+        return None
+    watch.expect(position, color)
+    template = watch.template
+    answer = select_move(position, color, SearchBudget(None, template[6], template[7], stop=watch,
+                                                       threads=template[9]))
+    if (watch.arrived or watch.cancelled) and not watch.hit:
+        return None
+    return watch.key, answer
+
+
+class BotWorker:
+    def __init__(self, ponder: bool = True) -> None:
+        """
+        Фоновый процесс, в котором бот ищет ход, не блокируя цикл событий pygame.
+
+        Главный цикл отправляет позицию через submit и каждый кадр опрашивает poll.
+        Отмена (перезапуск игры, выход) меняет номер текущего запроса, после чего
+        рабочий процесс прекращает поиск, а устаревший результат отбрасывается.
+        Процесс не демонический, потому что при SearchBudget.threads > 1 он запускает
+        помощников параллельного поиска; останавливается он через close (shared_worker
+        регистрирует его в atexit).
+
+        Параметры:
+        ponder (bool): Обдумывать ли ответ на предсказанный ход соперника в его время.
+        """
+        self._requests: multiprocessing.Queue = multiprocessing.Queue()
+        self._results: multiprocessing.Queue = multiprocessing.Queue()
+        self._current = multiprocessing.Value('i', 0)
+        self._pending: Optional[int] = None
+        # Статистика последнего полученного хода (если запрошена в submit)
+        self.last_stats: Optional[Dict[str, float]] = None
+        self._process: multiprocessing.Process = multiprocessing.Process(
+            target=_serve, args=(self._requests, self._results, self._current, ponder))
+        self._process.start()
+
+    @property
+    def thinking(self) -> bool:
+        """
+        Ожидается ли сейчас ход от рабочего процесса.
+        """
+        return self._pending is not None
+
+    def submit(self, position: Position, color: int, budget: SearchBudget, collect_stats: bool = False) -> None:
+        """
+        Отправляет позицию на поиск хода, отменяя предыдущий запрос.
+        При collect_stats статистика поиска окажется в last_stats после получения хода.
+        """
+        with self._current.get_lock():
+            self._current.value += 1
+            request_id = self._current.value
+        self._pending = request_id
+        self._requests.put((request_id, position.size, position.renju, position.history[:], color,
+                            budget.time_limit, budget.node_limit, budget.max_depth, budget.soft_limit, budget.threads,
+                            collect_stats))
+
+    def poll(self) -> Tuple[bool, Optional[Tuple[int, int]]]:
+        """
+        Проверяет без ожидания, готов ли ход.
+
+        Возвращает:
+        tuple: (готов ли результат, ход или None, если ходов нет).
+        """
+        while self._pending is not None:
+            try:
+                request_id, move, stats = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if request_id == self._pending:
+                self._pending = None
+                self.last_stats = stats
+                return True, move
+        return False, None
+
+    def cancel(self) -> None:
+        """
+        Отменяет текущий запрос; его результат будет отброшен.
+        """
+        with self._current.get_lock():
+            self._current.value += 1
+        self._pending = None
+
+    def close(self) -> None:
+        """
+        Останавливает рабочий процесс.
+        """
+        self.cancel()
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+
+
+_shared_worker: Optional[BotWorker] = None
+
+
+def shared_worker() -> BotWorker:
+    """
+    Возвращает общий для всех партий рабочий процесс, запуская его при первом обращении.
+    """
+    global _shared_worker
+    if _shared_worker is None:
+        _shared_worker = BotWorker()
+        atexit.register(_shared_worker.close)
+    return _shared_worker
@@ -1,4 +1,5 @@
 import pygame
+from assets import shared_cache
 from typing import Callable, Optional, Tuple
 
 
@@ -44,18 +45,18 @@ class Button:
         self.is_transparent: bool = is_transparent
         self.args: Optional[Tuple] = args
         self.obj: Optional[pygame.Surface] = None
+        # Изображения берутся из общего кэша: 225 кнопок поля делят одну поверхность
         if obj is not None:
-            self.obj = pygame.transform.scale(
-                pygame.image.load(obj).convert_alpha(),
-                (self.rect.width, self.rect.height)
-            )
-        if self.is_transparent:
-            self.new_obj = self.obj.copy()
-            self.new_obj.set_alpha(128)
+            self.obj = shared_cache().image(obj, (self.rect.width, self.rect.height))
+            if self.is_transparent:
+                self.new_obj = shared_cache().image(obj, (self.rect.width, self.rect.height), 128)
 
-    def draw(self, screen) -> None:
+    def draw(self, screen) -> int:
         """
         Рисует кнопку на переданном экране.
+
+        Возвращает:
+        int: Сколько изображений выведено на экран (0, если кнопка не видна).
         """
         if not self.is_transparent:
             if self.obj is None:
@@ -65,16 +66,17 @@ class Button:
                     pygame.draw.rect(button_surface, self.hover_color, (0, 0, self.rect.width, self.rect.height))
                 else:
                     pygame.draw.rect(button_surface, self.color, (0, 0, self.rect.width, self.rect.height))
-                font = pygame.font.Font(None, self.size)
-                text_surface = font.render(self.text, True, (0, 0, 0))
+                text_surface = shared_cache().text(self.text, self.size, (0, 0, 0))
                 text_rect = text_surface.get_rect(center=(self.rect.width // 2, self.rect.height // 2))
                 button_surface.blit(text_surface, text_rect)
                 screen.blit(button_surface, self.rect)
             else:
                 screen.blit(self.obj, self.rect)
-        else:
-            if self.is_hovered:
-                screen.blit(self.new_obj, self.rect)
+            return 1
+        if self.is_hovered:
+            screen.blit(self.new_obj, self.rect)
+            return 1
+        return 0
 
     def is_clicked(self, pos) -> bool:
         """
@@ -82,14 +84,17 @@ class Button:
         """
         return self.rect.collidepoint(pos)
 
-    def update(self, pos) -> None:
+    def update(self, pos) -> bool:
         """
         Обновляет состояние кнопки в зависимости от позиции курсора мыши.
+
+        Возвращает:
+        bool: Изменилось ли состояние наведения.
         """
-        if self.rect.collidepoint(pos):
-            self.is_hovered = True
-        else:
-            self.is_hovered = False
+        hovered = bool(self.rect.collidepoint(pos))
+        changed = hovered != self.is_hovered
+        self.is_hovered = hovered
+        return changed
 
     def change_transparent(self) -> None:
         """
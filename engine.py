@@ -0,0 +1,80 @@
+from typing import Dict, Optional, Tuple
+
+from position import Position
+from renju import ForbiddenDetector, is_legal_move
+from robot_logic import select_move
+from search import SearchBudget
+
+
+class Engine:
+    def __init__(self, size: int = 15, renju: bool = True, budget: Optional[SearchBudget] = None,
+                 exact: bool = False) -> None:
+        """
+        Игровой движок без графики: позиция, правила и бот.
+
+        Модули движка (position, patterns, line_table, renju, search, threat_search, robot_logic)
+        не импортируют pygame, поэтому движок работает на сервере без дисплея и используется
+        как окном игры, так и консольными протоколами.
+
+        Параметры:
+        size (int): Размер поля.
+        renju (bool): Играть по правилам рэндзю (иначе — свободный гомоку).
+        budget (SearchBudget): Ограничения поиска хода по умолчанию.
+        exact (bool): Стандартный гомоку: обоим цветам нужна ровно пятёрка.
+        """
+        self.budget: SearchBudget = budget if budget is not None else SearchBudget(time_limit=1.0)
+        self.position: Position = Position(size, renju, exact)
+        self.forbidden: ForbiddenDetector = ForbiddenDetector(self.position)
+
+    def reset(self, size: Optional[int] = None, renju: Optional[bool] = None, exact: Optional[bool] = None) -> None:
+        """
+        Начинает новую партию, при необходимости меняя размер поля и правила.
+        """
+        self.forbidden.detach()
+        self.position = Position(size if size is not None else self.position.size,
+                                 renju if renju is not None else self.position.renju,
+                                 exact if exact is not None else self.position.exact)
+        self.forbidden = ForbiddenDetector(self.position)
+
+    @property
+    def side_to_move(self) -> int:
+        """
+        Цвет, который ходит следующим.
+        """
+        return self.position.side_to_move
+
+    def is_legal(self, x: int, y: int, color: Optional[int] = None) -> bool:
+        """
+        Проверяет, можно ли сыграть в клетку (x, y) цветом color (по умолчанию — очередь хода).
+        """
+        return is_legal_move(self.position, self.forbidden, x, y, color or self.side_to_move)
+
+    def play(self, x: int, y: int, color: Optional[int] = None) -> bool:
+        """
+        Делает ход и сообщает, выиграл ли он партию.
+
+        Исключения:
+        ValueError: Если ход недопустим (клетка занята, вне поля или запрещена для чёрных).
+        """
+        color = color or self.side_to_move
+        if not self.is_legal(x, y, color):
+            raise ValueError(f'Недопустимый ход {x},{y}')
+        self.position.place(x, y, color)
+        return self.position.is_win_at(x, y, color)
+
+    def undo(self) -> Tuple[int, int]:
+        """
+        Отменяет последний ход и возвращает его координаты.
+        """
+        return self.position.undo()
+
+    def think(self, color: Optional[int] = None, budget: Optional[SearchBudget] = None,
+              stats: Optional[Dict[str, float]] = None) -> Optional[Tuple[int, int]]:
+        """
+        Выбирает ход за цвет color (по умолчанию — очередь хода) в пределах бюджета.
+        Если передан словарь stats, в него записывается статистика хода (см. select_move).
+
+        Возвращает:
+        tuple или None: Координаты (столбец, строка) хода или None, если ходов нет.
+        """
+        return select_move(self.position, color or self.side_to_move, budget or self.budget, stats=stats)
@@ -0,0 +1,218 @@
+import sys
+from typing import List, Optional, TextIO, Tuple
+
+from engine import Engine
+from position import BLACK, WHITE, opponent
+from search import SearchBudget
+from timecontrol import TimeManager
+
+ABOUT = 'name="Renju", version="1.0", author="Bu16a", country="RU"'
+
+# Биты параметра INFO rule: ровно пятёрка для обоих цветов (стандартный гомоку),
+# непрерывная игра (не поддерживается) и рэндзю
+RULE_EXACT_FIVE = 1
+RULE_CONTINUOUS = 2
+RULE_RENJU = 4
+
+# Запас времени на обмен данными с менеджером турнира
+_TIME_MARGIN = 0.05
+# Наименьшее время хода: при timeout_turn 0 («как можно быстрее») и при исчерпанных часах
+_MIN_MOVE_TIME = 0.05
+
+
+class GomocupProtocol:
+    def __init__(self, output: TextIO = sys.stdout) -> None:
+        """
+        Реализация текстового протокола Gomocup/Piskvork поверх движка.
+
+        Поддерживаются команды START, RESTART, BEGIN, TURN, BOARD, TAKEBACK, INFO, ABOUT и END.
+        Координаты в протоколе — «x,y» (столбец, строка) с нуля, как и в движке.
+
+        Параметры:
+        output (TextIO): Поток для ответов менеджеру.
+        """
+        self.output: TextIO = output
+        self.engine: Optional[Engine] = None
+        self.renju: bool = False
+        self.exact: bool = False
+        self.timeout_turn: Optional[float] = 5.0
+        self.time_left: Optional[float] = None
+        self.threads: int = 1
+        self.running: bool = True
+        self._board_stones: List[Tuple[int, int, int]] = []
+        self._in_board: bool = False
+
+    def send(self, line: str) -> None:
+        """
+        Отправляет строку менеджеру.
+        """
+        self.output.write(line + '\n')
+        self.output.flush()
+
+    def budget(self, color: int) -> SearchBudget:
+        """
+        Бюджет хода цвета color по текущим ограничениям времени (INFO timeout_turn и time_left)
+        и числу процессов поиска (INFO thread_num).
+
+        Время распределяет TimeManager: на вынужденные ходы почти ничего, в позициях с угрозами
+        больше, при этом ход не дольше timeout_turn и не дольше четверти оставшегося времени партии.
+        timeout_turn 0 по протоколу означает «как можно быстрее» и даёт наименьшее время хода.
+        """
+        move_time = max(_MIN_MOVE_TIME, self.timeout_turn - _TIME_MARGIN) if self.timeout_turn is not None else None
+        time_left = max(_MIN_MOVE_TIME, self.time_left - _TIME_MARGIN) if self.time_left is not None else None
+        manager = TimeManager(move_time, time_left, threads=self.threads)
+        return manager.budget(self._require_engine().position, color)
+
+    def handle(self, line: str) -> None:
+        """
+        Обрабатывает одну строку от менеджера.
+        """
+        line = line.strip()
+        if not line:
+            return
+        try:
+            if self._in_board:
+                self._board_line(line)
+                return
+            command, _, argument = line.partition(' ')
+            command = command.upper()
+            handler = getattr(self, f'_cmd_{command.lower()}', None)
+            if handler is None:
+                self.send(f'UNKNOWN {command}')
+                return
+            handler(argument.strip())
+        except ValueError as error:
+            self.send(f'ERROR {error}')
+
+    def _cmd_start(self, argument: str) -> None:
+        size = int(argument)
+        if size < 5:
+            raise ValueError(f'unsupported size {size}')
+        self.engine = Engine(size, self.renju, exact=self.exact)
+        self.send('OK')
+
+    def _cmd_rectstart(self, argument: str) -> None:
+        raise ValueError('rectangular boards are not supported')
+
+    def _cmd_restart(self, argument: str) -> None:
+        self._require_engine().reset(renju=self.renju, exact=self.exact)
+        self.send('OK')
+
+    def _cmd_begin(self, argument: str) -> None:
+        self._move(BLACK)
+
+    def _cmd_turn(self, argument: str) -> None:
+        engine = self._require_engine()
+        x, y = self._parse_point(argument)
+        color = BLACK if len(engine.position.history) % 2 == 0 else WHITE
+        if not engine.position.inside(x, y) or not engine.position.is_empty(x, y):
+            raise ValueError(f'invalid move {x},{y}')
+        engine.position.place(x, y, color)
+        self._move(opponent(color))
+
+    def _cmd_board(self, argument: str) -> None:
+        self._require_engine().reset(renju=self.renju, exact=self.exact)
+        self._board_stones = []
+        self._in_board = True
+
+    def _board_line(self, line: str) -> None:
+        """
+        Строка внутри блока BOARD: «x,y,поле» или DONE.
+
+        Поле 1 — собственная фишка, 2 — фишка соперника. Поле 3 бывает только в непрерывной
+        игре (RULE_CONTINUOUS), которая не поддерживается. Цвет движка определяется
+        по чётности числа фишек: при чётном числе ходят чёрные. Ошибочная строка (в том числе
+        с занятой клеткой) пропускается с ответом ERROR, блок продолжается до DONE.
+        """
+        if line.upper() != 'DONE':
+            parts = line.split(',')
+            if len(parts) != 3:
+                raise ValueError(f'invalid board line {line}')
+            x, y, field = (int(part) for part in parts)
+            if not self._require_engine().position.inside(x, y) or field not in (1, 2):
+                raise ValueError(f'invalid board line {line}')
+            if any((x, y) == (sx, sy) for sx, sy, _ in self._board_stones):
+                raise ValueError(f'occupied cell {x},{y}')
+            self._board_stones.append((x, y, field))
+            return
+        self._in_board = False
+        engine = self._require_engine()
+        own = BLACK if len(self._board_stones) % 2 == 0 else WHITE
+        for x, y, field in self._board_stones:
+            engine.position.place(x, y, own if field == 1 else opponent(own))
+        self._move(own)
+
+    def _cmd_takeback(self, argument: str) -> None:
+        engine = self._require_engine()
+        x, y = self._parse_point(argument)
+        if engine.position.last_move != (x, y):
+            raise ValueError(f'cannot take back {x},{y}')
+        engine.undo()
+        self.send('OK')
+
+    def _cmd_info(self, argument: str) -> None:
+        key, _, value = argument.partition(' ')
+        key = key.lower()
+        if key == 'timeout_turn':
+            self.timeout_turn = max(0, int(value)) / 1000
+        elif key == 'time_left':
+            self.time_left = int(value) / 1000
+        elif key == 'thread_num':
+            self.threads = max(1, int(value))
+        elif key == 'rule':
+            rule = int(value)
+            if rule & RULE_CONTINUOUS:
+                raise ValueError('continuous game is not supported')
+            self.renju = bool(rule & RULE_RENJU)
+            # В рэндзю ровно пятёрка нужна только чёрным, это следует из самих правил
+            self.exact = bool(rule & RULE_EXACT_FIVE) and not self.renju
+            if self.engine is not None and not self.engine.position.history:
+                self.engine.reset(renju=self.renju, exact=self.exact)
+
+    def _cmd_about(self, argument: str) -> None:
+        self.send(ABOUT)
+
+    def _cmd_end(self, argument: str) -> None:
+        self.running = False
+
+    def _move(self, color: int) -> None:
+        """
+        Ищет и отправляет ход движка цветом color.
+        """
+        engine = self._require_engine()
+        move = engine.think(color, self.budget(color))
+        if move is None:
+            raise ValueError('no moves left')
+        engine.position.place(move[0], move[1], color)
+        self.send(f'{move[0]},{move[1]}')
+
+    def _require_engine(self) -> Engine:
+        """
+        Возвращает движок или сообщает, что не было команды START.
+        """
+        if self.engine is None:
+            raise ValueError('START expected')
+        return self.engine
+
+    @staticmethod
+    def _parse_point(argument: str) -> Tuple[int, int]:
+        """
+        Разбирает координаты вида «x,y».
+        """
+        x, y = argument.split(',')[:2]
+        return int(x), int(y)
+
+
+def main() -> None:
+    """
+    Консольная точка входа: читает команды менеджера турнира из stdin.
+    """
+    protocol = GomocupProtocol()
+    for line in sys.stdin:
+        protocol.handle(line)
+        if not protocol.running:
+            break
+
+
+if __name__ == '__main__':
+    main()
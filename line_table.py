@@ -0,0 +1,167 @@
+from typing import Dict, List, Tuple
+
+from position import Position, DIRECTIONS, EMPTY, BLACK, WHITE, opponent
+from patterns import analyze_line, FIVE, OPEN_FOUR, FOUR, OPEN_THREE, THREE, NONE
+
+# Окно — по RADIUS клеток с каждой стороны от оцениваемой клетки (сама клетка не кодируется)
+RADIUS = 4
+WINDOW = 2 * RADIUS
+TABLE_SIZE = 3 ** WINDOW
+OFFSETS: Tuple[int, ...] = tuple(k for k in range(-RADIUS, RADIUS + 1) if k != 0)
+
+# Цифры кода клетки с точки зрения цвета
+DIGIT_EMPTY = 0
+DIGIT_OWN = 1
+DIGIT_BLOCKED = 2
+
+CLASS_SCORES = {FIVE: 100000, OPEN_FOUR: 10000, FOUR: 1000, OPEN_THREE: 900, THREE: 100, NONE: 0}
+
+
+def decode(code: int) -> List[int]:
+    """
+    Восстанавливает окно из 2 * RADIUS + 1 клеток по коду с точки зрения чёрных.
+
+    Центральная клетка считается чёрной фишкой, заблокированные клетки — белыми.
+    """
+    cells: List[int] = []
+    for _ in range(WINDOW):
+        digit = code % 3
+        code //= 3
+        cells.append(EMPTY if digit == DIGIT_EMPTY else BLACK if digit == DIGIT_OWN else WHITE)
+    cells.insert(RADIUS, BLACK)
+    return cells
+
+
+def classify_window(cells: List[int]) -> Tuple[int, int]:
+    """
+    Классифицирует окно с поставленной в центр фишкой по логике patterns.analyze_line.
+
+    Параметры:
+    cells (list): Окно из 2 * RADIUS + 1 клеток с точки зрения чёрных.
+
+    Возвращает:
+    tuple: (класс линии, оценка хода в центр по этому направлению).
+    """
+    kind = analyze_line(cells[:], BLACK)[0]
+    # Небольшая добавка за незаблокированные окна из пяти, чтобы различать тихие ходы
+    potential = 0
+    for start in range(len(cells) - 4):
+        window = cells[start:start + 5]
+        if WHITE not in window:
+            potential += window.count(BLACK) ** 2
+    return kind, CLASS_SCORES[kind] + potential
+
+
+def build_table() -> Tuple[bytearray, List[int]]:
+    """
+    Строит таблицы классов и оценок для всех кодов окна.
+
+    Возвращает:
+    tuple: (классы по коду, оценки по коду).
+    """
+    classes = bytearray(TABLE_SIZE)
+    scores: List[int] = [0] * TABLE_SIZE
+    for code in range(TABLE_SIZE):
+        classes[code], scores[code] = classify_window(decode(code))
+    return classes, scores
+
+
+TABLE_CLASS, TABLE_SCORE = build_table()
+
+
+_LAYOUTS: Dict[int, Tuple[List[List[List[Tuple[int, int]]]], List[List[int]]]] = {}
+
+
+def window_layout(size: int) -> Tuple[List[List[List[Tuple[int, int]]]], List[List[int]]]:
+    """
+    Возвращает раскладку окон для поля заданного размера.
+
+    Таблицы строятся один раз для каждого размера поля.
+
+    Возвращает:
+    tuple: (affected, edges), где affected[index][d] — пары (клетка, вес цифры) окон направления d,
+           в которые входит клетка index, а edges[d][index] — код окна пустого поля, в котором
+           заблокированы только клетки за краем.
+    """
+    if size not in _LAYOUTS:
+        position = Position(size)
+        cells = size * position.stride
+        affected: List[List[List[Tuple[int, int]]]] = [[[] for _ in DIRECTIONS] for _ in range(cells)]
+        edges: List[List[int]] = [[0] * cells for _ in DIRECTIONS]
+        for d, (dr, dc) in enumerate(DIRECTIONS):
+            for y in range(size):
+                for x in range(size):
+                    p = position.bit(x, y)
+                    for j, k in enumerate(OFFSETS):
+                        weight = 3 ** j
+                        qx, qy = x + dc * k, y + dr * k
+                        if position.inside(qx, qy):
+                            affected[position.bit(qx, qy)][d].append((p, weight))
+                        else:
+                            edges[d][p] += DIGIT_BLOCKED * weight
+        _LAYOUTS[size] = affected, edges
+    return _LAYOUTS[size]
+
+
+class LineEvaluator:
+    def __init__(self, position: Position) -> None:
+        """
+        Поддерживает коды окон для каждой клетки, направления и цвета.
+
+        Код окна — число в троичной системе, где каждая из 2 * RADIUS соседних клеток
+        кодируется как пустая, своя или заблокированная (чужая фишка или край поля).
+        При ходе меняются только коды клеток в радиусе RADIUS по четырём линиям, поэтому
+        оценка хода сводится к четырём обращениям к таблице.
+
+        Параметры:
+        position (Position): Позиция, за которой следит оценщик.
+        """
+        self.position: Position = position
+        affected, edges = window_layout(position.size)
+        self.codes: List[List[List[int]]] = [[[0] * len(codes) for codes in edges],
+                                             [codes[:] for codes in edges], [codes[:] for codes in edges]]
+        # Для каждой клетки и направления: список (клетка, вес цифры) окон, в которые она входит
+        self._affected: List[List[List[Tuple[int, int]]]] = affected
+        for index, color in position.history:
+            self._apply(index, color, 1)
+        position.listeners.append(self.update)
+
+    def detach(self) -> None:
+        """
+        Отписывает оценщик от позиции.
+        """
+        self.position.listeners.remove(self.update)
+
+    def _apply(self, index: int, color: int, sign: int) -> None:
+        """
+        Добавляет (sign = 1) или убирает (sign = -1) фишку из кодов соседних окон.
+        """
+        own = self.codes[color]
+        other = self.codes[opponent(color)]
+        for d, affected in enumerate(self._affected[index]):
+            own_d, other_d = own[d], other[d]
+            for p, weight in affected:
+                own_d[p] += sign * DIGIT_OWN * weight
+                other_d[p] += sign * DIGIT_BLOCKED * weight
+
+    def update(self, index: int, color: int) -> None:
+        """
+        Обновляет коды после постановки или отмены хода в клетке index.
+        """
+        self._apply(index, color, 1 if self.position.boards[color] >> index & 1 else -1)
+
+    def score(self, index: int, color: int) -> int:
+        """
+        Оценка хода цвета color в клетку index по всем направлениям.
+        """
+        codes = self.codes[color]
+        return (TABLE_SCORE[codes[0][index]] + TABLE_SCORE[codes[1][index]]
+                + TABLE_SCORE[codes[2][index]] + TABLE_SCORE[codes[3][index]])
+
+    def move_class(self, index: int, color: int) -> int:
+        """
+        Сильнейший класс линии, который создаёт ход цвета color в клетку index.
+        """
+        codes = self.codes[color]
+        return min(TABLE_CLASS[codes[0][index]], TABLE_CLASS[codes[1][index]],
+                   TABLE_CLASS[codes[2][index]], TABLE_CLASS[codes[3][index]])
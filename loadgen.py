@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+Point = Tuple[int, int]
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        """
+        Итоги нагрузочного прогона: задержки ответов бота, число партий (всего и доигранных
+        до конца) и отказов.
+        """
+        self.latencies: List[float] = []
+        self.games: int = 0
+        self.finished: int = 0
+        self.busy: int = 0
+        self.errors: int = 0
+
+    def percentile(self, share: float) -> float:
+        """
+        Задержка, которую не превышает доля share ответов (0 — если ответов не было).
+        """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+    def report(self, elapsed: float) -> str:
+        """
+        Строка отчёта: пропускная способность и задержки p50/p99/максимум.
+        """
+        moves = len(self.latencies)
+        return (f'{self.games} партий ({self.finished} доиграно), {moves} ходов бота за {elapsed:.1f} с: {moves / elapsed:.1f} ход/с; '
+                f'задержка p50 {self.percentile(0.5) * 1000:.0f} мс, p99 {self.percentile(0.99) * 1000:.0f} мс, '
+                f'макс {max(self.latencies, default=0) * 1000:.0f} мс; BUSY {self.busy}, ошибок {self.errors}')
+
+
+class Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Соединение с сервером, разбирающее ответы по именам партий.
+
+        Ответы сервера приходят вперемешку для всех партий соединения; читающая задача
+        раскладывает их по очередям партий.
+        """
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.inboxes: Dict[str, 'asyncio.Queue[List[str]]'] = {}
+        self._task: asyncio.Task = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        """
+        Читает ответы сервера и раскладывает их по партиям.
+        """
+        while True:
+            raw = await self.reader.readline()
+            if not raw:
+                break
+            parts = raw.decode().split()
+            if len(parts) >= 2 and parts[1] in self.inboxes:
+                self.inboxes[parts[1]].put_nowait(parts)
+
+    async def send(self, line: str) -> None:
+        """
+        Отправляет команду серверу.
+        """
+        self.writer.write(line.encode() + b'\n')
+        await self.writer.drain()
+
+    async def close(self) -> None:
+        """
+        Завершает соединение командой QUIT.
+        """
+        await self.send('QUIT')
+        self._task.cancel()
+        self.writer.close()
+
+
+async def _play(connection: Connection, name: str, size: int, rng: random.Random, stats: LoadStats,
+                max_moves: int, retry_delay: float) -> None:
+    """
+    Одна партия клиента: случайные ходы игрока рядом с уже занятыми клетками до конца партии.
+    """
+    inbox: 'asyncio.Queue[List[str]]' = asyncio.Queue()
+    connection.inboxes[name] = inbox
+    occupied: Set[Point] = set()
+    player_white = rng.random() < 0.5
+    await connection.send(f'NEW {name} {size} {"white" if player_white else "black"}')
+    started = time.perf_counter()
+    reply = await inbox.get()
+    if reply[0] == 'BUSY':
+        stats.busy += 1
+        del connection.inboxes[name]
+        return
+    if player_white:
+        reply = await inbox.get()
+        stats.latencies.append(time.perf_counter() - started)
+        occupied.add(_point(reply[2]))
+    over = False
+    for _ in range(max_moves):
+        move = _random_move(occupied, size, rng)
+        if move is None:
+            break
+        while True:
+            await connection.send(f'PLAY {name} {move[0]},{move[1]}')
+            started = time.perf_counter()
+            reply = await inbox.get()
+            if reply[0] != 'BUSY':
+                break
+            stats.busy += 1
+            await asyncio.sleep(retry_delay)
+        if reply[0] == 'ERROR':
+            # Запрещённый для чёрных ход: клетка считается занятой, выбирается другая
+            stats.errors += 1
+            occupied.add(move)
+            continue
+        occupied.add(move)
+        # MOVE x,y или END итог [x,y] — ход бота, кроме победы игрока
+        if reply[0] == 'MOVE' or len(reply) > 3:
+            stats.latencies.append(time.perf_counter() - started)
+            occupied.add(_point(reply[-1]))
+        if reply[0] == 'END':
+            over = True
+            break
+    await connection.send(f'CLOSE {name}')
+    while (await inbox.get())[0] != 'OK':
+        pass
+    del connection.inboxes[name]
+    stats.games += 1
+    stats.finished += over
+
+
+def _point(text: str) -> Point:
+    """
+    Разбирает координаты вида «x,y».
+    """
+    x, y = text.split(',')
+    return int(x), int(y)
+
+
+def _random_move(occupied: Set[Point], size: int, rng: random.Random) -> Optional[Point]:
+    """
+    Случайная свободная клетка рядом с занятыми (или центр пустого поля).
+    """
+    if not occupied:
+        return size // 2, size // 2
+    near = [(x + dx, y + dy) for x, y in occupied for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            if 0 <= x + dx < size and 0 <= y + dy < size and (x + dx, y + dy) not in occupied]
+    if near:
+        return rng.choice(near)
+    free = [(x, y) for x in range(size) for y in range(size) if (x, y) not in occupied]
+    return rng.choice(free) if free else None
+
+
+async def run_load(host: str, port: int, connections: int, sessions: int, games: int, size: int = 15,
+                   max_moves: int = 20, seed: int = 0, retry_delay: float = 0.05) -> LoadStats:
+    """
+    Нагружает сервер: connections соединений по sessions одновременных партий в каждом,
+    пока не будет сыграно games партий.
+
+    Параметры:
+    host (str): Адрес сервера.
+    port (int): Порт сервера.
+    connections (int): Число соединений.
+    sessions (int): Одновременных партий в соединении.
+    games (int): Всего партий.
+    size (int): Размер поля.
+    max_moves (int): Сколько ходов игрока делать в партии до её закрытия.
+    seed (int): Зерно случайных ходов.
+    retry_delay (float): Пауза перед повтором хода после BUSY, в секундах.
+
+    Возвращает:
+    LoadStats: Задержки и счётчики прогона.
+    """
+    stats = LoadStats()
+    rng = random.Random(seed)
+    remaining = games
+
+    async def worker(connection: Connection, slot: int) -> None:
+        nonlocal remaining
+        number = 0
+        while remaining > 0:
+            remaining -= 1
+            number += 1
+            await _play(connection, f's{slot}-{number}', size, random.Random(rng.random()), stats,
+                        max_moves, retry_delay)
+
+    opened = [Connection(*await asyncio.open_connection(host, port, limit=1 << 16)) for _ in range(connections)]
+    await asyncio.gather(*(worker(connection, index * sessions + slot)
+                           for index, connection in enumerate(opened) for slot in range(sessions)))
+    for connection in opened:
+        await connection.close()
+    return stats
+
+
+def main() -> None:
+    """
+    Консольная точка входа нагрузочного клиента.
+    """
+    parser = argparse.ArgumentParser(description='Нагрузочный клиент сервера партий (server.py).')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес сервера')
+    parser.add_argument('--port', type=int, default=7777, help='Порт сервера')
+    parser.add_argument('--connections', type=int, default=10, help='Число соединений')
+    parser.add_argument('--sessions', type=int, default=10, help='Одновременных партий в соединении')
+    parser.add_argument('--games', type=int, default=200, help='Всего партий')
+    parser.add_argument('--moves', type=int, default=20, help='Ходов игрока в партии')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно')
+    args = parser.parse_args()
+    started = time.perf_counter()
+    stats = asyncio.run(run_load(args.host, args.port, args.connections, args.sessions, args.games,
+                                 max_moves=args.moves, seed=args.seed))
+    print(stats.report(time.perf_counter() - started))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,68 +1,80 @@
 import pygame
 
 from options import Options
+from scene import SceneManager
 from window import Window
 from typing import Optional, Tuple
 
 
 class Lobby:
-    def __init__(self) -> None:
+    def __init__(self, manager: SceneManager) -> None:
         """
         Инициализация класса Lobby.
 
         Создает главное окно лобби, устанавливает заголовок, размеры и фон,
         а также добавляет кнопку для начала новой игры. Кнопка связывается с
         методом `start_new_game`.
+
+        Параметры:
+        - manager: Менеджер экранов, через который выполняются переходы.
         """
+        self.manager: SceneManager = manager
         self.options: Optional[Options] = None
         self.main_window: Window = Window('images/icon.png', 660, 390, 'images/background.png', "RENJU")
         self.main_window.add_button(180, 220, 300, 60, 40, (255, 255, 255), (185, 186, 189),
                                     self.start_new_game, True, None, False, None,
                                     text='Начать новую игру')
 
+    @property
+    def window(self) -> Window:
+        """
+        Окно экрана для менеджера экранов.
+        """
+        return self.main_window
+
+    @property
+    def animating(self) -> bool:
+        """
+        Лобби обновляется только по событиям.
+        """
+        return False
+
     def start_new_game(self, args: Optional[Tuple]) -> None:
         """
         Обрабатывает нажатие кнопки "Начать новую игру".
 
-        Закрывает текущее окно лобби и создает новый экземпляр класса `Options`,
-        передавая метод `exit_to_lobby` для выхода обратно в лобби. Затем запускает
-        метод `run_options` для отображения окна настроек.
+        Закрывает текущее окно лобби и переключает на экран `Options`,
+        передавая метод `exit_to_lobby` для выхода обратно в лобби.
         """
         self.main_window.on_close()
-        self.options = Options(self.exit_to_lobby)
-        self.options.run_options()
+        self.options = Options(self.manager, self.exit_to_lobby)
+        self.manager.switch(self.options)
 
     def exit_to_lobby(self) -> None:
         """
         Метод для выхода в лобби.
 
-        Закрывает текущее главное окно и создает новый экземпляр класса `Lobby`,
-        после чего запускает метод `run_lobby` для отображения окна лобби.
+        Создает новый экземпляр класса `Lobby` и переключает на него.
         """
-        self.main_window.on_close()
-        s = Lobby()
-        s.run_lobby()
+        self.manager.switch(Lobby(self.manager))
 
-    def run_lobby(self) -> None:
+    def update(self) -> None:
+        """
+        Лобби не меняется между событиями.
         """
-        Запускает главный цикл лобби.
 
-        Отображает интерфейс лобби и обрабатывает события, такие как
-        нажатие на кнопки и закрытие окна. Цикл продолжается, пока
-        окно лобби открыто.
+    def handle_event(self, event: pygame.event.Event) -> None:
+        """
+        Обрабатывает событие лобби.
 
-        В процессе цикла обрабатываются следующие события:
+        Обрабатываются следующие события:
         - QUIT: закрытие окна.
         - MOUSEMOTION: обновление кнопок в зависимости от положения курсора.
         - MOUSEBUTTONDOWN: обработка нажатий на кнопки.
         """
-        while self.main_window.running:
-            self.main_window.draw_interface(0, 0)
-            pygame.display.update()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.main_window.on_close()
-                if event.type == pygame.MOUSEMOTION:
-                    self.main_window.update_buttons(event.pos)
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    self.main_window.clicked(event.pos)
+        if event.type == pygame.QUIT:
+            self.main_window.on_close()
+        if event.type == pygame.MOUSEMOTION:
+            self.main_window.update_buttons(event.pos)
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.main_window.clicked(event.pos)
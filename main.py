@@ -1,14 +1,17 @@
 import ctypes
+import multiprocessing
 
 from lobby import Lobby
+from scene import SceneManager
 
 ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID('images/icon.png')
 
 
 def main():
-    lobby = Lobby()
-    lobby.run_lobby()
+    manager = SceneManager()
+    manager.run(Lobby(manager))
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     main()
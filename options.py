@@ -1,24 +1,37 @@
+import os
+
 import pygame
 
+from assets import shared_cache
 from pathlib import Path
-from board import Board
+from board import BOARD_SIZES, DEFAULT_SIZE, RENJU_SIZE, Board
+from scene import SceneManager
 from window import Window
 from typing import Callable, Optional, List, Tuple
 from button import ColorPath
+from timecontrol import DIFFICULTIES, Difficulty, difficulty_by_name
+
+DIFFICULTY_FILE = 'setting/difficulty.txt'
+SIZE_FILE = 'setting/size.txt'
+THREADS_FILE = 'setting/threads.txt'
+# Варианты числа процессов поиска: не больше, чем ядер у машины
+THREAD_CHOICES: Tuple[int, ...] = tuple(n for n in (1, 2, 4, 8) if n <= max(1, os.cpu_count() or 1))
 
 
 class Options:
-    def __init__(self, exit_to_lobby_callback: Callable[[], None]) -> None:
+    def __init__(self, manager: SceneManager, exit_to_lobby_callback: Callable[[], None]) -> None:
         """
         Инициализация класса Options.
 
         Создает окно настроек, загружает тему из файла и устанавливает
-        цвет фишки игрока. Также добавляет кнопки для смены цвета фишки,
-        смены темы и начала новой игры. Кнопки связываются с соответствующими методами.
+        цвет фишки игрока. Также добавляет кнопки для смены цвета фишки, смены темы,
+        уровня сложности, размера поля, числа процессов поиска и начала новой игры. Кнопки связываются с соответствующими методами.
 
         Параметры:
+        - manager: Менеджер экранов, через который выполняются переходы.
         - exit_to_lobby_callback: Функция, вызываемая для выхода в лобби.
         """
+        self.manager: SceneManager = manager
         self.new_game: Optional[Board] = None
         self.exit_to_lobby_callback: Callable[[], None] = exit_to_lobby_callback
         self.color: str = ColorPath.BLACK
@@ -35,6 +48,41 @@ class Options:
         self.options_window.add_button(350, 450, 250, 60, 30, (255, 255, 255), (185, 186, 189),
                                        self.switch_theme, False, None,
                                        False, None, 'Сменить тему')
+        self.options_window.set_figure('chip', shared_cache().image(self.color), 300, 460)
+        difficulty_file = Path(DIFFICULTY_FILE)
+        self.difficulty: Difficulty = difficulty_by_name(
+            difficulty_file.read_text(encoding='utf-8').strip() if difficulty_file.exists() else '')
+        self.options_window.add_button(145, 360, 350, 60, 30, (255, 255, 255), (185, 186, 189),
+                                       self.switch_difficulty, False, None, False, None,
+                                       self.difficulty_text())
+        size_file = Path(SIZE_FILE)
+        saved_size = size_file.read_text(encoding='utf-8').strip() if size_file.exists() else ''
+        self.size: int = int(saved_size) if saved_size.isdigit() and int(saved_size) in BOARD_SIZES \
+            else DEFAULT_SIZE
+        self.options_window.add_button(145, 270, 350, 60, 30, (255, 255, 255), (185, 186, 189),
+                                       self.switch_size, False, None, False, None,
+                                       self.size_text())
+        threads_file = Path(THREADS_FILE)
+        saved_threads = threads_file.read_text(encoding='utf-8').strip() if threads_file.exists() else ''
+        self.threads: int = int(saved_threads) if saved_threads.isdigit() and int(saved_threads) in THREAD_CHOICES \
+            else THREAD_CHOICES[0]
+        self.options_window.add_button(145, 180, 350, 60, 30, (255, 255, 255), (185, 186, 189),
+                                       self.switch_threads, False, None, False, None,
+                                       self.threads_text())
+
+    @property
+    def window(self) -> Window:
+        """
+        Окно экрана для менеджера экранов.
+        """
+        return self.options_window
+
+    @property
+    def animating(self) -> bool:
+        """
+        Настройки обновляются только по событиям.
+        """
+        return False
 
     def switch_theme(self, args: Optional[Tuple] = None) -> None:
         """
@@ -49,7 +97,7 @@ class Options:
         theme_index: int = (themes.index(prev_theme) + 1) % len(themes)
         theme_file.write_text(themes[theme_index])
         theme_image_path = Path('images') / themes[theme_index]
-        new_theme: pygame.Surface = pygame.image.load(str(theme_image_path)).convert()
+        new_theme: pygame.Surface = shared_cache().image(theme_image_path.as_posix(), alpha=False)
 
         self.theme = new_theme
         self.options_window.change_background(self.theme)
@@ -62,55 +110,107 @@ class Options:
         значение переменной `user`, указывая, какой цвет фишки у игрока.
         """
         self.color = ColorPath.WHITE if self.color == ColorPath.BLACK else ColorPath.BLACK
+        self.options_window.set_figure('chip', shared_cache().image(self.color), 300, 460)
+
+    def difficulty_text(self) -> str:
+        """
+        Надпись кнопки уровня сложности.
+        """
+        return f'Сложность: {self.difficulty.name}'
+
+    def switch_difficulty(self, args: Optional[Tuple] = None) -> None:
+        """
+        Смена уровня сложности бота.
+
+        Переключает уровень на следующий из DIFFICULTIES по кругу и сохраняет его в файл.
+        Уровни отличаются только бюджетом поиска (временем, узлами и глубиной).
+        """
+        index = (DIFFICULTIES.index(self.difficulty) + 1) % len(DIFFICULTIES)
+        self.difficulty = DIFFICULTIES[index]
+        Path(DIFFICULTY_FILE).write_text(self.difficulty.name, encoding='utf-8')
+        button = self.options_window.buttons[(145, 360)]
+        button.text = self.difficulty_text()
+        self.options_window.invalidate(button.rect)
+
+    def size_text(self) -> str:
+        """
+        Надпись кнопки размера поля.
+        """
+        rules = 'рэндзю' if self.size == RENJU_SIZE else 'гомоку'
+        return f'Поле: {self.size}x{self.size}, {rules}'
+
+    def switch_size(self, args: Optional[Tuple] = None) -> None:
+        """
+        Смена размера поля.
+
+        Переключает размер на следующий из BOARD_SIZES по кругу и сохраняет его в файл.
+        """
+        self.size = BOARD_SIZES[(BOARD_SIZES.index(self.size) + 1) % len(BOARD_SIZES)]
+        Path(SIZE_FILE).write_text(str(self.size), encoding='utf-8')
+        button = self.options_window.buttons[(145, 270)]
+        button.text = self.size_text()
+        self.options_window.invalidate(button.rect)
+
+    def threads_text(self) -> str:
+        """
+        Надпись кнопки числа процессов поиска.
+        """
+        return f'Процессов поиска: {self.threads}'
+
+    def switch_threads(self, args: Optional[Tuple] = None) -> None:
+        """
+        Смена числа процессов поиска бота.
+
+        Переключает число на следующее из THREAD_CHOICES по кругу и сохраняет его в файл.
+        Больше одного процесса — параллельный поиск Lazy SMP (parallel.py).
+        """
+        self.threads = THREAD_CHOICES[(THREAD_CHOICES.index(self.threads) + 1) % len(THREAD_CHOICES)]
+        Path(THREADS_FILE).write_text(str(self.threads), encoding='utf-8')
+        button = self.options_window.buttons[(145, 180)]
+        button.text = self.threads_text()
+        self.options_window.invalidate(button.rect)
 
     def start_game(self, args: Optional[Tuple] = None) -> None:
         """
         Начинает новую игру.
 
         Закрывает окно настроек, создает новый экземпляр класса `Board`,
-        передавая выбранный цвет фишки, тему и функцию для выхода в лобби.
-        Затем запускает игру.
+        передавая выбранный цвет фишки, тему, уровень сложности, число процессов поиска, размер поля
+        и функцию для выхода в лобби, и переключает на него.
         """
         self.options_window.on_close()
         theme_file: str = 'setting/theme.txt'
         with open(theme_file, 'r') as file:
             theme: str = file.readline().strip()
-        self.new_game = Board(self.color, f'images/{theme}', self.exit_to_lobby_callback, self.exit_to_options)
-        self.new_game.run()
+        self.new_game = Board(self.manager, self.color, f'images/{theme}', self.exit_to_lobby_callback,
+                              self.exit_to_options, self.difficulty, self.threads, size=self.size)
+        self.manager.switch(self.new_game)
 
     def exit_to_options(self) -> None:
         """
         Выход из текущих опций и возвращение в меню настроек.
 
-        Закрывает текущее окно настроек и создает новый экземпляр класса `Options`,
-        после чего запускает метод `run_options` для отображения окна настроек.
+        Создает новый экземпляр класса `Options` и переключает на него.
         """
-        self.options_window.on_close()
-        s: Options = Options(self.exit_to_lobby_callback)
-        s.run_options()
+        self.manager.switch(Options(self.manager, self.exit_to_lobby_callback))
 
-    def run_options(self) -> None:
+    def update(self) -> None:
+        """
+        Настройки не меняются между событиями.
         """
-        Запускает главный цикл окна настроек.
 
-        Отображает интерфейс настроек и обрабатывает события, такие как
-        нажатия на кнопки и закрытие окна. Цикл продолжается, пока
-        окно настроек открыто.
+    def handle_event(self, event: pygame.event.Event) -> None:
+        """
+        Обрабатывает событие окна настроек.
 
-        В процессе цикла обрабатываются следующие события:
+        Обрабатываются следующие события:
         - QUIT: закрытие окна.
         - MOUSEMOTION: обновление кнопок в зависимости от положения курсора.
         - MOUSEBUTTONDOWN: обработка нажатий на кнопки.
         """
-        while self.options_window.running:
-            self.options_window.draw_interface(0, 0)
-            chip_image: pygame.Surface = pygame.image.load(self.color).convert_alpha()
-            self.options_window.draw_figure(chip_image, 300, 460)
-            pygame.display.update()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.options_window.on_close()
-                if event.type == pygame.MOUSEMOTION:
-                    self.options_window.update_buttons(event.pos)
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    self.options_window.clicked(event.pos)
+        if event.type == pygame.QUIT:
+            self.options_window.on_close()
+        if event.type == pygame.MOUSEMOTION:
+            self.options_window.update_buttons(event.pos)
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.options_window.clicked(event.pos)
@@ -0,0 +1,288 @@
+import atexit
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from position import Position
+from search import Searcher, SearchBudget, WIN_THRESHOLD
+
+# Смещение оценки при упаковке (оценки выигрыша по модулю чуть больше WIN_SCORE)
+_SCORE_OFFSET = 1 << 31
+# Сколько лучших ходов корня помощники по очереди ставят первыми
+_ROOT_SHIFTS = 4
+# Сколько ждать результаты помощников после остановки, в секундах
+_COLLECT_TIMEOUT = 1.0
+
+# Запрос помощнику: (номер, размер поля, рэндзю, ровно пятёрка, история ходов, цвет, лимит времени, лимит узлов,
+# максимальная глубина, поколение таблицы)
+Request = Tuple[int, int, bool, bool, List[Tuple[int, int]], int, Optional[float], Optional[int], int, int]
+# Результат: (номер запроса, номер помощника, ход, оценка, глубина, узлы)
+Result = Tuple[int, int, Optional[Tuple[int, int]], int, int, int]
+
+
+class SharedTranspositionTable:
+    def __init__(self, size_bits: int = 18, name: Optional[str] = None) -> None:
+        """
+        Таблица транспозиций в разделяемой памяти, общая для процессов параллельного поиска.
+
+        Запись занимает два 64-битных слова: ключ XOR данные и сами данные (глубина, оценка,
+        флаг, ход, поколение, упакованные в одно число). Процессы пишут записи без блокировок;
+        если два процесса одновременно пишут одну ячейку и слова оказываются от разных записей,
+        XOR слов не совпадёт с ключом, и такая запись просто считается промахом.
+        Интерфейс тот же, что у search.TranspositionTable, поэтому Searcher работает с обеими.
+
+        Параметры:
+        size_bits (int): Двоичный логарифм количества ячеек.
+        name (str): Имя существующего блока памяти, к которому нужно подключиться,
+                    или None, чтобы создать новый.
+        """
+        self.mask: int = (1 << size_bits) - 1
+        self._owner: bool = name is None
+        self.memory: shared_memory.SharedMemory = shared_memory.SharedMemory(
+            name=name, create=name is None, size=16 << size_bits)
+        self.words: memoryview = self.memory.buf[:16 << size_bits].cast('Q')
+        self.generation: int = 0
+        self.hits: int = 0
+        self.probes: int = 0
+
+    @property
+    def name(self) -> str:
+        """
+        Имя блока разделяемой памяти для подключения из других процессов.
+        """
+        return self.memory.name
+
+    def new_search(self) -> None:
+        """
+        Начинает новое поколение записей.
+        """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int, int, int]]:
+        """
+        Возвращает запись (ключ, глубина, оценка, флаг, ход, поколение) для ключа или None.
+        """
+        self.probes += 1
+        slot = (key & self.mask) << 1
+        words = self.words
+        data = words[slot + 1]
+        # Данные настоящей записи не бывают нулевыми: оценка хранится со смещением
+        if data and words[slot] ^ data == key:
+            self.hits += 1
+            return (key, data >> 14 & 0xFF, (data >> 30) - _SCORE_OFFSET, data >> 12 & 3,
+                    (data & 0xFFF) - 1, data >> 22 & 0xFF)
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: int) -> None:
+        """
+        Сохраняет результат поиска с той же политикой замещения, что и TranspositionTable.
+        """
+        slot = (key & self.mask) << 1
+        words = self.words
+        old = words[slot + 1]
+        if old and words[slot] ^ old != key and old >> 22 & 0xFF == self.generation and depth < old >> 14 & 0xFF:
+            return
+        data = ((score + _SCORE_OFFSET) << 30 | self.generation << 22 | min(depth, 0xFF) << 14
+                | flag << 12 | (move + 1))
+        words[slot] = key ^ data
+        words[slot + 1] = data
+
+    def clear(self) -> None:
+        """
+        Очищает таблицу.
+        """
+        self.memory.buf[:len(self.words) * 8] = bytes(len(self.words) * 8)
+
+    def close(self) -> None:
+        """
+        Отключается от разделяемой памяти; создатель таблицы также освобождает её.
+        """
+        self.words.release()
+        self.memory.close()
+        if self._owner:
+            self.memory.unlink()
+
+
+def _help(index: int, table_name: str, size_bits: int, requests: multiprocessing.Queue,
+          results: multiprocessing.Queue, current) -> None:
+    """
+    Цикл процесса-помощника: ищет ход в той же позиции, что и главный поиск, через общую таблицу.
+
+    Помощники отличаются от главного поиска и друг от друга начальной глубиной (нечётные
+    начинают со второй итерации) и первым ходом корня, поэтому заполняют таблицу разными
+    вариантами. Поиск прерывается, как только номер текущего запроса перестаёт совпадать.
+    """
+    table = SharedTranspositionTable(size_bits, table_name)
+    while True:
+        request: Optional[Request] = requests.get()
+        if request is None:
+            break
+        request_id, size, renju, exact, history, color, time_limit, node_limit, max_depth, generation = request
+        if current.value != request_id:
+            continue
+        position = Position(size, renju, exact)
+        for stone_index, stone in history:
+            x, y = position.coords(stone_index)
+            position.place(x, y, stone)
+
+        def stop(request_id: int = request_id) -> bool:
+            return current.value != request_id
+
+        table.generation = generation
+        searcher = Searcher(position, table)
+        move = searcher.iterate(SearchBudget(time_limit, node_limit, max_depth, stop=stop), color,
+                                start_depth=1 + index % 2, root_shift=index % _ROOT_SHIFTS)
+        searcher.close()
+        results.put((request_id, index, move, searcher.best_score, searcher.depth_reached, searcher.nodes))
+    table.close()
+
+
+class LazySMP:
+    def __init__(self, threads: int, size_bits: int = 18) -> None:
+        """
+        Параллельный поиск Lazy SMP: главный поиск и threads - 1 процессов-помощников.
+
+        Все процессы ищут один и тот же корень независимо и общаются только через таблицу
+        транспозиций в разделяемой памяти: записи, найденные одним процессом, отсекают
+        поддеревья другим. Помощники запускаются один раз и ждут запросов.
+
+        Параметры:
+        threads (int): Общее число процессов поиска (включая текущий).
+        size_bits (int): Двоичный логарифм размера общей таблицы транспозиций.
+        """
+        self.threads: int = threads
+        self.table: SharedTranspositionTable = SharedTranspositionTable(size_bits)
+        self._current = multiprocessing.Value('i', 0)
+        self._results: multiprocessing.Queue = multiprocessing.Queue()
+        self._requests: List[multiprocessing.Queue] = []
+        self._processes: List[multiprocessing.Process] = []
+        for index in range(1, threads):
+            requests: multiprocessing.Queue = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_help, args=(index, self.table.name, size_bits, requests, self._results, self._current),
+                daemon=True)
+            process.start()
+            self._requests.append(requests)
+            self._processes.append(process)
+
+    def search(self, position: Position, budget: SearchBudget, color: Optional[int] = None,
+               stats: Optional[Dict[str, float]] = None) -> Optional[Tuple[int, int]]:
+        """
+        Ищет ход всеми процессами и объединяет результаты в корне.
+
+        Главный поиск идёт в текущем процессе в пределах бюджета; когда он заканчивается,
+        помощники останавливаются и присылают свои результаты. Выбирается ход поиска,
+        нашедшего выигрыш, иначе — завершившего самую глубокую итерацию (при равенстве —
+        главного поиска). Лимит узлов бюджета действует на каждый процесс отдельно.
+
+        Параметры:
+        position (Position): Текущая позиция (не изменяется).
+        budget (SearchBudget): Ограничения поиска.
+        color (int): Цвет, за который ищется ход (по умолчанию — очередь хода позиции).
+        stats (dict): Словарь для статистики поиска (см. search.choose_move) или None.
+
+        Возвращает:
+        tuple или None: Координаты (столбец, строка) хода или None, если ходов нет.
+        """
+        if color is None:
+            color = position.side_to_move
+        table = self.table
+        if stats is not None:
+            start, probes, hits = time.perf_counter(), table.probes, table.hits
+        with self._current.get_lock():
+            self._current.value += 1
+            request_id = self._current.value
+        request = (request_id, position.size, position.renju, position.exact, position.history[:], color,
+                   budget.time_limit, budget.node_limit, budget.max_depth, table.generation)
+        for requests in self._requests:
+            requests.put(request)
+
+        searcher = Searcher(position, table)
+        move = searcher.iterate(budget, color)
+        searcher.close()
+        with self._current.get_lock():
+            self._current.value += 1
+        results: List[Result] = [(request_id, 0, move, searcher.best_score, searcher.depth_reached,
+                                  searcher.nodes)]
+        results.extend(self._collect(request_id))
+
+        # Выигрыш важнее глубины, глубина важнее номера процесса (главный поиск — номер 0)
+        best = max(results, key=lambda result: (result[3] > WIN_THRESHOLD and result[2] is not None,
+                                                result[4], -result[1]))
+        if stats is not None:
+            stats.update(search_time=time.perf_counter() - start, nodes=sum(result[5] for result in results),
+                         tt_probes=table.probes - probes, tt_hits=table.hits - hits, cutoffs=searcher.cutoffs,
+                         depth=best[4], main_depth=searcher.depth_reached, threads=self.threads,
+                         helper_move=int(best[1] != 0))
+        return best[2] if best[2] is not None else move
+
+    def _collect(self, request_id: int) -> List[Result]:
+        """
+        Забирает результаты помощников по запросу request_id, отбрасывая устаревшие.
+        """
+        results: List[Result] = []
+        deadline = time.perf_counter() + _COLLECT_TIMEOUT
+        while len(results) < len(self._processes):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                result: Result = self._results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if result[0] == request_id:
+                results.append(result)
+        return results
+
+    def close(self) -> None:
+        """
+        Останавливает помощников и освобождает общую таблицу.
+        """
+        with self._current.get_lock():
+            self._current.value += 1
+        for requests, process in zip(self._requests, self._processes):
+            if process.is_alive():
+                requests.put(None)
+        for process in self._processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self.table.close()
+
+
+_shared_smp: Optional[LazySMP] = None
+
+
+def shared_smp(threads: int) -> LazySMP:
+    """
+    Возвращает общий для процесса параллельный поиск на threads процессов,
+    перезапуская его, если число процессов изменилось.
+    """
+    global _shared_smp
+    if _shared_smp is not None and _shared_smp.threads != threads:
+        close_shared_smp()
+    if _shared_smp is None:
+        _shared_smp = LazySMP(threads)
+    return _shared_smp
+
+
+@atexit.register
+def close_shared_smp() -> None:
+    """
+    Останавливает общий параллельный поиск, если он запущен.
+    """
+    global _shared_smp
+    if _shared_smp is not None:
+        _shared_smp.close()
+        _shared_smp = None
+
+
+def choose_move(position: Position, budget: SearchBudget, color: Optional[int] = None,
+                stats: Optional[Dict[str, float]] = None) -> Optional[Tuple[int, int]]:
+    """
+    Выбирает ход параллельным поиском на budget.threads процессов (см. LazySMP.search).
+    """
+    return shared_smp(budget.threads).search(position, budget, color, stats)
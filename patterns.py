@@ -0,0 +1,276 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from position import Position, DIRECTIONS, EMPTY, BLACK, WHITE, opponent
+
+# Классы линий по убыванию силы
+FIVE = 0
+OPEN_FOUR = 1
+FOUR = 2
+OPEN_THREE = 3
+THREE = 4
+NONE = 5
+
+# Анализ линии для одного цвета: (класс, победные точки, точки четвёрки, точки открытой четвёрки)
+LineInfo = Tuple[int, Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]
+
+_EMPTY_INFO: LineInfo = (NONE, (), (), ())
+
+
+def _win_points(cells: List[int], color: int, exact_five: bool = False) -> Tuple[bool, List[int]]:
+    """
+    Ищет пятёрки и клетки, ход в которые даёт пятёрку.
+
+    Параметры:
+    cells (list): Значения EMPTY/BLACK/WHITE вдоль линии.
+    color (int): Цвет, для которого выполняется поиск.
+    exact_five (bool): Засчитывать только ровно пять фишек (длинный ряд не выигрывает).
+
+    Возвращает:
+    tuple: (есть ли уже пятёрка, список смещений победных клеток).
+    """
+    five = False
+    wins: List[int] = []
+    last = len(cells) - 5
+    for start in range(last + 1):
+        window = cells[start:start + 5]
+        count = window.count(color)
+        if count < 4:
+            continue
+        if exact_five and ((start > 0 and cells[start - 1] == color)
+                           or (start < last and cells[start + 5] == color)):
+            continue
+        if count == 5:
+            five = True
+        elif EMPTY in window:
+            spot = start + window.index(EMPTY)
+            if spot not in wins:
+                wins.append(spot)
+    return five, wins
+
+
+def analyze_line(cells: List[int], color: int, exact_five: bool = False) -> LineInfo:
+    """
+    Классифицирует линию для заданного цвета.
+
+    Окно из пяти клеток без фишек соперника с четырьмя фишками цвета даёт победную клетку.
+    Клетки окон с тремя фишками проверяются постановкой: ход, после которого появляется
+    победная клетка, создаёт четвёрку, а если победных клеток хотя бы две — открытую четвёрку.
+
+    Параметры:
+    cells (list): Значения EMPTY/BLACK/WHITE вдоль линии.
+    color (int): Цвет, для которого выполняется анализ.
+    exact_five (bool): Засчитывать только ровно пять фишек (чёрные в рэндзю).
+
+    Возвращает:
+    tuple: (класс линии, победные клетки, клетки четвёрки, клетки открытой четвёрки) в виде смещений.
+    """
+    other = opponent(color)
+    five, wins = _win_points(cells, color, exact_five)
+    if five:
+        return FIVE, (), (), ()
+    candidates: List[int] = []
+    for start in range(len(cells) - 4):
+        window = cells[start:start + 5]
+        if other in window or window.count(color) != 3:
+            continue
+        for i in range(5):
+            if window[i] == EMPTY and start + i not in candidates:
+                candidates.append(start + i)
+    fours: List[int] = []
+    straight: List[int] = []
+    for spot in candidates:
+        cells[spot] = color
+        after = _win_points(cells, color, exact_five)[1]
+        cells[spot] = EMPTY
+        if after:
+            fours.append(spot)
+            if len(after) >= 2:
+                straight.append(spot)
+    if len(wins) >= 2:
+        kind = OPEN_FOUR
+    elif wins:
+        kind = FOUR
+    elif straight:
+        kind = OPEN_THREE
+    elif fours:
+        kind = THREE
+    else:
+        kind = NONE
+    return kind, tuple(sorted(wins)), tuple(sorted(fours)), tuple(sorted(straight))
+
+
+_LINES: Dict[int, Tuple[List[List[int]], Dict[int, List[Tuple[int, int]]]]] = {}
+# Сколько клеток за крайними фишками линии нужно для её анализа: окно из пяти клеток
+# и соседняя клетка для проверки длинного ряда
+_MARGIN = 5
+
+
+def board_lines(size: int) -> Tuple[List[List[int]], Dict[int, List[Tuple[int, int]]]]:
+    """
+    Возвращает линии поля заданного размера длиной не меньше пяти клеток.
+
+    Таблицы строятся один раз для каждого размера поля.
+
+    Возвращает:
+    tuple: (номера битов клеток каждой линии, для каждой клетки — пары (номер линии, смещение в линии)).
+    """
+    if size not in _LINES:
+        position = Position(size)
+        lines: List[List[int]] = []
+        cell_lines: Dict[int, List[Tuple[int, int]]] = {}
+        for d, (dr, dc) in enumerate(DIRECTIONS):
+            for y in range(size):
+                for x in range(size):
+                    if position.inside(x - dc, y - dr):
+                        continue
+                    cells: List[int] = []
+                    r, c = y, x
+                    while position.inside(c, r):
+                        cells.append(position.bit(c, r))
+                        r, c = r + dr, c + dc
+                    if len(cells) < 5:
+                        continue
+                    for offset, index in enumerate(cells):
+                        cell_lines.setdefault(index, []).append((len(lines), offset))
+                    lines.append(cells)
+        _LINES[size] = (lines, cell_lines)
+    return _LINES[size]
+
+
+class PatternTracker:
+    def __init__(self, position: Position) -> None:
+        """
+        Инициализирует таблицы угроз для позиции и подписывается на её изменения.
+
+        Поле разбивается на линии по четырём направлениям. Для каждой линии и каждого цвета
+        хранится результат analyze_line, а сводные таблицы считают, сколько линий дают
+        каждую клетку как победную, как четвёрку или как открытую четвёрку. После хода
+        пересчитываются только четыре линии через изменённую клетку, причём анализируется
+        лишь участок линии от крайних фишек с запасом _MARGIN: на большом поле цена хода
+        зависит от числа фишек в линии, а не от её длины.
+
+        Параметры:
+        position (Position): Позиция, за которой следит трекер.
+        """
+        self.position: Position = position
+        lines, cell_lines = board_lines(position.size)
+        self.lines: List[List[int]] = lines
+        self.cell_lines: Dict[int, List[Tuple[int, int]]] = cell_lines
+        # Содержимое каждой линии и смещения её фишек, обновляемые при каждом ходе
+        self._cells: List[List[int]] = [[EMPTY] * len(line) for line in self.lines]
+        self._stones: List[Set[int]] = [set() for _ in self.lines]
+
+        self._info: List[List[LineInfo]] = [[_EMPTY_INFO] * len(self.lines) for _ in range(3)]
+        self.wins: List[Dict[int, int]] = [{}, {}, {}]
+        self.fours: List[Dict[int, int]] = [{}, {}, {}]
+        self.straight: List[Dict[int, int]] = [{}, {}, {}]
+        self.counts: List[List[int]] = [[0] * NONE + [len(self.lines)] for _ in range(3)]
+        touched: Set[int] = set()
+        for index in position.occupied_cells:
+            touched.update(self._set_cell(index))
+        for line_id in touched:
+            self._refresh(line_id)
+        position.listeners.append(self.update)
+
+    def detach(self) -> None:
+        """
+        Отписывает трекер от позиции.
+        """
+        self.position.listeners.remove(self.update)
+
+    def _set_cell(self, index: int) -> List[int]:
+        """
+        Переносит содержимое клетки из позиции в линии через неё и возвращает номера этих линий.
+        """
+        value = self.position.get(*self.position.coords(index))
+        line_ids: List[int] = []
+        for line_id, offset in self.cell_lines.get(index, ()):
+            self._cells[line_id][offset] = value
+            if value == EMPTY:
+                self._stones[line_id].discard(offset)
+            else:
+                self._stones[line_id].add(offset)
+            line_ids.append(line_id)
+        return line_ids
+
+    def update(self, index: int, color: int) -> None:
+        """
+        Пересчитывает линии, проходящие через изменённую клетку.
+        """
+        for line_id in self._set_cell(index):
+            self._refresh(line_id)
+
+    def _refresh(self, line_id: int) -> None:
+        """
+        Пересчитывает одну линию и обновляет сводные таблицы.
+        """
+        line = self.lines[line_id]
+        stones = self._stones[line_id]
+        start = 0
+        cells: List[int] = []
+        if stones:
+            start = max(0, min(stones) - _MARGIN)
+            cells = self._cells[line_id][start:max(stones) + _MARGIN + 1]
+        for color in (BLACK, WHITE):
+            old = self._info[color][line_id]
+            if color not in cells:
+                new = _EMPTY_INFO
+            else:
+                new = analyze_line(cells, color, self.position.exact_five(color))
+                if start:
+                    new = (new[0], tuple(offset + start for offset in new[1]),
+                           tuple(offset + start for offset in new[2]), tuple(offset + start for offset in new[3]))
+            if new == old:
+                continue
+            self._info[color][line_id] = new
+            self.counts[color][old[0]] -= 1
+            self.counts[color][new[0]] += 1
+            for table, before, after in ((self.wins[color], old[1], new[1]),
+                                         (self.fours[color], old[2], new[2]),
+                                         (self.straight[color], old[3], new[3])):
+                for offset in before:
+                    point = line[offset]
+                    table[point] -= 1
+                    if not table[point]:
+                        del table[point]
+                for offset in after:
+                    point = line[offset]
+                    table[point] = table.get(point, 0) + 1
+
+    def has_five(self, color: int) -> bool:
+        """
+        Проверяет, есть ли у цвета пятёрка.
+        """
+        return self.counts[color][FIVE] > 0
+
+    def win_moves(self, color: int) -> List[Tuple[int, int]]:
+        """
+        Клетки, ход в которые сразу даёт цвету пятёрку.
+        """
+        return sorted(self.position.coords(i) for i in self.wins[color])
+
+    def four_moves(self, color: int) -> List[Tuple[int, int]]:
+        """
+        Клетки, ход в которые создаёт четвёрку.
+        """
+        return sorted(self.position.coords(i) for i in self.fours[color])
+
+    def open_four_moves(self, color: int) -> List[Tuple[int, int]]:
+        """
+        Клетки, ход в которые создаёт открытую четвёрку (то есть продолжает открытую тройку).
+        """
+        return sorted(self.position.coords(i) for i in self.straight[color])
+
+    def first_win(self, color: int) -> Optional[Tuple[int, int]]:
+        """
+        Первая по порядку победная клетка цвета или None.
+        """
+        wins = self.win_moves(color)
+        return wins[0] if wins else None
+
+    def first_open_four(self, color: int) -> Optional[Tuple[int, int]]:
+        """
+        Первая по порядку клетка открытой четвёрки цвета или None.
+        """
+        moves = self.open_four_moves(color)
+        return moves[0] if moves else None
@@ -0,0 +1,352 @@
+import random
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+
+# Направления в формате (шаг по строке, шаг по столбцу), как в robot_logic
+DIRECTIONS: Tuple[Tuple[int, int], ...] = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+_ZOBRIST: Dict[int, List[List[int]]] = {}
+_AREAS: Dict[int, List[Tuple[int, ...]]] = {}
+# Расстояние (по любой оси) от фишек, на котором клетки считаются кандидатами в ходы
+CANDIDATE_DISTANCE = 2
+
+
+def zobrist_keys(size: int) -> List[List[int]]:
+    """
+    Возвращает таблицу 64-битных ключей Zobrist для поля заданного размера.
+
+    Ключи генерируются детерминированно, поэтому хеши совпадают между запусками и процессами.
+
+    Возвращает:
+    list: keys[color][index] для color в (EMPTY, BLACK, WHITE); для EMPTY ключи нулевые.
+    """
+    if size not in _ZOBRIST:
+        rng = random.Random(size)
+        cells = size * (size + 1)
+        _ZOBRIST[size] = [[0] * cells,
+                          [rng.getrandbits(64) for _ in range(cells)],
+                          [rng.getrandbits(64) for _ in range(cells)]]
+    return _ZOBRIST[size]
+
+
+def candidate_areas(size: int) -> List[Tuple[int, ...]]:
+    """
+    Возвращает для каждой клетки поля номера битов соседних клеток на расстоянии
+    не больше CANDIDATE_DISTANCE (по любой оси), без самой клетки.
+
+    Таблица строится один раз для каждого размера поля.
+
+    Возвращает:
+    list: areas[index] для всех номеров битов; для защитного столбца — пустой кортеж.
+    """
+    if size not in _AREAS:
+        stride = size + 1
+        reach = range(-CANDIDATE_DISTANCE, CANDIDATE_DISTANCE + 1)
+        areas: List[Tuple[int, ...]] = [()] * (size * stride)
+        for y in range(size):
+            for x in range(size):
+                areas[y * stride + x] = tuple((y + dy) * stride + x + dx for dy in reach for dx in reach
+                                              if (dx or dy) and 0 <= x + dx < size and 0 <= y + dy < size)
+        _AREAS[size] = areas
+    return _AREAS[size]
+
+
+def opponent(color: int) -> int:
+    """
+    Возвращает цвет соперника.
+    """
+    return BLACK + WHITE - color
+
+
+class Position:
+    def __init__(self, size: int = 15, renju: bool = True, exact: bool = False) -> None:
+        """
+        Инициализирует пустую позицию на битбордах.
+
+        Каждая клетка (x, y) хранится битом с номером y * stride + x, где stride = size + 1.
+        Лишний столбец справа всегда пуст и служит защитной полосой: сдвиги по горизонтали
+        и диагоналям не перескакивают с одной строки на другую.
+
+        Параметры:
+        size (int): Размер поля (количество строк и столбцов).
+        renju (bool): Правила рэндзю: чёрные выигрывают только ровно пятёркой и имеют запрещённые ходы.
+        exact (bool): Стандартный гомоку: обоим цветам нужна ровно пятёрка (длинный ряд не выигрывает).
+        """
+        self.size: int = size
+        self.renju: bool = renju
+        self.exact: bool = exact
+        self.stride: int = size + 1
+        self.shifts: Tuple[int, ...] = tuple(dr * self.stride + dc for dr, dc in DIRECTIONS)
+        row_mask: int = (1 << size) - 1
+        self.full: int = 0
+        for y in range(size):
+            self.full |= row_mask << (y * self.stride)
+        self.boards: List[int] = [0, 0, 0]
+        self.history: List[Tuple[int, int]] = []
+        self.keys: List[List[int]] = zobrist_keys(size)
+        self.hash: int = 0
+        # Разреженное представление, обновляемое при каждом ходе: занятые клетки, число фишек
+        # на расстоянии CANDIDATE_DISTANCE от каждой клетки и пустые клетки с ненулевым числом.
+        # Генерация ходов перебирает candidates, поэтому её цена зависит от числа фишек, а не от площади поля
+        self.occupied_cells: Set[int] = set()
+        self.candidates: Set[int] = set()
+        self._near: List[int] = [0] * (size * self.stride)
+        self._areas: List[Tuple[int, ...]] = candidate_areas(size)
+        # Обработчики, вызываемые с номером бита и цветом фишки после каждой постановки или отмены хода
+        self.listeners: List[Callable[[int, int], None]] = []
+
+    def bit(self, x: int, y: int) -> int:
+        """
+        Возвращает номер бита клетки (x, y).
+        """
+        return y * self.stride + x
+
+    def coords(self, index: int) -> Tuple[int, int]:
+        """
+        Возвращает координаты (столбец, строка) по номеру бита.
+        """
+        return index % self.stride, index // self.stride
+
+    def inside(self, x: int, y: int) -> bool:
+        """
+        Проверяет, лежит ли клетка внутри поля.
+        """
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    @property
+    def occupied(self) -> int:
+        """
+        Маска всех занятых клеток.
+        """
+        return self.boards[BLACK] | self.boards[WHITE]
+
+    @property
+    def empty(self) -> int:
+        """
+        Маска всех пустых клеток поля.
+        """
+        return self.full & ~(self.boards[BLACK] | self.boards[WHITE])
+
+    @property
+    def last_move(self) -> Optional[Tuple[int, int]]:
+        """
+        Последний сделанный ход или None.
+        """
+        if not self.history:
+            return None
+        return self.coords(self.history[-1][0])
+
+    @property
+    def side_to_move(self) -> int:
+        """
+        Цвет, который ходит следующим (по чередованию ходов).
+        """
+        if not self.history:
+            return BLACK
+        return opponent(self.history[-1][1])
+
+    def get(self, x: int, y: int) -> int:
+        """
+        Возвращает цвет фишки в клетке (EMPTY, BLACK или WHITE).
+        """
+        mask = 1 << (y * self.stride + x)
+        if self.boards[BLACK] & mask:
+            return BLACK
+        if self.boards[WHITE] & mask:
+            return WHITE
+        return EMPTY
+
+    def is_empty(self, x: int, y: int) -> bool:
+        """
+        Проверяет, свободна ли клетка.
+        """
+        return not (self.boards[BLACK] | self.boards[WHITE]) >> (y * self.stride + x) & 1
+
+    def place(self, x: int, y: int, color: int) -> None:
+        """
+        Ставит фишку заданного цвета в клетку (x, y).
+        """
+        index = y * self.stride + x
+        self.boards[color] |= 1 << index
+        self.hash ^= self.keys[color][index]
+        self.history.append((index, color))
+        self.occupied_cells.add(index)
+        self.candidates.discard(index)
+        near, candidates, occupied = self._near, self.candidates, self.occupied_cells
+        for cell in self._areas[index]:
+            near[cell] += 1
+            if near[cell] == 1 and cell not in occupied:
+                candidates.add(cell)
+        for listener in self.listeners:
+            listener(index, color)
+
+    def undo(self) -> Tuple[int, int]:
+        """
+        Отменяет последний ход и возвращает его координаты.
+        """
+        index, color = self.history.pop()
+        self.boards[color] &= ~(1 << index)
+        self.hash ^= self.keys[color][index]
+        self.occupied_cells.discard(index)
+        near, candidates = self._near, self.candidates
+        for cell in self._areas[index]:
+            near[cell] -= 1
+            if not near[cell]:
+                candidates.discard(cell)
+        if near[index]:
+            candidates.add(index)
+        for listener in self.listeners:
+            listener(index, color)
+        return self.coords(index)
+
+    def copy(self) -> 'Position':
+        """
+        Возвращает независимую копию позиции (без обработчиков).
+        """
+        other = Position(self.size, self.renju, self.exact)
+        other.boards = self.boards[:]
+        other.history = self.history[:]
+        other.hash = self.hash
+        other.occupied_cells = set(self.occupied_cells)
+        other.candidates = set(self.candidates)
+        other._near = self._near[:]
+        return other
+
+    def stones(self, color: int) -> Iterator[Tuple[int, int]]:
+        """
+        Перебирает координаты всех фишек заданного цвета.
+        """
+        yield from self.iter_bits(self.boards[color])
+
+    def iter_bits(self, mask: int) -> Iterator[Tuple[int, int]]:
+        """
+        Перебирает координаты всех установленных битов маски.
+        """
+        while mask:
+            low = mask & -mask
+            yield self.coords(low.bit_length() - 1)
+            mask ^= low
+
+    def line(self, x: int, y: int, direction: int, radius: int) -> List[int]:
+        """
+        Возвращает вид линии через клетку (x, y) в заданном направлении.
+
+        Параметры:
+        x (int): Столбец центральной клетки.
+        y (int): Строка центральной клетки.
+        direction (int): Индекс направления в DIRECTIONS.
+        radius (int): Количество клеток в каждую сторону от центральной.
+
+        Возвращает:
+        list: 2 * radius + 1 значений EMPTY/BLACK/WHITE; клетки за краем поля обозначаются -1.
+        """
+        dr, dc = DIRECTIONS[direction]
+        black, white = self.boards[BLACK], self.boards[WHITE]
+        cells: List[int] = []
+        for i in range(-radius, radius + 1):
+            r, c = y + dr * i, x + dc * i
+            if 0 <= r < self.size and 0 <= c < self.size:
+                index = r * self.stride + c
+                cells.append(BLACK if black >> index & 1 else WHITE if white >> index & 1 else EMPTY)
+            else:
+                cells.append(-1)
+        return cells
+
+    def run_length(self, x: int, y: int, direction: int, color: int) -> int:
+        """
+        Возвращает длину непрерывного ряда фишек цвета color через клетку (x, y).
+
+        Сама клетка считается фишкой цвета color независимо от её содержимого.
+        """
+        board = self.boards[color]
+        shift = self.shifts[direction]
+        index = y * self.stride + x
+        count = 1
+        i = index + shift
+        while board >> i & 1:
+            count += 1
+            i += shift
+        i = index - shift
+        while i >= 0 and board >> i & 1:
+            count += 1
+            i -= shift
+        return count
+
+    def five_mask(self, color: int, direction: int) -> int:
+        """
+        Маска начал рядов из пяти и более фишек цвета color в заданном направлении.
+        """
+        board = self.boards[color]
+        shift = self.shifts[direction]
+        return board & (board >> shift) & (board >> 2 * shift) & (board >> 3 * shift) & (board >> 4 * shift)
+
+    def has_five(self, color: int) -> bool:
+        """
+        Проверяет, есть ли на поле ряд из пяти и более фишек цвета color.
+        """
+        return any(self.five_mask(color, d) for d in range(len(DIRECTIONS)))
+
+    def is_five_at(self, x: int, y: int, color: int) -> bool:
+        """
+        Проверяет, образует ли фишка в клетке (x, y) ряд из пяти и более фишек.
+        """
+        return any(self.run_length(x, y, d, color) >= 5 for d in range(len(DIRECTIONS)))
+
+    def is_win_at(self, x: int, y: int, color: int) -> bool:
+        """
+        Проверяет, выигрывает ли фишка в клетке (x, y) по правилам позиции.
+
+        По правилам рэндзю чёрным нужна ровно пятёрка, белым — пять и более;
+        в стандартном гомоку (exact) ровно пятёрка нужна обоим.
+        """
+        lengths = [self.run_length(x, y, d, color) for d in range(len(DIRECTIONS))]
+        if self.exact_five(color):
+            return 5 in lengths
+        return max(lengths) >= 5
+
+    def exact_five(self, color: int) -> bool:
+        """
+        Требуется ли цвету ровно пятёрка (чёрные по правилам рэндзю, оба цвета в стандартном гомоку).
+        """
+        return self.exact or (self.renju and color == BLACK)
+
+    def run_starts(self, color: int, direction: int, length: int) -> int:
+        """
+        Маска начал максимальных рядов ровно из length фишек цвета color в заданном направлении.
+        """
+        board = self.boards[color]
+        shift = self.shifts[direction]
+        runs = board & ~(board << shift)
+        for k in range(1, length):
+            runs &= board >> (k * shift)
+        return runs & ~(board >> (length * shift))
+
+    def neighbours(self, mask: int, direction: int, step: int = 1) -> int:
+        """
+        Сдвигает маску на step клеток в заданном направлении (вперёд при step > 0).
+
+        Сдвиг выполняется по одной клетке, чтобы защитный столбец обрезал биты на краю поля.
+        """
+        shift = self.shifts[direction]
+        for _ in range(abs(step)):
+            mask = (mask << shift if step > 0 else mask >> shift) & self.full
+        return mask
+
+    def neighbourhood(self, distance: int = 2) -> int:
+        """
+        Маска пустых клеток на расстоянии не больше distance (по любой оси) от фишек.
+
+        Для перебора ходов на расстоянии CANDIDATE_DISTANCE дешевле множество candidates.
+        """
+        occupied = self.boards[BLACK] | self.boards[WHITE]
+        mask = occupied
+        for _ in range(distance):
+            grown = mask
+            for shift in self.shifts:
+                grown |= (mask << shift) | (mask >> shift)
+            mask = grown & self.full
+        return mask & ~occupied
@@ -0,0 +1,405 @@
+import mmap
+import os
+import re
+import struct
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from position import Position, BLACK, WHITE, EMPTY, opponent
+from symmetry import SymmetricHash, canonical
+
+# Заголовок файла партий: сигнатура, версия, размер поля
+FILE_HEADER = struct.Struct('<4sBBxx')
+MAGIC = b'RJGR'
+VERSION = 1
+# Заголовок партии: результат, флаги, число ходов, длины имён чёрных и белых
+GAME_HEADER = struct.Struct('<BBHBB')
+FLAG_RENJU = 1
+# Ход — один байт с номером клетки y * size + x, поэтому поле не больше 16 x 16
+MAX_SIZE = 16
+
+# Запись индекса: канонический ключ позиции, смещение партии в файле
+INDEX_ENTRY = struct.Struct('<QQ')
+INDEX_MAGIC = b'RJGI'
+
+DEFAULT_PATH = 'setting/games.rjg'
+
+_BUFFER_SIZE = 1 << 16
+
+
+class GameRecord:
+    def __init__(self, moves: List[Tuple[int, int]], result: int = EMPTY, renju: bool = True,
+                 black: str = '', white: str = '') -> None:
+        """
+        Запись одной партии.
+
+        Параметры:
+        moves (list): Ходы (столбец, строка) по очереди начиная с чёрных.
+        result (int): Цвет победителя или EMPTY (ничья или партия не закончена).
+        renju (bool): Правила рэндзю.
+        black (str): Игрок или настройки движка за чёрных.
+        white (str): Игрок или настройки движка за белых.
+        """
+        self.moves: List[Tuple[int, int]] = moves
+        self.result: int = result
+        self.renju: bool = renju
+        self.black: str = black
+        self.white: str = white
+
+    def position(self, size: int = 15, ply: Optional[int] = None) -> Position:
+        """
+        Позиция после первых ply ходов партии (по умолчанию — после всех).
+        """
+        position = Position(size, self.renju)
+        color = BLACK
+        for x, y in self.moves[:ply]:
+            position.place(x, y, color)
+            color = opponent(color)
+        return position
+
+
+def _name_bytes(name: str) -> bytes:
+    """
+    Имя в UTF-8 не длиннее 255 байт; обрезается по границе символа, чтобы запись читалась обратно.
+    """
+    return name.encode()[:255].decode('utf-8', 'ignore').encode()
+
+
+def _check_moves(moves: List[Tuple[int, int]], size: int) -> None:
+    """
+    Проверяет, что ходы лежат на поле size x size и не повторяют занятые клетки.
+
+    Исключения:
+    ValueError: Если ход вне поля или клетка уже занята.
+    """
+    seen = set()
+    for x, y in moves:
+        if not (0 <= x < size and 0 <= y < size):
+            raise ValueError(f'Ход вне поля: {x},{y}')
+        if (x, y) in seen:
+            raise ValueError(f'Клетка занята: {x},{y}')
+        seen.add((x, y))
+
+
+def encode(record: GameRecord, size: int) -> bytes:
+    """
+    Кодирует партию: заголовок, имена в UTF-8 и по байту на ход.
+
+    Исключения:
+    ValueError: Если ход вне поля, клетка занята дважды или ходов больше, чем вмещает заголовок.
+    """
+    _check_moves(record.moves, size)
+    if len(record.moves) > 0xFFFF:
+        raise ValueError(f'Слишком много ходов: {len(record.moves)}')
+    black, white = _name_bytes(record.black), _name_bytes(record.white)
+    header = GAME_HEADER.pack(record.result, FLAG_RENJU if record.renju else 0, len(record.moves),
+                              len(black), len(white))
+    return header + black + white + bytes(y * size + x for x, y in record.moves)
+
+
+class RecordWriter:
+    def __init__(self, path: str, size: int = 15) -> None:
+        """
+        Потоковая запись партий в конец файла.
+
+        Партии копятся в буфере и пишутся блоками, поэтому запись миллионов партий не делает
+        по системному вызову на партию. Если файла нет, он создаётся с заголовком.
+
+        Параметры:
+        path (str): Путь к файлу партий.
+        size (int): Размер поля.
+
+        Исключения:
+        ValueError: Если поле не помещается в байт на ход или размер не совпадает с файлом.
+        """
+        if size > MAX_SIZE:
+            raise ValueError(f'Формат хранит ход в одном байте: поле {size}x{size} не поддерживается')
+        self.size: int = size
+        self._file: BinaryIO = open(path, 'ab')
+        self._offset: int = self._file.tell()
+        if self._offset == 0:
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION, size))
+            self._offset = FILE_HEADER.size
+        elif _read_header(path) != size:
+            self._file.close()
+            raise ValueError(f'{path}: размер поля не совпадает')
+        self._buffer: bytearray = bytearray()
+
+    def write(self, record: GameRecord) -> int:
+        """
+        Добавляет партию и возвращает её смещение в файле.
+        """
+        offset = self._offset + len(self._buffer)
+        self._buffer += encode(record, self.size)
+        if len(self._buffer) >= _BUFFER_SIZE:
+            self.flush()
+        return offset
+
+    def flush(self) -> None:
+        """
+        Записывает накопленные партии на диск.
+        """
+        self._file.write(self._buffer)
+        self._file.flush()
+        self._offset += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """
+        Записывает остаток буфера и закрывает файл.
+        """
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _read_header(path: str) -> int:
+    """
+    Проверяет заголовок файла партий и возвращает размер поля.
+    """
+    with open(path, 'rb') as f:
+        data = f.read(FILE_HEADER.size)
+    if len(data) < FILE_HEADER.size:
+        raise ValueError(f'{path} не является файлом партий')
+    magic, version, size = FILE_HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} не является файлом партий')
+    return size
+
+
+def _read_game(f: BinaryIO, size: int) -> Optional[GameRecord]:
+    """
+    Читает партию с текущего места файла или возвращает None в конце файла.
+    """
+    header = f.read(GAME_HEADER.size)
+    if len(header) < GAME_HEADER.size:
+        return None
+    result, flags, count, black_length, white_length = GAME_HEADER.unpack(header)
+    black = f.read(black_length).decode()
+    white = f.read(white_length).decode()
+    moves = [(cell % size, cell // size) for cell in f.read(count)]
+    return GameRecord(moves, result, bool(flags & FLAG_RENJU), black, white)
+
+
+def read_records(path: str) -> Iterator[Tuple[int, GameRecord]]:
+    """
+    Генератор партий файла вместе с их смещениями; файл читается по мере перебора.
+    """
+    size = _read_header(path)
+    with open(path, 'rb') as f:
+        f.seek(FILE_HEADER.size)
+        while True:
+            offset = f.tell()
+            record = _read_game(f, size)
+            if record is None:
+                return
+            yield offset, record
+
+
+def read_record_at(path: str, offset: int) -> GameRecord:
+    """
+    Читает одну партию по смещению (например, найденному через PositionIndex).
+    """
+    size = _read_header(path)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        record = _read_game(f, size)
+    if record is None:
+        raise ValueError(f'{path}: нет партии по смещению {offset}')
+    return record
+
+
+def build_index(path: str, index_path: str, max_ply: Optional[int] = None) -> int:
+    """
+    Строит индекс «канонический ключ позиции → смещения партий» для файла партий.
+
+    Индекс — отсортированные записи фиксированной длины, как в книге дебютов; ключи
+    канонические, поэтому партия находится и по любому симметричному образу позиции.
+
+    Параметры:
+    path (str): Файл партий.
+    index_path (str): Файл индекса.
+    max_ply (int): Индексировать только первые max_ply позиций партии или все.
+
+    Возвращает:
+    int: Число записей индекса.
+    """
+    size = _read_header(path)
+    entries = set()
+    for offset, record in read_records(path):
+        position = Position(size, record.renju)
+        hashes = SymmetricHash(position)
+        entries.add((hashes.canonical()[0], offset))
+        color = BLACK
+        for x, y in record.moves[:max_ply]:
+            position.place(x, y, color)
+            entries.add((hashes.canonical()[0], offset))
+            color = opponent(color)
+        hashes.detach()
+    with open(index_path, 'wb') as f:
+        f.write(FILE_HEADER.pack(INDEX_MAGIC, VERSION, size))
+        for entry in sorted(entries):
+            f.write(INDEX_ENTRY.pack(*entry))
+    return len(entries)
+
+
+class PositionIndex:
+    def __init__(self, path: str) -> None:
+        """
+        Индекс позиций, открытый через mmap и просматриваемый двоичным поиском.
+
+        Исключения:
+        ValueError: Если файл не является индексом партий.
+        """
+        self._file = open(path, 'rb')
+        self._map: mmap.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size = FILE_HEADER.unpack_from(self._map, 0)
+        self.count: int = (len(self._map) - FILE_HEADER.size) // INDEX_ENTRY.size
+        if magic != INDEX_MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} не является индексом партий')
+
+    def close(self) -> None:
+        """
+        Закрывает отображение и файл.
+        """
+        self._map.close()
+        self._file.close()
+
+    def _entry(self, i: int) -> Tuple[int, int]:
+        """
+        Запись с номером i: (ключ, смещение).
+        """
+        return INDEX_ENTRY.unpack_from(self._map, FILE_HEADER.size + i * INDEX_ENTRY.size)
+
+    def offsets(self, position: Position) -> List[int]:
+        """
+        Смещения партий, в которых встречалась позиция (с точностью до симметрии).
+        """
+        key = canonical(position)[0]
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        result: List[int] = []
+        while low < self.count:
+            entry_key, offset = self._entry(low)
+            if entry_key != key:
+                break
+            result.append(offset)
+            low += 1
+        return result
+
+
+def _result_of(moves: List[Tuple[int, int]], size: int, renju: bool) -> int:
+    """
+    Определяет победителя по последнему ходу партии (EMPTY, если пятёрки нет).
+    """
+    if not moves:
+        return EMPTY
+    color = BLACK if len(moves) % 2 else WHITE
+    x, y = moves[-1]
+    position = GameRecord(moves, renju=renju).position(size)
+    return color if position.is_win_at(x, y, color) else EMPTY
+
+
+def export_psq(record: GameRecord, size: int = 15) -> str:
+    """
+    Партия в формате PSQ (Piskvork): заголовок, затем ходы «x,y,время» с единицы.
+    """
+    lines = [f'Piskvorky {size}x{size}, 11:11, 0']
+    lines.extend(f'{x + 1},{y + 1},0' for x, y in record.moves)
+    lines.extend(name for name in (record.black, record.white) if name)
+    lines.append('-1')
+    return '\n'.join(lines) + '\n'
+
+
+def import_psq(text: str, renju: bool = True) -> Tuple[GameRecord, int]:
+    """
+    Разбирает партию в формате PSQ; результат определяется по последнему ходу.
+
+    Возвращает:
+    tuple: (партия, размер поля).
+
+    Исключения:
+    ValueError: Если заголовок не в формате PSQ, ход вне поля или клетка занята дважды.
+    """
+    lines = text.strip().splitlines()
+    header = re.match(r'Piskvorky (\d+)x(\d+)', lines[0] if lines else '')
+    if header is None:
+        raise ValueError('Нет заголовка PSQ')
+    size = int(header.group(1))
+    moves: List[Tuple[int, int]] = []
+    rest = lines[1:]
+    for line in rest:
+        parts = line.strip().split(',')
+        if len(parts) < 2 or not all(part.strip().lstrip('-').isdigit() for part in parts):
+            break
+        moves.append((int(parts[0]) - 1, int(parts[1]) - 1))
+    _check_moves(moves, size)
+    names = [line.strip() for line in rest[len(moves):] if line.strip() and line.strip() != '-1']
+    black, white = (names + ['', ''])[:2]
+    return GameRecord(moves, _result_of(moves, size, renju), renju, black, white), size
+
+
+def export_renlib(record: GameRecord, size: int = 15) -> str:
+    """
+    Партия в текстовой нотации RenLib: столбцы буквами с «a», строки с единицы снизу.
+    """
+    return ' '.join(f'{chr(ord("a") + x)}{size - y}' for x, y in record.moves) + '\n'
+
+
+def import_renlib(text: str, size: int = 15, renju: bool = True) -> GameRecord:
+    """
+    Разбирает партию в текстовой нотации RenLib (например, «h8 i9 j10»).
+
+    Исключения:
+    ValueError: Если ход записан не в нотации RenLib, вне поля или в занятую клетку.
+    """
+    moves: List[Tuple[int, int]] = []
+    for token in re.findall(r'\S+', text):
+        match = re.fullmatch(r'([a-zA-Z])(\d+)', token)
+        if match is None:
+            raise ValueError(f'Неверный ход: {token}')
+        x, y = ord(match.group(1).lower()) - ord('a'), size - int(match.group(2))
+        if not (0 <= x < size and 0 <= y < size):
+            raise ValueError(f'Ход вне поля: {token}')
+        moves.append((x, y))
+    _check_moves(moves, size)
+    return GameRecord(moves, _result_of(moves, size, renju), renju)
+
+
+def convert_to_records(records: Iterable[GameRecord], path: str, size: int = 15) -> int:
+    """
+    Дописывает импортированные партии в файл партий.
+
+    Возвращает:
+    int: Число записанных партий.
+    """
+    count = 0
+    with RecordWriter(path, size) as writer:
+        for record in records:
+            writer.write(record)
+            count += 1
+    return count
+
+
+def save_game(record: GameRecord, path: str = DEFAULT_PATH, size: int = 15) -> None:
+    """
+    Дописывает одну партию в файл партий; ошибки записи не прерывают игру.
+    """
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with RecordWriter(path, size) as writer:
+            writer.write(record)
+    except (OSError, ValueError) as error:
+        print(f'Не удалось сохранить партию: {error}')
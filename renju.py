@@ -0,0 +1,241 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from position import Position, DIRECTIONS, EMPTY, BLACK
+from patterns import OPEN_FOUR, OPEN_THREE
+from line_table import LineEvaluator, TABLE_CLASS
+
+# Радиус линии, которую нужно видеть вокруг клетки, чтобы отличить пятёрку от длинного ряда
+_RADIUS = 5
+_CENTER = _RADIUS
+# Максимальная глубина рекурсивной проверки «настоящей» открытой тройки
+_MAX_DEPTH = 4
+
+_LINE_IDS: Dict[int, List[List[int]]] = {}
+
+
+def _five_points(cells: List[int]) -> List[int]:
+    """
+    Клетки линии, ход чёрных в которые даёт ровно пятёрку, проходящую через центр.
+    """
+    points: List[int] = []
+    for j in range(_CENTER - 4, _CENTER + 5):
+        if cells[j] != EMPTY:
+            continue
+        cells[j] = BLACK
+        left = j
+        while left > 0 and cells[left - 1] == BLACK:
+            left -= 1
+        right = j
+        while right < len(cells) - 1 and cells[right + 1] == BLACK:
+            right += 1
+        cells[j] = EMPTY
+        if right - left == 4 and left <= _CENTER <= right:
+            points.append(j)
+    return points
+
+
+def _count_fours(points: List[int]) -> int:
+    """
+    Количество четвёрок в линии по её клеткам пятёрки.
+
+    Две клетки на расстоянии пяти — концы одной открытой четвёрки, остальные пары — разные четвёрки.
+    """
+    if len(points) == 2 and points[1] - points[0] == 5:
+        return 1
+    return len(points)
+
+
+def line_ids(size: int) -> List[List[int]]:
+    """
+    Идентификаторы линий поля заданного размера: ids[d][index] — линия направления d
+    через клетку index. Таблица строится один раз для каждого размера поля.
+    """
+    if size not in _LINE_IDS:
+        position = Position(size)
+        ids = [[0] * (size * position.stride) for _ in DIRECTIONS]
+        for d, (dr, dc) in enumerate(DIRECTIONS):
+            for y in range(size):
+                for x in range(size):
+                    sx, sy = x, y
+                    while position.inside(sx - dc, sy - dr):
+                        sx, sy = sx - dc, sy - dr
+                    ids[d][position.bit(x, y)] = d * position.stride * size + position.bit(sx, sy)
+        _LINE_IDS[size] = ids
+    return _LINE_IDS[size]
+
+
+class ForbiddenDetector:
+    def __init__(self, position: Position, evaluator: Optional[LineEvaluator] = None) -> None:
+        """
+        Определяет запрещённые для чёрных ходы по правилам рэндзю: длинный ряд, двойную
+        четвёрку и двойную тройку (с рекурсивной проверкой того, что тройка действительно открытая).
+
+        Результат для клетки кэшируется вместе с линиями, которые были прочитаны при проверке.
+        После хода из кэша удаляются только клетки, зависящие от линий через изменённую клетку.
+        Быстрый фильтр по табличным классам LineEvaluator отсекает клетки, где запрета быть не может.
+
+        Параметры:
+        position (Position): Позиция, за которой следит детектор.
+        evaluator (LineEvaluator): Оценщик той же позиции для быстрого фильтра или None для собственного.
+        """
+        self.position: Position = position
+        self._own_evaluator: bool = evaluator is None
+        self.evaluator: LineEvaluator = evaluator if evaluator is not None else LineEvaluator(position)
+        # Идентификатор линии для каждой клетки и направления
+        self._line_of: List[List[int]] = line_ids(position.size)
+        self._cache: Dict[int, bool] = {}
+        self._dependents: Dict[int, Set[int]] = {}
+        self.checks: int = 0
+        position.listeners.append(self.update)
+
+    def detach(self) -> None:
+        """
+        Отписывает детектор (и собственный оценщик) от позиции.
+        """
+        self.position.listeners.remove(self.update)
+        if self._own_evaluator:
+            self.evaluator.detach()
+
+    def update(self, index: int, color: int) -> None:
+        """
+        Сбрасывает кэш клеток, зависящих от линий через изменённую клетку.
+        """
+        for d in range(len(DIRECTIONS)):
+            for point in self._dependents.pop(self._line_of[d][index], ()):
+                self._cache.pop(point, None)
+
+    def is_forbidden(self, x: int, y: int) -> bool:
+        """
+        Проверяет, запрещён ли ход чёрных в клетку (x, y).
+        """
+        return self.is_forbidden_index(self.position.bit(x, y))
+
+    def is_forbidden_index(self, index: int) -> bool:
+        """
+        Проверяет, запрещён ли ход чёрных в клетку с номером бита index.
+        """
+        if not self.position.renju:
+            return False
+        cached = self._cache.get(index)
+        if cached is not None:
+            return cached
+        if not self._may_be_forbidden(index):
+            return False
+        lines: Set[int] = set()
+        result = self._check(index, 0, lines)
+        self._cache[index] = result
+        for line in lines:
+            self._dependents.setdefault(line, set()).add(index)
+        return result
+
+    def forbidden_points(self, mask: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Все запрещённые для чёрных пустые клетки (по умолчанию — в окрестности фишек).
+        """
+        position = self.position
+        if mask is None:
+            return [position.coords(index) for index in sorted(position.candidates)
+                    if self.is_forbidden_index(index)]
+        points: List[Tuple[int, int]] = []
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            index = low.bit_length() - 1
+            if self.is_forbidden_index(index):
+                points.append(position.coords(index))
+        return points
+
+    def _may_be_forbidden(self, index: int) -> bool:
+        """
+        Быстрый фильтр: запрет возможен только при длинном ряде, четвёрке с двумя
+        победными клетками в одной линии или хотя бы двух угрозах по разным направлениям.
+        """
+        codes = self.evaluator.codes[BLACK]
+        threats = 0
+        for d in range(len(DIRECTIONS)):
+            cls = TABLE_CLASS[codes[d][index]]
+            if cls <= OPEN_FOUR:
+                return True
+            if cls <= OPEN_THREE:
+                threats += 1
+        return threats >= 2
+
+    def _check(self, index: int, depth: int, lines: Set[int]) -> bool:
+        """
+        Полная проверка запрета для пустой клетки в текущем состоянии битбордов.
+        """
+        self.checks += 1
+        position = self.position
+        x, y = position.coords(index)
+        boards = position.boards
+        boards[BLACK] |= 1 << index
+        try:
+            views = []
+            runs = []
+            for d in range(len(DIRECTIONS)):
+                lines.add(self._line_of[d][index])
+                cells = position.line(x, y, d, _RADIUS)
+                views.append(cells)
+                left = _CENTER
+                while left > 0 and cells[left - 1] == BLACK:
+                    left -= 1
+                right = _CENTER
+                while right < len(cells) - 1 and cells[right + 1] == BLACK:
+                    right += 1
+                runs.append(right - left + 1)
+            if 5 in runs:
+                # Пятёрка выигрывает даже вместе с запрещённой фигурой
+                return False
+            if max(runs) > 5:
+                return True
+            if sum(_count_fours(_five_points(cells)) for cells in views) >= 2:
+                return True
+            threes = 0
+            for d, cells in enumerate(views):
+                if self._is_open_three(index, d, cells, depth, lines):
+                    threes += 1
+                    if threes >= 2:
+                        return True
+            return False
+        finally:
+            boards[BLACK] &= ~(1 << index)
+
+    def _is_open_three(self, index: int, direction: int, cells: List[int], depth: int, lines: Set[int]) -> bool:
+        """
+        Проверяет, образует ли линия через клетку настоящую открытую тройку.
+
+        Тройка открытая, если есть незапрещённый ход, превращающий её в открытую четвёрку.
+        """
+        if _five_points(cells):
+            return False
+        shift = self.position.shifts[direction]
+        for j in range(_CENTER - 4, _CENTER + 5):
+            if cells[j] != EMPTY:
+                continue
+            cells[j] = BLACK
+            points = _five_points(cells)
+            cells[j] = EMPTY
+            if len(points) != 2 or points[1] - points[0] != 5:
+                continue
+            if depth >= _MAX_DEPTH:
+                return True
+            target = index + (j - _CENTER) * shift
+            if not self._check(target, depth + 1, lines):
+                return True
+        return False
+
+
+def is_legal_move(position: Position, detector: Optional[ForbiddenDetector], x: int, y: int, color: int) -> bool:
+    """
+    Проверяет, можно ли поставить фишку цвета color в клетку (x, y).
+
+    Параметры:
+    position (Position): Текущая позиция.
+    detector (ForbiddenDetector): Детектор запретов этой позиции или None (без запретов).
+    x (int): Столбец клетки.
+    y (int): Строка клетки.
+    color (int): Цвет фишки.
+    """
+    if not position.inside(x, y) or not position.is_empty(x, y):
+        return False
+    return color != BLACK or detector is None or not detector.is_forbidden(x, y)
@@ -1,79 +1,233 @@
 import random
-from typing import Optional, List, Tuple
+import time
+from typing import Dict, Optional, List, Tuple
 
-_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+from position import Position, DIRECTIONS, opponent
+from patterns import PatternTracker
+from search import choose_move, SearchBudget
+from threat_search import find_forced_move
+from book import default_book
+import parallel
 
+_DIRECTIONS = DIRECTIONS
 
-def find_threat_or_win(grid_size: int, grid: List[List[Optional[str]]], color: str, length: int) \
-        -> Optional[Tuple[int, int]]:
+
+def find_threat_or_win(position: Position, color: int, length: int) -> Optional[Tuple[int, int]]:
     """
     Проверяет наличие угрозы или возможности выиграть для заданного цвета.
 
-    Ищет в каждом направлении (горизонтально, вертикально и по диагоналям) наличие ряда фишек
-    заданного цвета и определяет, можно ли заблокировать ход противника или выиграть.
+    Ищет в каждом направлении (горизонтально, вертикально и по диагоналям) ряд ровно из length - 1
+    фишек заданного цвета со свободным концом и определяет, можно ли заблокировать ход противника
+    или выиграть. Ряды находятся битовыми операциями над всем полем сразу.
 
     Параметры:
-    grid_size (int): Размер поля (количество строк и столбцов)
-    grid (list): Двумерный массив, представляющий игровое поле, где None обозначает пустую клетку
-    color (str): Цвет фишки, для которой проверяется угроза или возможность выигрыша
-    length (int): Длина ряда, которая необходима для выигрыша или блокировки
+    position (Position): Позиция на битбордах.
+    color (int): Цвет фишки, для которой проверяется угроза или возможность выигрыша.
+    length (int): Длина ряда, которая необходима для выигрыша или блокировки.
 
     Возвращает:
     tuple или None: Координаты (столбец, строка) пустой клетки, в которую можно поставить фишку для блокировки,
                     или None, если такой клетки нет.
     """
+    run = length - 1
+    empty = position.empty
+    best: Optional[Tuple[int, int, int, Tuple[int, int]]] = None
+    for d, shift in enumerate(position.shifts):
+        starts = position.run_starts(color, d, run)
+        if not starts:
+            continue
+        after = position.neighbours(empty, d, -run)
+        before = position.neighbours(empty, d, 1)
+        starts &= after | before
+        while starts:
+            low = starts & -starts
+            starts ^= low
+            index = low.bit_length() - 1
+            end = index + run * shift
+            spot = end if empty >> end & 1 else index - shift
+            # Порядок обхода: по столбцам, затем по строкам, затем по направлениям
+            for k in range(run):
+                x, y = position.coords(index + k * shift)
+                if best is None or (x, y, d) < best[:3]:
+                    best = (x, y, d, position.coords(spot))
+    return best[3] if best else None
+
 
-    for x in range(grid_size):
-        for y in range(grid_size):
-            if grid[y][x] != color:
-                continue
-            for dr, dc in _DIRECTIONS:
-                count = 1
-                empty_spots = []
-
-                for direction in [1, -1]:
-                    for i in range(1, length):
-                        r, c = y + dr * i * direction, x + dc * i * direction
-                        if 0 <= r < grid_size and 0 <= c < grid_size:
-                            if grid[r][c] == color:
-                                count += 1
-                            elif grid[r][c] is None:
-                                empty_spots.append((c, r))
-                                break
-                            else:
-                                break
-                        else:
-                            break
-
-                if count == length - 1 and empty_spots:
-                    return empty_spots[0]
-
-
-def find_best_move_near_bot(grid_size: int, grid: List[List[Optional[str]]], bot_color: str) \
-        -> Optional[Tuple[int, int]]:
+def find_best_move_near_bot(position: Position, bot_color: int,
+                            rng: Optional[random.Random] = None) -> Optional[Tuple[int, int]]:
     """
     Ищет наилучший ход для бота рядом с его фишками.
 
-    Проверяет каждую клетку на наличие фишек заданного цвета и находит пустые клетки рядом
-    с ними. Выбирает случайный ход из доступных.
+    Для каждого направления сдвигает битборд фишек бота на одну клетку и пересекает
+    с пустыми клетками. Выбирает случайный ход из доступных.
 
     Параметры:
-    grid_size (int): Размер поля (количество строк и столбцов)
-    grid (list): Двумерный массив, представляющий игровое поле, где None обозначает пустую клетку
-    bot_color (str): Цвет фишки бота.
+    position (Position): Позиция на битбордах.
+    bot_color (int): Цвет фишки бота.
+    rng (random.Random): Генератор случайных чисел (по умолчанию — общий модуля random).
 
     Возвращает:
     tuple или None: Координаты (столбец, строка) наилучшего хода для бота,
                     или None, если таких ходов нет.
     """
+    empty = position.empty
     potential_moves: List[Tuple[int, int]] = []
-    for x in range(grid_size):
-        for y in range(grid_size):
-            if grid[y][x] == bot_color:
-                for dr, dc in _DIRECTIONS:
-                    r, c = y + dr, x + dc
-                    if 0 <= r < grid_size and 0 <= c < grid_size and grid[r][c] is None:
-                        potential_moves.append((c, r))
+    for d in range(len(_DIRECTIONS)):
+        potential_moves.extend(position.iter_bits(position.neighbours(position.boards[bot_color], d) & empty))
     if potential_moves:
-        return random.choice(potential_moves)
+        return (rng or random).choice(potential_moves)
+    return None
+
+
+def original_move(position: Position, bot_color: int,
+                  rng: Optional[random.Random] = None) -> Optional[Tuple[int, int]]:
+    """
+    Ход исходного бота игры: каскад find_threat_or_win, find_best_move_near_bot и случайного хода.
+
+    В отличие от greedy_move, угрозы ищутся как ряды подряд стоящих фишек, поэтому «рваные»
+    четвёрки и тройки этот бот не видит. Служит неизменной точкой отсчёта для матчей.
+
+    Параметры:
+    position (Position): Позиция на битбордах.
+    bot_color (int): Цвет фишки бота.
+    rng (random.Random): Генератор случайных чисел; с собственным генератором партии воспроизводимы.
+
+    Возвращает:
+    tuple или None: Координаты (столбец, строка) хода или None, если поле заполнено.
+    """
+    player_color = opponent(bot_color)
+    # 1. Поиск победного хода
+    move = find_threat_or_win(position, bot_color, 5)
+    if move:
+        return move
+
+    # 2. Блокировка игрока, если у него есть 4 фишки подряд
+    move = find_threat_or_win(position, player_color, 5)
+    if move:
+        return move
+
+    # 3. Блокировка игрока, если у него есть 3 фишки подряд
+    move = find_threat_or_win(position, player_color, 4)
+    if move:
+        return move
+
+    # 4. Поиск хода рядом с фишками бота
+    move = find_best_move_near_bot(position, bot_color, rng)
+    if move:
+        return move
+
+    # 5. Если нет угроз и победных ходов, делаем случайный ход
+    available_moves: List[Tuple[int, int]] = sorted(position.iter_bits(position.empty))
+    if available_moves:
+        return (rng or random).choice(available_moves)
+    return None
+
+
+def greedy_move(position: Position, threats: PatternTracker, bot_color: int,
+                rng: Optional[random.Random] = None) -> Optional[Tuple[int, int]]:
+    """
+    Жадный выбор хода без просмотра вперёд.
+
+    Последовательно проверяет: победный ход, блокировку четвёрки соперника, блокировку
+    открытой тройки соперника, ход рядом со своими фишками и, наконец, случайную свободную клетку.
+
+    Параметры:
+    position (Position): Позиция на битбордах.
+    threats (PatternTracker): Трекер угроз этой позиции.
+    bot_color (int): Цвет фишки бота.
+    rng (random.Random): Генератор случайных чисел; с собственным генератором партии воспроизводимы.
+
+    Возвращает:
+    tuple или None: Координаты (столбец, строка) хода или None, если поле заполнено.
+    """
+    player_color = opponent(bot_color)
+    # 1. Поиск победного хода
+    move: Optional[Tuple[int, int]] = threats.first_win(bot_color)
+    if move:
+        return move
+
+    # 2. Блокировка игрока, если у него есть 4 фишки подряд
+    move = threats.first_win(player_color)
+    if move:
+        return move
+
+    # 3. Блокировка открытой тройки игрока
+    move = threats.first_open_four(player_color)
+    if move:
+        return move
+
+    # 4. Поиск хода рядом с фишками бота
+    move = find_best_move_near_bot(position, bot_color, rng)
+    if move:
+        return move
+
+    # 5. Если нет угроз и победных ходов, делаем случайный ход
+    available_moves: List[Tuple[int, int]] = sorted(position.iter_bits(position.empty))
+    if available_moves:
+        return (rng or random).choice(available_moves)
     return None
+
+
+def select_move(position: Position, bot_color: int, budget: SearchBudget,
+                use_book: bool = True, stats: Optional[Dict[str, float]] = None) -> Optional[Tuple[int, int]]:
+    """
+    Выбирает ход бота: книга дебютов, форсированные варианты, затем поиск с альфа-бета отсечениями.
+
+    Параметры:
+    position (Position): Текущая позиция (не изменяется).
+    bot_color (int): Цвет фишки бота.
+    budget (SearchBudget): Ограничения поиска, в том числе функция отмены.
+    use_book (bool): Искать ли позицию в книге дебютов (book.DEFAULT_PATH), если она есть.
+    stats (dict): Словарь для статистики хода или None. В него записываются время каждой фазы
+                  (book_time, win_time, block_time, search_time), общее время (total_time), фаза,
+                  давшая ход (phase: 'book', 'win', 'block', 'search'), и счётчики поиска.
+
+    Возвращает:
+    tuple или None: Координаты (столбец, строка) хода или None, если ходов нет.
+    """
+    if stats is not None:
+        start = time.perf_counter()
+        move = _select_move(position, bot_color, budget, use_book, stats)
+        stats['total_time'] = time.perf_counter() - start
+        return move
+    return _select_move(position, bot_color, budget, use_book, None)
+
+
+def _select_move(position: Position, bot_color: int, budget: SearchBudget, use_book: bool,
+                 stats: Optional[Dict[str, float]]) -> Optional[Tuple[int, int]]:
+    """
+    Фазы select_move; при stats не None записывает их время.
+    """
+    # Лимит времени — на весь ход: поиску с альфа-бета отсечениями достаётся то, что осталось после книги и угроз
+    started = time.perf_counter()
+    # 0. Ход из книги дебютов
+    opening_book = default_book() if use_book else None
+    if opening_book is not None:
+        start = time.perf_counter() if stats is not None else 0.0
+        move: Optional[Tuple[int, int]] = opening_book.choose(position)
+        if stats is not None:
+            stats['book_time'] = time.perf_counter() - start
+        if move is not None:
+            if stats is not None:
+                stats['phase'] = 'book'
+            return move
+
+    # 1. Форсированный выигрыш бота или защита от форсированного выигрыша игрока.
+    # При лимите узлов поиск угроз тоже ограничивается узлами, чтобы ход не зависел от загрузки машины
+    if budget.node_limit is not None:
+        move = find_forced_move(position, bot_color, time_limit=None,
+                                node_limit=budget.node_limit // 4, stop=budget.stop, stats=stats)
+    else:
+        # Четыре поиска угроз вместе занимают не больше половины времени хода
+        time_limit = min(0.1, budget.time_limit / 8) if budget.time_limit is not None else 0.1
+        move = find_forced_move(position, bot_color, time_limit=time_limit, stop=budget.stop, stats=stats)
+    if move is not None:
+        return move
+
+    # 2. Поиск с альфа-бета отсечениями
+    if stats is not None:
+        stats['phase'] = 'search'
+    budget = budget.remaining(time.perf_counter() - started)
+    if budget.threads > 1:
+        return parallel.choose_move(position, budget, bot_color, stats)
+    return choose_move(position, budget, bot_color, stats)
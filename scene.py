@@ -0,0 +1,99 @@
+import time
+
+import pygame
+from assets import shared_cache
+from stats import Stats, shared_stats
+from typing import Optional, Protocol
+
+from window import Window
+
+
+class Scene(Protocol):
+    """
+    Экран приложения (лобби, настройки, игровое поле), которым управляет SceneManager.
+    """
+    window: Window
+
+    @property
+    def animating(self) -> bool:
+        """
+        Нужно ли обновлять экран без событий (например, пока бот думает).
+        """
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        """
+        Обрабатывает одно событие pygame.
+        """
+
+    def update(self) -> None:
+        """
+        Обновляет состояние перед отрисовкой кадра.
+        """
+
+
+class SceneManager:
+    def __init__(self) -> None:
+        """
+        Единственный цикл событий приложения, переключающий экраны на одном окне pygame.
+
+        Экраны не вызывают pygame.quit и не запускают собственных циклов: переход
+        на другой экран только запоминается через switch и выполняется после обработки
+        текущих событий. Поэтому стек вызовов и память не растут при переходах,
+        а SDL и загруженные ресурсы живут всё время работы программы.
+        """
+        self.scene: Optional[Scene] = None
+        self._next: Optional[Scene] = None
+        self.stats: Stats = shared_stats()
+
+    def switch(self, scene: Scene) -> None:
+        """
+        Переключает на экран scene после обработки текущих событий.
+        """
+        self._next = scene
+
+    def run(self, scene: Scene) -> None:
+        """
+        Запускает цикл событий с экрана scene и работает, пока текущий экран не закроется
+        без перехода на другой.
+
+        При включённой статистике каждый кадр записывается в неё видом 'frame':
+        время обновления и отрисовки (frame_time), число blit, время обработки
+        событий (event_time) и их количество. Ожидание событий в эти времена не входит.
+        """
+        self.scene = scene
+        stats = self.stats
+        while True:
+            if self._next is not None:
+                self.scene, self._next = self._next, None
+                self.scene.window.invalidate()
+            scene = self.scene
+            if not scene.window.running:
+                break
+            # Флаг читается раз за кадр: статистику могут включить во время обработки событий
+            measuring = stats.enabled
+            if measuring:
+                start = time.perf_counter()
+            scene.update()
+            scene.window.render()
+            if measuring:
+                frame_time = time.perf_counter() - start
+            events = scene.window.wait_events(animating=scene.animating)
+            if measuring:
+                start = time.perf_counter()
+            for event in events:
+                scene.handle_event(event)
+                if self._next is not None or not scene.window.running:
+                    break
+            if measuring:
+                stats.record('frame', {'frame_time': frame_time, 'blits': scene.window.blits,
+                                       'event_time': time.perf_counter() - start, 'events': len(events)})
+        self.close()
+
+    def close(self) -> None:
+        """
+        Закрывает окно и журнал статистики и завершает работу pygame.
+        """
+        self.scene = None
+        self.stats.disable()
+        shared_cache().clear_fonts()
+        pygame.quit()
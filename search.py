@@ -0,0 +1,511 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from position import Position, BLACK, opponent
+from patterns import PatternTracker, FIVE, OPEN_FOUR, FOUR, OPEN_THREE, THREE
+from line_table import LineEvaluator
+from renju import ForbiddenDetector
+from symmetry import SymmetricHash, canonical, index_maps
+
+WIN_SCORE = 1_000_000
+# Оценки выше этого порога означают найденный выигрыш или проигрыш
+WIN_THRESHOLD = WIN_SCORE - 1000
+INFINITY = WIN_SCORE + 1
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Во сколько раз следующая итерация углубления обычно дольше предыдущей
+ITERATION_GROWTH = 3.0
+# Бюджет проверяется раз в CHECK_INTERVAL + 1 узлов: при нескольких тысячах узлов в секунду
+# это несколько миллисекунд, так что поиск не выходит за лимит времени заметно
+CHECK_INTERVAL = 15
+
+# Веса классов линий для статической оценки
+CLASS_WEIGHTS: Dict[int, int] = {FIVE: WIN_SCORE, OPEN_FOUR: 20000, FOUR: 1500, OPEN_THREE: 1200, THREE: 150}
+
+
+class SearchBudget:
+    def __init__(self, time_limit: Optional[float] = 1.0, node_limit: Optional[int] = None,
+                 max_depth: int = 20, stop: Optional[Callable[[], bool]] = None, threads: int = 1,
+                 soft_limit: Optional[float] = None) -> None:
+        """
+        Ограничения на поиск одного хода.
+
+        Параметры:
+        time_limit (float): Жёсткий лимит времени в секундах или None.
+        node_limit (int): Лимит числа узлов или None.
+        max_depth (int): Максимальная глубина итеративного углубления.
+        stop (callable): Функция, возвращающая True, если поиск нужно прервать (отмена извне).
+        threads (int): Число процессов поиска; больше одного — параллельный поиск (parallel.LazySMP).
+        soft_limit (float): Мягкий лимит времени (см. timecontrol.TimeManager): после него новая итерация
+                            углубления не начинается. None — искать до жёсткого лимита.
+        """
+        self.time_limit: Optional[float] = time_limit
+        self.node_limit: Optional[int] = node_limit
+        self.max_depth: int = max_depth
+        self.stop: Optional[Callable[[], bool]] = stop
+        self.threads: int = threads
+        self.soft_limit: Optional[float] = soft_limit
+
+    def remaining(self, elapsed: float) -> 'SearchBudget':
+        """
+        Бюджет на оставшуюся часть хода, если elapsed секунд уже потрачено (на книгу, поиск угроз, очередь).
+        Лимиты времени уменьшаются на elapsed, но не ниже нуля; остальные ограничения те же.
+        """
+        time_limit = max(0.0, self.time_limit - elapsed) if self.time_limit is not None else None
+        soft_limit = max(0.0, self.soft_limit - elapsed) if self.soft_limit is not None else None
+        return SearchBudget(time_limit, self.node_limit, self.max_depth, self.stop, self.threads, soft_limit)
+
+
+class SearchTimeout(Exception):
+    """
+    Исключение, прерывающее поиск при исчерпании бюджета.
+    """
+
+
+class TranspositionTable:
+    def __init__(self, size_bits: int = 18) -> None:
+        """
+        Таблица транспозиций фиксированного размера.
+
+        Запись хранится в ячейке hash & mask. При коллизии запись заменяется, если она
+        осталась от предыдущего поиска (другое поколение) или если новая глубина не меньше старой.
+
+        Параметры:
+        size_bits (int): Двоичный логарифм количества ячеек.
+        """
+        self.mask: int = (1 << size_bits) - 1
+        self.entries: List[Optional[Tuple[int, int, int, int, int, int]]] = [None] * (1 << size_bits)
+        self.generation: int = 0
+        self.hits: int = 0
+        self.probes: int = 0
+
+    def new_search(self) -> None:
+        """
+        Начинает новое поколение записей.
+        """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int, int, int]]:
+        """
+        Возвращает запись (ключ, глубина, оценка, флаг, ход, поколение) для ключа или None.
+        """
+        self.probes += 1
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: int) -> None:
+        """
+        Сохраняет результат поиска с учётом политики замещения.
+        """
+        slot = key & self.mask
+        entry = self.entries[slot]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.entries[slot] = (key, depth, score, flag, move, self.generation)
+
+    def clear(self) -> None:
+        """
+        Очищает таблицу.
+        """
+        self.entries = [None] * (self.mask + 1)
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    """
+    Переводит оценку выигрыша из расстояния от корня в расстояние от узла.
+    """
+    if score > WIN_THRESHOLD:
+        return score + ply
+    if score < -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    """
+    Обратное преобразование к _score_to_tt.
+    """
+    if score > WIN_THRESHOLD:
+        return score - ply
+    if score < -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+class Searcher:
+    def __init__(self, position: Position, table: Optional[TranspositionTable] = None,
+                 max_width: int = 16) -> None:
+        """
+        Поиск negamax с альфа-бета отсечениями и итеративным углублением.
+
+        Ищет на собственной копии позиции со своим трекером угроз. Ходы рассматриваются
+        только в окрестности фишек и упорядочиваются по ходу из таблицы транспозиций,
+        угрозам, killer-ходам и истории. Таблица транспозиций хранит позиции по каноническому
+        ключу с ходами в канонической ориентации, поэтому симметричные позиции находят друг друга.
+
+        Параметры:
+        position (Position): Позиция, для которой ищется ход (не изменяется).
+        table (TranspositionTable): Таблица транспозиций или None для новой.
+        max_width (int): Сколько лучших по упорядочиванию ходов рассматривать во внутренних узлах.
+        """
+        self.position: Position = position.copy()
+        self.threats: PatternTracker = PatternTracker(self.position)
+        self.evaluator: LineEvaluator = LineEvaluator(self.position)
+        self.forbidden: ForbiddenDetector = ForbiddenDetector(self.position, self.evaluator)
+        self.symmetry: SymmetricHash = SymmetricHash(self.position)
+        self.table: TranspositionTable = table if table is not None else TranspositionTable()
+        self.max_width: int = max_width
+        self.killers: List[List[int]] = []
+        self.history: Dict[int, int] = {}
+        self.nodes: int = 0
+        self.cutoffs: int = 0
+        self.depth_reached: int = 0
+        self.best_score: int = 0
+        # Лучшие ходы корня последней законченной итерации: (номер бита, оценка) по убыванию оценки
+        self.top_moves: List[Tuple[int, int]] = []
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+        self._stop: Optional[Callable[[], bool]] = None
+        self._partial: Optional[Tuple[int, int]] = None
+
+    def close(self) -> None:
+        """
+        Отписывает трекер и оценщик от рабочей копии позиции.
+        """
+        self.forbidden.detach()
+        self.threats.detach()
+        self.evaluator.detach()
+        self.symmetry.detach()
+
+    def evaluate(self, color: int) -> int:
+        """
+        Статическая оценка позиции с точки зрения цвета color, который ходит.
+        """
+        own, other = self.threats.counts[color], self.threats.counts[opponent(color)]
+        score = 0
+        for cls, weight in CLASS_WEIGHTS.items():
+            score += weight * (own[cls] - other[cls])
+        return score
+
+    def _candidates(self, color: int, ply: int, tt_move: int) -> List[int]:
+        """
+        Генерирует и упорядочивает ходы для цвета color.
+
+        Помимо угроз из трекера, ходы сортируются по табличной оценке атаки и защиты.
+        Запрещённые по правилам рэндзю ходы чёрных отбрасываются.
+        """
+        threats = self.threats
+        other = opponent(color)
+        forced = threats.wins[other]
+        if forced:
+            moves = list(forced)
+        else:
+            moves = list(self.position.candidates)
+        if color == BLACK and self.position.renju:
+            is_forbidden = self.forbidden.is_forbidden_index
+            moves = [move for move in moves if not is_forbidden(move)]
+            if forced and not moves:
+                # Закрыть выигрыш соперника можно только запрещённым ходом: партия проиграна,
+                # но ход всё равно делается по правилам
+                moves = [move for move in self.position.candidates if not is_forbidden(move)]
+
+        own_wins, own_straight, own_fours = threats.wins[color], threats.straight[color], threats.fours[color]
+        opp_straight, opp_fours = threats.straight[other], threats.fours[other]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history
+        evaluate = self.evaluator.score
+        scored: List[Tuple[int, int]] = []
+        for move in moves:
+            if move == tt_move:
+                score = 1 << 40
+            elif move in own_wins:
+                score = 1 << 39
+            else:
+                score = history.get(move, 0) + evaluate(move, color) + evaluate(move, other)
+                if move in own_straight:
+                    score += 1 << 30
+                elif move in opp_straight:
+                    score += 1 << 29
+                if move in own_fours:
+                    score += 1 << 27
+                if move in opp_fours:
+                    score += 1 << 26
+                if move in killers:
+                    score += 1 << 25
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def _check_budget(self) -> None:
+        """
+        Прерывает поиск, если исчерпан лимит времени или узлов.
+        """
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise SearchTimeout()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
+        if self._stop is not None and self._stop():
+            raise SearchTimeout()
+
+    def negamax(self, depth: int, alpha: int, beta: int, color: int, ply: int) -> int:
+        """
+        Рекурсивный поиск negamax с альфа-бета отсечениями.
+
+        Возвращает:
+        int: Оценка позиции с точки зрения цвета color.
+        """
+        self.nodes += 1
+        if not self.nodes & CHECK_INTERVAL:
+            self._check_budget()
+        threats = self.threats
+        other = opponent(color)
+        if threats.counts[other][FIVE]:
+            return -WIN_SCORE + ply
+        if threats.wins[color]:
+            return WIN_SCORE - ply - 1
+        if depth <= 0:
+            return self.evaluate(color)
+
+        position = self.position
+        symmetry = self.symmetry
+        key, orientation = symmetry.canonical()
+        entry = self.table.probe(key)
+        tt_move = -1
+        if entry is not None:
+            tt_move = symmetry.from_canonical(entry[4], orientation)
+            if entry[1] >= depth:
+                score = _score_from_tt(entry[2], ply)
+                if entry[3] == EXACT:
+                    return score
+                if entry[3] == LOWER and score >= beta:
+                    return score
+                if entry[3] == UPPER and score <= alpha:
+                    return score
+
+        moves = self._candidates(color, ply, tt_move)[:self.max_width]
+        if not moves:
+            return 0
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = moves[0]
+        stride = position.stride
+        for move in moves:
+            position.place(move % stride, move // stride, color)
+            score = -self.negamax(depth - 1, -beta, -alpha, other, ply + 1)
+            position.undo()
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self._record_cutoff(move, depth, ply)
+                break
+
+        flag = UPPER if best_score <= original_alpha else LOWER if best_score >= beta else EXACT
+        self.table.store(key, depth, _score_to_tt(best_score, ply), flag,
+                         symmetry.to_canonical(best_move, orientation))
+        return best_score
+
+    def _record_cutoff(self, move: int, depth: int, ply: int) -> None:
+        """
+        Обновляет killer-ходы и историю после отсечения.
+        """
+        self.cutoffs += 1
+        while len(self.killers) <= ply:
+            self.killers.append([-1, -1])
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    def search_root(self, depth: int, color: int, root_moves: List[int], multipv: int = 1) -> Tuple[int, int]:
+        """
+        Поиск из корня на заданную глубину.
+
+        Точные оценки получают multipv лучших ходов: каждый следующий ход ищется с нижней
+        границей окна, равной оценке multipv-го из уже найденных, и отсекается, если не лучше его.
+        При multipv = 1 это обычный поиск лучшего хода. Найденные ходы сохраняются в top_moves.
+
+        Возвращает:
+        tuple: (лучший ход в виде номера бита, его оценка).
+        """
+        position = self.position
+        stride = position.stride
+        top: List[Tuple[int, int]] = []
+        for move in root_moves:
+            alpha = top[-1][0] if len(top) == multipv else -INFINITY
+            position.place(move % stride, move // stride, color)
+            score = -self.negamax(depth - 1, -INFINITY, -alpha, opponent(color), 1)
+            position.undo()
+            if score > alpha:
+                top.append((score, move))
+                top.sort(key=lambda item: -item[0])
+                del top[multipv:]
+                if top[0][1] == move:
+                    # Лучший ход прерванной итерации тоже можно использовать
+                    self._partial = (move, score)
+        best_score, best_move = top[0]
+        self.top_moves = [(move, score) for score, move in top]
+        key, orientation = self.symmetry.canonical()
+        self.table.store(key, depth, best_score, EXACT, self.symmetry.to_canonical(best_move, orientation))
+        return best_move, best_score
+
+    def iterate(self, budget: SearchBudget, color: Optional[int] = None, start_depth: int = 1,
+                root_shift: int = 0, multipv: int = 1,
+                on_iteration: Optional[Callable[[int, List[Tuple[int, int]]], None]] = None) \
+            -> Optional[Tuple[int, int]]:
+        """
+        Итеративное углубление в пределах бюджета.
+
+        Параметры:
+        budget (SearchBudget): Ограничения поиска.
+        color (int): Цвет, за который ищется ход (по умолчанию — очередь хода позиции).
+        start_depth (int): Глубина первой итерации.
+        root_shift (int): Номер хода корня (по упорядочиванию), который рассматривается первым.
+                          Вместе со start_depth разводит процессы параллельного поиска.
+        multipv (int): Сколько лучших ходов корня оценивать точно (см. search_root).
+        on_iteration (callable): Вызывается после каждой законченной итерации с её глубиной
+                                 и top_moves или None.
+
+        Возвращает:
+        tuple или None: Координаты (столбец, строка) лучшего хода или None, если ходов нет.
+        """
+        position = self.position
+        if color is None:
+            color = position.side_to_move
+        if not position.occupied:
+            centre = position.size // 2
+            self.top_moves = [(position.bit(centre, centre), 0)]
+            return centre, centre
+        self.table.new_search()
+        started = time.perf_counter()
+        self._deadline = started + budget.time_limit if budget.time_limit is not None else None
+        self._node_limit = self.nodes + budget.node_limit if budget.node_limit is not None else None
+        self._stop = budget.stop
+
+        root_moves = self._candidates(color, 0, -1)
+        if not root_moves:
+            return None
+        if len(root_moves) == 1 or root_moves[0] in self.threats.wins[color]:
+            self.top_moves = [(root_moves[0], WIN_SCORE - 1 if root_moves[0] in self.threats.wins[color] else 0)]
+            return position.coords(root_moves[0])
+
+        if root_shift:
+            root_moves.insert(0, root_moves.pop(root_shift % len(root_moves)))
+        best_move = root_moves[0]
+        first_depth = min(start_depth, budget.max_depth)
+        stable = 0
+        for depth in range(first_depth, budget.max_depth + 1):
+            self._partial = None
+            iteration_started = time.perf_counter()
+            try:
+                move, score = self.search_root(depth, color, root_moves, multipv)
+            except SearchTimeout:
+                # Первым в итерации ищется прежний лучший ход, поэтому частичный результат не хуже
+                if self._partial is not None:
+                    best_move, self.best_score = self._partial
+                break
+            changed = depth > first_depth and move != best_move
+            stable = 0 if changed else stable + 1
+            best_move, self.best_score, self.depth_reached = move, score, depth
+            for top_move, _ in reversed(self.top_moves):
+                root_moves.remove(top_move)
+                root_moves.insert(0, top_move)
+            if on_iteration is not None:
+                on_iteration(depth, self.top_moves)
+            if abs(score) > WIN_THRESHOLD:
+                break
+            if budget.soft_limit is not None and self._soft_stop(budget.soft_limit, started, iteration_started,
+                                                                 changed, stable):
+                break
+        return position.coords(best_move)
+
+    def _soft_stop(self, soft_limit: float, started: float, iteration_started: float, changed: bool,
+                   stable: int) -> bool:
+        """
+        Решает после законченной итерации, что следующую начинать не нужно.
+
+        Мягкий лимит удваивается, если лучший ход в этой итерации сменился, и делится пополам,
+        если он не меняется три итерации подряд. Кроме того, итерация не начинается, если
+        по времени предыдущей она не успеет закончиться до жёсткого лимита.
+        """
+        now = time.perf_counter()
+        factor = 2.0 if changed else 0.5 if stable >= 3 else 1.0
+        if now - started >= soft_limit * factor:
+            return True
+        return self._deadline is not None and now + ITERATION_GROWTH * (now - iteration_started) > self._deadline
+
+
+_shared_table: Optional[TranspositionTable] = None
+
+
+def choose_move(position: Position, budget: Optional[SearchBudget] = None,
+                color: Optional[int] = None, stats: Optional[Dict[str, float]] = None) \
+        -> Optional[Tuple[int, int]]:
+    """
+    Выбирает ход поиском с альфа-бета отсечениями в пределах бюджета.
+
+    Таблица транспозиций общая для всех вызовов в процессе, поэтому результаты
+    предыдущего хода помогают при поиске следующего.
+
+    Параметры:
+    position (Position): Текущая позиция (не изменяется).
+    budget (SearchBudget): Ограничения поиска; по умолчанию одна секунда.
+    color (int): Цвет, за который ищется ход (по умолчанию — очередь хода позиции).
+    stats (dict): Словарь, в который записываются счётчики поиска (узлы, обращения
+                  к таблице транспозиций и попадания, отсечения, глубина, время), или None.
+
+    Возвращает:
+    tuple или None: Координаты (столбец, строка) хода или None, если ходов нет.
+    """
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = TranspositionTable()
+    table = _shared_table
+    start, probes, hits = time.perf_counter(), table.probes, table.hits
+    searcher = Searcher(position, table)
+    # Построение трекеров рабочей копии тоже входит в лимит хода
+    move = searcher.iterate((budget or SearchBudget()).remaining(time.perf_counter() - start), color)
+    searcher.close()
+    if stats is not None:
+        stats.update(search_time=time.perf_counter() - start, nodes=searcher.nodes,
+                     tt_probes=table.probes - probes, tt_hits=table.hits - hits,
+                     cutoffs=searcher.cutoffs, depth=searcher.depth_reached)
+    return move
+
+
+def clear_shared_table() -> None:
+    """
+    Очищает общую таблицу транспозиций, чтобы следующий поиск не зависел от предыдущих.
+    """
+    if _shared_table is not None:
+        _shared_table.clear()
+
+
+def probe_move(position: Position) -> Optional[Tuple[int, int]]:
+    """
+    Возвращает лучший ход для позиции из общей таблицы транспозиций, если он там есть.
+
+    Параметры:
+    position (Position): Позиция, для которой ищется запись.
+
+    Возвращает:
+    tuple или None: Координаты (столбец, строка) хода или None.
+    """
+    if _shared_table is None:
+        return None
+    key, orientation = canonical(position)
+    entry = _shared_table.probe(key)
+    if entry is None or entry[4] < 0:
+        return None
+    move = index_maps(position.size)[1][orientation][entry[4]]
+    if not position.empty >> move & 1:
+        return None
+    return position.coords(move)
@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from engine import Engine
+from patterns import PatternTracker
+from position import Position, BLACK, WHITE, opponent
+
+# Сколько команд одной партии может ждать своей очереди; сверх этого сервер отвечает BUSY
+SESSION_QUEUE = 4
+# Запас до срока хода на пересылку и разбор ответа, в секундах
+_DEADLINE_MARGIN = 0.05
+# Если до срока остаётся меньше этого, ход выбирается жадно в самом сервере
+_MIN_THINK = 0.02
+# Запас на передачу хода процессу пула, сборку позиции и возврат ответа
+_TRANSFER_MARGIN = 0.03
+
+
+def _think(size: int, renju: bool, history: List[Tuple[int, int]], color: int, time_limit: float,
+           node_limit: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    Ищет ход в процессе пула: собирает позицию по истории и вызывает select_move.
+    """
+    # Импорт здесь, чтобы главный процесс сервера не строил таблицы движка
+    from robot_logic import select_move
+    from search import SearchBudget
+
+    position = Position(size, renju)
+    for index, stone in history:
+        x, y = position.coords(index)
+        position.place(x, y, stone)
+    return select_move(position, color, SearchBudget(time_limit, node_limit))
+
+
+def _greedy(engine: Engine, color: int) -> Optional[Tuple[int, int]]:
+    """
+    Мгновенный жадный ход, когда на поиск до срока уже не остаётся времени.
+
+    Жадный выбор не знает запретов рэндзю, поэтому запрещённый ход заменяется первой
+    допустимой клеткой рядом с фишками, а если таких нет — любой допустимой клеткой.
+    """
+    from robot_logic import greedy_move
+
+    position = engine.position
+    threats = PatternTracker(position)
+    try:
+        move = greedy_move(position, threats, color)
+    finally:
+        threats.detach()
+    if move is None or engine.is_legal(move[0], move[1], color):
+        return move
+    for mask in (position.neighbourhood(2), position.empty):
+        for x, y in position.iter_bits(mask):
+            if engine.is_legal(x, y, color):
+                return x, y
+    return None
+
+
+class EnginePool:
+    def __init__(self, workers: int, max_queue: int, move_time: float, node_limit: Optional[int] = None) -> None:
+        """
+        Ограниченный пул процессов движка, общий для всех партий сервера.
+
+        В пул одновременно отправляется не больше workers ходов, поэтому внутренняя очередь
+        ProcessPoolExecutor не растёт; остальные ждут семафора. Пока ждущих не меньше max_queue,
+        пул перегружен (overloaded), и сервер отвечает на новые ходы BUSY, не принимая их.
+
+        Параметры:
+        workers (int): Число процессов движка.
+        max_queue (int): Сколько ходов может ждать свободного процесса.
+        move_time (float): Время на поиск хода в секундах (меньше, если срок хода ближе).
+        node_limit (int): Лимит узлов на ход или None.
+        """
+        self.workers: int = workers
+        self.max_queue: int = max_queue
+        self.move_time: float = move_time
+        self.node_limit: Optional[int] = node_limit
+        self.executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=workers)
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(workers)
+        self.waiting: int = 0
+        self.moves: int = 0
+        self.fallbacks: int = 0
+
+    @property
+    def overloaded(self) -> bool:
+        """
+        Заполнена ли очередь ходов, ждущих свободного процесса.
+        """
+        return self.waiting >= self.max_queue
+
+    async def think(self, engine: Engine, color: int, deadline: float) -> Optional[Tuple[int, int]]:
+        """
+        Ищет ход так, чтобы ответ успел к моменту deadline (по часам цикла событий).
+
+        Время поиска — наименьшее из move_time и остатка до срока. Если ход не дождался
+        свободного процесса вовремя или процесс не ответил к сроку, ход выбирается жадно
+        в текущем процессе без поиска.
+        """
+        loop = asyncio.get_running_loop()
+        self.moves += 1
+        self.waiting += 1
+        try:
+            # Ход, не дождавшийся процесса до срока, не занимает его, а выбирается жадно
+            await asyncio.wait_for(self._slots.acquire(),
+                                   max(0.0, deadline - loop.time() - _DEADLINE_MARGIN - _MIN_THINK))
+        except asyncio.TimeoutError:
+            self.fallbacks += 1
+            return _greedy(engine, color)
+        finally:
+            self.waiting -= 1
+        release = True
+        try:
+            remaining = deadline - loop.time() - _DEADLINE_MARGIN
+            if remaining - _TRANSFER_MARGIN < _MIN_THINK:
+                self.fallbacks += 1
+                return _greedy(engine, color)
+            position = engine.position
+            future = loop.run_in_executor(
+                self.executor, _think, position.size, position.renju, position.history[:], color,
+                min(self.move_time, remaining - _TRANSFER_MARGIN), self.node_limit)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future),
+                                              max(0.0, deadline - loop.time() - _DEADLINE_MARGIN))
+            except asyncio.TimeoutError:
+                # Опоздавший процесс ещё занят: его место в пуле освобождается, когда он закончит
+                release = False
+                future.add_done_callback(self._finished_late)
+                self.fallbacks += 1
+                return _greedy(engine, color)
+        finally:
+            if release:
+                self._slots.release()
+
+    def _finished_late(self, future: asyncio.Future) -> None:
+        """
+        Освобождает процесс, ответ которого не успел к сроку; результат отбрасывается.
+        """
+        if not future.cancelled():
+            future.exception()
+        self._slots.release()
+
+    def close(self) -> None:
+        """
+        Останавливает процессы пула.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Session:
+    def __init__(self, name: str, size: int, player: int, renju: bool) -> None:
+        """
+        Одна партия игрока с ботом на сервере.
+
+        Правила те же, что в окне игры: допустимость хода проверяет Engine.is_legal
+        (занятые клетки и запреты рэндзю для чёрных), победу — Engine.play через
+        Position.is_win_at, как в Board.handle_click и Board.check_winner.
+        Команды партии выполняются по очереди из собственной очереди ограниченного размера.
+
+        Параметры:
+        name (str): Имя партии, выбранное клиентом (уникально в пределах соединения).
+        size (int): Размер поля.
+        player (int): Цвет игрока; бот играет другим цветом.
+        renju (bool): Правила рэндзю.
+        """
+        self.name: str = name
+        self.engine: Engine = Engine(size, renju)
+        self.player: int = player
+        self.bot: int = opponent(player)
+        self.over: bool = False
+        # (ход игрока или None, срок ответа по часам цикла событий)
+        self.queue: 'asyncio.Queue[Tuple[Optional[Tuple[int, int]], float]]' = asyncio.Queue(SESSION_QUEUE)
+        self.task: Optional[asyncio.Task] = None
+
+
+class GameServer:
+    def __init__(self, pool: EnginePool, deadline: float = 1.0) -> None:
+        """
+        Сервер партий на asyncio с построчным текстовым протоколом.
+
+        Одно соединение может вести много партий; каждая команда и ответ начинаются
+        с имени партии. Команды клиента:
+        NEW <имя> <размер> <black|white> [gomoku] — новая партия (бот ходит первым, если игрок белый);
+        PLAY <имя> x,y — ход игрока; CLOSE <имя> — закончить партию; STATS — состояние сервера; QUIT.
+        Ответы сервера: OK <имя>, MOVE <имя> x,y (ход бота), END <имя> <player|bot|draw> [x,y]
+        (конец партии и последний ход бота, если партию закончил он),
+        ERROR <имя> <причина>, BUSY <имя> (команда не принята: очередь партии или пула
+        заполнена, повторите позже), UNKNOWN <команда>.
+
+        Параметры:
+        pool (EnginePool): Пул процессов движка.
+        deadline (float): Срок ответа на ход игрока в секундах с момента получения команды.
+        """
+        self.pool: EnginePool = pool
+        self.deadline: float = deadline
+        self.sessions: int = 0
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Обслуживает одно соединение до QUIT или разрыва; при выходе закрывает его партии.
+        """
+        sessions: Dict[str, Session] = {}
+
+        async def send(line: str) -> None:
+            writer.write(line.encode() + b'\n')
+            await writer.drain()
+
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                parts = raw.decode().split()
+                if not parts:
+                    continue
+                command, arguments = parts[0].upper(), parts[1:]
+                if command == 'QUIT':
+                    break
+                handler: Optional[Callable] = getattr(self, f'_cmd_{command.lower()}', None)
+                if handler is None:
+                    await send(f'UNKNOWN {command}')
+                    continue
+                try:
+                    await handler(sessions, send, *arguments)
+                except (ValueError, TypeError) as error:
+                    await send(f'ERROR {arguments[0] if arguments else "-"} {error}')
+        except (ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            for session in sessions.values():
+                self._close_session(session)
+            writer.close()
+
+    async def _cmd_new(self, sessions: Dict[str, Session], send, name: str, size: str, color: str,
+                       rules: str = 'renju') -> None:
+        if name in sessions:
+            raise ValueError('session exists')
+        if int(size) < 5:
+            raise ValueError(f'unsupported size {size}')
+        if color not in ('black', 'white'):
+            raise ValueError(f'unknown color {color}')
+        if color == 'white' and self.pool.overloaded:
+            # Партия с первым ходом бота не начинается, пока движку некогда
+            await send(f'BUSY {name}')
+            return
+        session = Session(name, int(size), BLACK if color == 'black' else WHITE, rules != 'gomoku')
+        sessions[name] = session
+        self.sessions += 1
+        session.task = asyncio.create_task(self._run_session(session, send))
+        await send(f'OK {name}')
+        if session.bot == BLACK:
+            session.queue.put_nowait((None, asyncio.get_running_loop().time() + self.deadline))
+
+    async def _cmd_play(self, sessions: Dict[str, Session], send, name: str, point: str) -> None:
+        session = sessions.get(name)
+        if session is None:
+            raise ValueError('unknown session')
+        # Срок отсчитывается с получения команды: ожидание в очереди партии тоже входит в него
+        deadline = asyncio.get_running_loop().time() + self.deadline
+        x, y = (int(part) for part in point.split(','))
+        if self.pool.overloaded or session.queue.full():
+            await send(f'BUSY {name}')
+            return
+        session.queue.put_nowait(((x, y), deadline))
+
+    async def _cmd_close(self, sessions: Dict[str, Session], send, name: str) -> None:
+        session = sessions.pop(name, None)
+        if session is None:
+            raise ValueError('unknown session')
+        self._close_session(session)
+        await send(f'OK {name}')
+
+    async def _cmd_stats(self, sessions: Dict[str, Session], send) -> None:
+        pool = self.pool
+        await send(f'STATS sessions={self.sessions} waiting={pool.waiting} moves={pool.moves} '
+                   f'fallbacks={pool.fallbacks}')
+
+    def _close_session(self, session: Session) -> None:
+        """
+        Останавливает задачу партии.
+        """
+        if session.task is not None and not session.task.done():
+            session.task.cancel()
+            self.sessions -= 1
+
+    async def _run_session(self, session: Session, send) -> None:
+        """
+        Задача партии: по очереди применяет ходы игрока и отвечает ходами бота.
+        Ход None в очереди означает «бот ходит без хода игрока» (первый ход чёрными).
+        """
+        engine = session.engine
+        name = session.name
+        while True:
+            move, deadline = await session.queue.get()
+            if session.over:
+                await send(f'ERROR {name} game over')
+                continue
+            if move is not None:
+                if engine.side_to_move != session.player:
+                    await send(f'ERROR {name} not your turn')
+                    continue
+                x, y = move
+                if not engine.is_legal(x, y, session.player):
+                    await send(f'ERROR {name} illegal move {x},{y}')
+                    continue
+                if engine.play(x, y, session.player):
+                    session.over = True
+                    await send(f'END {name} player')
+                    continue
+            try:
+                reply = await self.pool.think(engine, session.bot, deadline)
+            except Exception as error:  # сбой процесса движка не должен оставлять клиента без ответа
+                session.over = True
+                await send(f'ERROR {name} engine failure: {error!r}')
+                continue
+            if reply is None:
+                session.over = True
+                await send(f'END {name} draw')
+                continue
+            # На каждую команду один ответ: последний ход бота приходит вместе с итогом
+            point = f'{reply[0]},{reply[1]}'
+            if engine.play(reply[0], reply[1], session.bot):
+                session.over = True
+                await send(f'END {name} bot {point}')
+            elif not engine.position.empty:
+                session.over = True
+                await send(f'END {name} draw {point}')
+            else:
+                await send(f'MOVE {name} {point}')
+
+
+async def serve(host: str, port: int, workers: int, max_queue: int, move_time: float, deadline: float,
+                node_limit: Optional[int] = None) -> None:
+    """
+    Запускает сервер и обслуживает соединения до остановки процесса.
+    """
+    pool = EnginePool(workers, max_queue, move_time, node_limit)
+    server = GameServer(pool, deadline)
+    listener = await asyncio.start_server(server.handle_connection, host, port, limit=1 << 16)
+    print(f'Сервер слушает {host}:{port}: {workers} процессов движка, очередь {max_queue}', flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        pool.close()
+
+
+def main() -> None:
+    """
+    Консольная точка входа сервера.
+    """
+    parser = argparse.ArgumentParser(description='Сервер партий с ботом по текстовому протоколу.')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес')
+    parser.add_argument('--port', type=int, default=7777, help='Порт')
+    parser.add_argument('--workers', type=int, default=None, help='Процессов движка (по умолчанию — все ядра)')
+    parser.add_argument('--queue', type=int, default=256, help='Сколько ходов может ждать движка')
+    parser.add_argument('--move-time', type=float, default=0.2, help='Время поиска хода в секундах')
+    parser.add_argument('--deadline', type=float, default=1.0, help='Срок ответа на ход в секундах')
+    parser.add_argument('--nodes', type=int, default=None, help='Лимит узлов на ход')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers or os.cpu_count() or 1, args.queue,
+                          args.move_time, args.deadline, args.nodes))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import json
+import time
+from typing import Any, Dict, Optional, TextIO
+
+# Журнал статистики по умолчанию: одна JSON-запись на строку
+DEFAULT_LOG = 'setting/stats.jsonl'
+
+
+class Stats:
+    def __init__(self) -> None:
+        """
+        Счётчики и таймеры движка и интерфейса.
+
+        Значения группируются по видам: 'engine' — один ход бота (узлы, попадания в таблицу
+        транспозиций, отсечения, глубина, время фаз), 'frame' — один кадр окна (время кадра,
+        число blit, время обработки событий). Для каждого значения хранятся последнее
+        и сумма, а каждая запись может дописываться строкой JSON в журнал.
+
+        Пока статистика выключена, места измерений проверяют только флаг enabled
+        и ничего не считают, поэтому выключенная статистика ничего не стоит.
+        """
+        self.enabled: bool = False
+        self.last: Dict[str, Dict[str, float]] = {}
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.counts: Dict[str, int] = {}
+        self._log: Optional[TextIO] = None
+
+    def enable(self, log_path: Optional[str] = None) -> None:
+        """
+        Включает сбор статистики.
+
+        Параметры:
+        log_path (str): Файл журнала, в который дописываются записи, или None без журнала.
+        """
+        self.enabled = True
+        if log_path is not None and self._log is None:
+            self._log = open(log_path, 'a', encoding='utf-8')
+
+    def disable(self) -> None:
+        """
+        Выключает сбор статистики и закрывает журнал. Накопленные значения сохраняются.
+        """
+        self.enabled = False
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def record(self, kind: str, values: Dict[str, float]) -> None:
+        """
+        Запоминает одну запись вида kind и дописывает её в журнал.
+
+        Параметры:
+        kind (str): Вид записи ('engine', 'frame').
+        values (dict): Значения записи; нечисловые (например, фаза хода) только запоминаются.
+        """
+        self.last[kind] = dict(values)
+        totals = self.totals.setdefault(kind, {})
+        for name, value in values.items():
+            if isinstance(value, (int, float)):
+                totals[name] = totals.get(name, 0) + value
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if self._log is not None:
+            self._log.write(json.dumps({'time': time.time(), 'kind': kind, **values}) + '\n')
+            self._log.flush()
+
+    def mean(self, kind: str, name: str) -> float:
+        """
+        Среднее значение name по всем записям вида kind (0, если записей нет).
+        """
+        count = self.counts.get(kind, 0)
+        return self.totals.get(kind, {}).get(name, 0) / count if count else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Копия всей статистики: {'last': ..., 'totals': ..., 'counts': ...}.
+        """
+        return {'last': {kind: dict(values) for kind, values in self.last.items()},
+                'totals': {kind: dict(values) for kind, values in self.totals.items()},
+                'counts': dict(self.counts)}
+
+    def reset(self) -> None:
+        """
+        Обнуляет накопленные значения.
+        """
+        self.last.clear()
+        self.totals.clear()
+        self.counts.clear()
+
+
+_shared_stats: Optional[Stats] = None
+
+
+def shared_stats() -> Stats:
+    """
+    Возвращает общую для процесса статистику, создавая её при первом обращении.
+    """
+    global _shared_stats
+    if _shared_stats is None:
+        _shared_stats = Stats()
+    return _shared_stats
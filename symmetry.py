@@ -0,0 +1,145 @@
+from typing import Dict, List, Tuple
+
+from position import Position, zobrist_keys
+
+# Число симметрий квадратного поля: 4 поворота и 4 отражения
+SYMMETRIES = 8
+IDENTITY = 0
+
+_INDEX_MAPS: Dict[int, Tuple[List[List[int]], List[List[int]]]] = {}
+_SYMMETRIC_KEYS: Dict[int, List[List[Tuple[int, ...]]]] = {}
+
+
+def transform(x: int, y: int, size: int, symmetry: int) -> Tuple[int, int]:
+    """
+    Применяет к клетке одну из 8 симметрий квадратного поля.
+
+    Биты номера симметрии: 1 — отражение по горизонтали, 2 — по вертикали,
+    4 — транспонирование (выполняется первым).
+    """
+    if symmetry & 4:
+        x, y = y, x
+    if symmetry & 1:
+        x = size - 1 - x
+    if symmetry & 2:
+        y = size - 1 - y
+    return x, y
+
+
+def inverse(x: int, y: int, size: int, symmetry: int) -> Tuple[int, int]:
+    """
+    Обратное к transform преобразование клетки.
+    """
+    if symmetry & 2:
+        y = size - 1 - y
+    if symmetry & 1:
+        x = size - 1 - x
+    if symmetry & 4:
+        x, y = y, x
+    return x, y
+
+
+def index_maps(size: int) -> Tuple[List[List[int]], List[List[int]]]:
+    """
+    Таблицы перевода номеров битов под действием симметрий для поля заданного размера.
+
+    Возвращает:
+    tuple: (forward, backward), где forward[s][index] — номер бита клетки после симметрии s,
+           backward[s] — обратная таблица. Биты защитного столбца переходят сами в себя.
+    """
+    if size not in _INDEX_MAPS:
+        stride = size + 1
+        cells = size * stride
+        forward = [list(range(cells)) for _ in range(SYMMETRIES)]
+        backward = [list(range(cells)) for _ in range(SYMMETRIES)]
+        for symmetry in range(SYMMETRIES):
+            for y in range(size):
+                for x in range(size):
+                    tx, ty = transform(x, y, size, symmetry)
+                    forward[symmetry][y * stride + x] = ty * stride + tx
+                    backward[symmetry][ty * stride + tx] = y * stride + x
+        _INDEX_MAPS[size] = forward, backward
+    return _INDEX_MAPS[size]
+
+
+def symmetric_keys(size: int) -> List[List[Tuple[int, ...]]]:
+    """
+    Ключи Zobrist клетки во всех 8 ориентациях: keys[color][index][s] — ключ образа клетки
+    index под симметрией s. Элемент s = IDENTITY совпадает с обычным ключом позиции.
+    """
+    if size not in _SYMMETRIC_KEYS:
+        keys = zobrist_keys(size)
+        forward, _ = index_maps(size)
+        _SYMMETRIC_KEYS[size] = [[tuple(color_keys[forward[s][index]] for s in range(SYMMETRIES))
+                                  for index in range(len(color_keys))] for color_keys in keys]
+    return _SYMMETRIC_KEYS[size]
+
+
+def canonical(position: Position) -> Tuple[int, int]:
+    """
+    Канонический ключ позиции, посчитанный заново по всем фишкам.
+
+    Возвращает:
+    tuple: (наименьший из хешей восьми образов позиции, номер симметрии, дающей этот хеш).
+    """
+    keys = symmetric_keys(position.size)
+    hashes = [0] * SYMMETRIES
+    for index, color in position.history:
+        hashes = [h ^ k for h, k in zip(hashes, keys[color][index])]
+    key = min(hashes)
+    return key, hashes.index(key)
+
+
+class SymmetricHash:
+    def __init__(self, position: Position) -> None:
+        """
+        Хеши Zobrist позиции во всех 8 ориентациях, обновляемые при каждом ходе.
+
+        Ход меняет каждый хеш одним XOR с заранее посчитанным ключом образа клетки,
+        поэтому канонический ключ — наименьший из восьми — не требует перебора фишек.
+        Кэши, хранящие ходы, переводят их в каноническую ориентацию через to_canonical
+        при записи и обратно через from_canonical при чтении и так получают попадания
+        в симметричных позициях.
+
+        Параметры:
+        position (Position): Позиция, за которой следят хеши.
+        """
+        self.position: Position = position
+        self.keys: List[List[Tuple[int, ...]]] = symmetric_keys(position.size)
+        self.forward, self.backward = index_maps(position.size)
+        self.hashes: List[int] = [0] * SYMMETRIES
+        for index, color in position.history:
+            self.update(index, color)
+        position.listeners.append(self.update)
+
+    def detach(self) -> None:
+        """
+        Отписывает хеши от позиции.
+        """
+        self.position.listeners.remove(self.update)
+
+    def update(self, index: int, color: int) -> None:
+        """
+        Обновляет хеши после постановки или отмены хода (XOR симметричен).
+        """
+        self.hashes = [h ^ k for h, k in zip(self.hashes, self.keys[color][index])]
+
+    def canonical(self) -> Tuple[int, int]:
+        """
+        Канонический ключ и номер симметрии, переводящей позицию в каноническую ориентацию.
+        """
+        hashes = self.hashes
+        key = min(hashes)
+        return key, hashes.index(key)
+
+    def to_canonical(self, index: int, symmetry: int) -> int:
+        """
+        Переводит номер бита хода из ориентации позиции в каноническую (-1 остаётся -1).
+        """
+        return self.forward[symmetry][index] if index >= 0 else index
+
+    def from_canonical(self, index: int, symmetry: int) -> int:
+        """
+        Переводит номер бита хода из канонической ориентации в ориентацию позиции (-1 остаётся -1).
+        """
+        return self.backward[symmetry][index] if index >= 0 else index
@@ -0,0 +1,26 @@
+import random
+
+from arena import MatchStats
+from position import Position, BLACK, WHITE
+from robot_logic import original_move
+
+
+def test_clean_sweep_reaches_decision():
+    stats = MatchStats()
+    for _ in range(200):
+        stats.add(1.0)
+        if stats.decision():
+            break
+    assert stats.variance() > 0
+    assert stats.decision() == 'H1'
+
+
+def test_original_move_cascade():
+    position = Position(15, True)
+    for x in range(4):
+        position.place(3 + x, 7, WHITE)
+    position.place(7, 0, BLACK)
+    # Четвёрка соперника блокируется раньше хода рядом со своими фишками
+    assert original_move(position, BLACK, random.Random(0)) in ((2, 7), (7, 7))
+    position.place(2, 7, BLACK)
+    assert original_move(position, WHITE, random.Random(0)) == (7, 7)
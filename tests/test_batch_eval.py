@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+from line_table import LineEvaluator
+from position import BLACK, WHITE, Position
+
+# Без NumPy векторной оценки нет, и сверять нечего
+batch_eval = pytest.importorskip('batch_eval')
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_maps_match_line_evaluator(seed: int):
+    rng = random.Random(seed)
+    size = 15
+    position = Position(size)
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    for i, (x, y) in enumerate(rng.sample(cells, rng.randrange(1, size * size // 3))):
+        position.place(x, y, BLACK if i % 2 == 0 else WHITE)
+    evaluator = LineEvaluator(position)
+    try:
+        for color in (BLACK, WHITE):
+            scores, classes = batch_eval.score_map(position, color), batch_eval.class_map(position, color)
+            for x, y in cells:
+                index = position.bit(x, y)
+                assert scores[y, x] == evaluator.score(index, color), (x, y, color)
+                assert classes[y, x] == evaluator.move_class(index, color), (x, y, color)
+    finally:
+        evaluator.detach()
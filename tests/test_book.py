@@ -0,0 +1,37 @@
+from book import OpeningBook, build_from_records
+from position import BLACK, WHITE, Position
+
+# Последний ход чёрных (7, 7) — двойная тройка, запрещённая в рэндзю
+GAME = [(7, 5), (0, 0), (7, 6), (14, 0), (5, 7), (0, 14), (6, 7), (14, 14), (7, 7)]
+
+
+def position_before_last(renju: bool) -> Position:
+    position = Position(15, renju)
+    for i, (x, y) in enumerate(GAME[:-1]):
+        position.place(x, y, BLACK if i % 2 == 0 else WHITE)
+    return position
+
+
+def open_book(tmp_path, renju: bool) -> OpeningBook:
+    path = str(tmp_path / f'book{int(renju)}.bin')
+    build_from_records(path, [(GAME, BLACK)], renju=renju)
+    return OpeningBook(path)
+
+
+def test_book_skips_forbidden_moves(tmp_path):
+    book = open_book(tmp_path, True)
+    try:
+        assert book.renju
+        assert book.choose(position_before_last(True)) is None
+    finally:
+        book.close()
+
+
+def test_book_answers_only_for_its_rules(tmp_path):
+    book = open_book(tmp_path, False)
+    try:
+        assert not book.renju
+        assert book.choose(position_before_last(False)) == (7, 7)
+        assert book.moves(position_before_last(True)) == []
+    finally:
+        book.close()
@@ -0,0 +1,30 @@
+from position import BLACK, WHITE, Position
+from renju import ForbiddenDetector
+from robot_logic import select_move
+from search import SearchBudget
+from threat_search import find_forced_move
+
+
+def lost_position() -> Position:
+    """
+    Белые ставят пятёрку в (7, 7), а для чёрных эта клетка — запрещённая двойная тройка.
+    """
+    position = Position(15, True)
+    for black, white in zip([(5, 7), (6, 7), (7, 5), (7, 6), (2, 2)], [(3, 3), (4, 4), (5, 5), (6, 6), (0, 14)]):
+        position.place(*black, BLACK)
+        position.place(*white, WHITE)
+    return position
+
+
+def test_forbidden_block_is_not_returned():
+    position = lost_position()
+    assert ForbiddenDetector(position).is_forbidden(7, 7)
+    assert find_forced_move(position, BLACK, time_limit=0.5) is None
+
+
+def test_select_move_plays_legal_move_for_black():
+    position = lost_position()
+    move = select_move(position, BLACK, SearchBudget(0.5), use_book=False)
+    assert move is not None
+    assert position.is_empty(*move)
+    assert not ForbiddenDetector(position).is_forbidden(*move)
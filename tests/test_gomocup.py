@@ -0,0 +1,33 @@
+import io
+
+from gomocup import GomocupProtocol
+from position import WHITE, Position
+
+
+def run(*lines: str) -> list:
+    output = io.StringIO()
+    protocol = GomocupProtocol(output)
+    for line in lines:
+        protocol.handle(line)
+    return output.getvalue().split('\n')[:-1]
+
+
+def test_board_rejects_occupied_cells():
+    replies = run('START 15', 'INFO timeout_turn 0', 'BOARD', '7,7,1', '7,7,2', '7,7', '8,8,2', 'DONE')
+    assert replies[:3] == ['OK', 'ERROR occupied cell 7,7', 'ERROR invalid board line 7,7']
+    assert len(replies) == 4 and not replies[3].startswith('ERROR')
+
+
+def test_exact_five_rule():
+    protocol = GomocupProtocol(io.StringIO())
+    protocol.handle('INFO rule 1')
+    protocol.handle('START 15')
+    position = protocol.engine.position
+    assert position.exact and not position.renju
+    for x in (0, 1, 2, 3, 5, 4):
+        position.place(x, 0, WHITE)
+    assert not position.is_win_at(4, 0, WHITE)
+    free = Position(15, False)
+    for x in (0, 1, 2, 3, 5, 4):
+        free.place(x, 0, WHITE)
+    assert free.is_win_at(4, 0, WHITE)
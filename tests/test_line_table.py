@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from line_table import (CLASS_SCORES, OFFSETS, RADIUS, TABLE_CLASS, TABLE_SCORE, TABLE_SIZE, WINDOW,
+                        LineEvaluator)
+from patterns import analyze_line
+from position import BLACK, DIRECTIONS, EMPTY, WHITE, Position, opponent
+
+
+def window_cells(code: int):
+    """
+    Окно из 2 * RADIUS + 1 клеток по коду: цифра 0 — пусто, 1 — чёрная, 2 — белая; в центре чёрная.
+    """
+    cells = [(EMPTY, BLACK, WHITE)[code // 3 ** j % 3] for j in range(WINDOW)]
+    return cells[:RADIUS] + [BLACK] + cells[RADIUS:]
+
+
+def expected_score(cells, kind: int) -> int:
+    """
+    Оценка окна: класс линии плюс квадраты числа чёрных в каждой пятёрке без белых.
+    """
+    potential = sum(cells[start:start + 5].count(BLACK) ** 2
+                    for start in range(len(cells) - 4) if WHITE not in cells[start:start + 5])
+    return CLASS_SCORES[kind] + potential
+
+
+def test_table_matches_pattern_logic():
+    assert len(TABLE_CLASS) == len(TABLE_SCORE) == TABLE_SIZE
+    for code in range(TABLE_SIZE):
+        cells = window_cells(code)
+        kind = analyze_line(cells[:], BLACK)[0]
+        assert TABLE_CLASS[code] == kind, (code, cells)
+        assert TABLE_SCORE[code] == expected_score(cells, kind), (code, cells)
+
+
+def scratch_code(position: Position, x: int, y: int, d: int, color: int) -> int:
+    """
+    Код окна клетки (x, y) в направлении d для цвета color, посчитанный заново по полю.
+    """
+    dr, dc = DIRECTIONS[d]
+    code = 0
+    for j, k in enumerate(OFFSETS):
+        qx, qy = x + dc * k, y + dr * k
+        if not position.inside(qx, qy):
+            digit = 2
+        else:
+            stone = position.get(qx, qy)
+            digit = 0 if stone == EMPTY else 1 if stone == color else 2
+        code += digit * 3 ** j
+    return code
+
+
+def assert_codes_match(position: Position, evaluator: LineEvaluator) -> None:
+    for color in (BLACK, WHITE):
+        for d in range(len(DIRECTIONS)):
+            codes = evaluator.codes[color][d]
+            for y in range(position.size):
+                for x in range(position.size):
+                    assert codes[position.bit(x, y)] == scratch_code(position, x, y, d, color), (x, y, d, color)
+
+
+@pytest.mark.parametrize('size, seed', [(15, 1), (15, 2), (19, 3), (9, 4)])
+def test_incremental_codes_match_scratch(size: int, seed: int):
+    rng = random.Random(seed)
+    position = Position(size)
+    evaluator = LineEvaluator(position)
+    try:
+        color = BLACK
+        for step in range(120):
+            if position.history and rng.random() < 0.35:
+                position.undo()
+                color = opponent(color)
+            else:
+                free = list(position.iter_bits(position.empty))
+                if not free:
+                    break
+                x, y = rng.choice(free)
+                position.place(x, y, color)
+                color = opponent(color)
+            if step % 10 == 0:
+                assert_codes_match(position, evaluator)
+        assert_codes_match(position, evaluator)
+        while position.history:
+            position.undo()
+        assert_codes_match(position, evaluator)
+    finally:
+        evaluator.detach()
+
+
+def test_evaluator_built_on_existing_position():
+    rng = random.Random(5)
+    position = Position(15)
+    color = BLACK
+    for _ in range(40):
+        x, y = rng.choice(list(position.iter_bits(position.empty)))
+        position.place(x, y, color)
+        color = opponent(color)
+    evaluator = LineEvaluator(position)
+    try:
+        assert_codes_match(position, evaluator)
+    finally:
+        evaluator.detach()
@@ -0,0 +1,32 @@
+import pytest
+
+from records import GameRecord, RecordWriter, import_psq, import_renlib, read_records
+
+
+def test_long_russian_names_round_trip(tmp_path):
+    path = str(tmp_path / 'games.rjg')
+    with RecordWriter(path, 15) as writer:
+        writer.write(GameRecord([(7, 7), (8, 8)], black='Ж' * 200, white='Игрок'))
+    (_, record), = read_records(path)
+    assert record.black == 'Ж' * 127
+    assert record.white == 'Игрок'
+    assert record.moves == [(7, 7), (8, 8)]
+
+
+@pytest.mark.parametrize('moves', ['16,1,0', '0,1,0', '1,1,0\n1,1,0'])
+def test_import_psq_rejects_bad_moves(moves: str):
+    with pytest.raises(ValueError):
+        import_psq(f'Piskvorky 15x15, 11:11, 0\n{moves}\n-1\n')
+
+
+def test_import_renlib_rejects_bad_moves():
+    with pytest.raises(ValueError):
+        import_renlib('h8 p1')
+    with pytest.raises(ValueError):
+        import_renlib('h8 h8')
+
+
+def test_encode_rejects_moves_off_board(tmp_path):
+    with RecordWriter(str(tmp_path / 'games.rjg'), 15) as writer:
+        with pytest.raises(ValueError):
+            writer.write(GameRecord([(15, 0)]))
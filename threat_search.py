@@ -0,0 +1,296 @@
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from position import Position, BLACK, opponent
+from patterns import PatternTracker, OPEN_THREE
+from line_table import LineEvaluator
+from renju import ForbiddenDetector
+from symmetry import SymmetricHash
+
+
+class SolverTimeout(Exception):
+    """
+    Исключение, прерывающее поиск угроз при исчерпании лимита.
+    """
+
+
+class ThreatSolver:
+    def __init__(self, position: Position, time_limit: Optional[float] = 0.2, node_limit: Optional[int] = None,
+                 vcf_depth: int = 15, vct_depth: int = 7, stop: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Поиск выигрыша непрерывными угрозами: четвёрками (VCF) и любыми угрозами (VCT).
+
+        Атакующий перебирает только форсирующие ходы, а защищающийся — только ответы
+        на угрозу, поэтому в пределах лимитов находятся выигрыши длиной в десятки полуходов.
+        Доказанные и опровергнутые позиции запоминаются в собственном кэше по каноническому
+        ключу, так что симметричные варианты не доказываются заново.
+
+        Параметры:
+        position (Position): Позиция (не изменяется, поиск идёт на копии).
+        time_limit (float): Лимит времени одного запроса в секундах или None.
+        node_limit (int): Лимит числа узлов одного запроса или None.
+        vcf_depth (int): Максимальное число ходов атакующего в VCF.
+        vct_depth (int): Максимальное число ходов атакующего в VCT.
+        stop (callable): Функция, возвращающая True, если поиск нужно прервать (отмена извне).
+        """
+        self.position: Position = position.copy()
+        self.threats: PatternTracker = PatternTracker(self.position)
+        self.evaluator: LineEvaluator = LineEvaluator(self.position)
+        self.forbidden: ForbiddenDetector = ForbiddenDetector(self.position, self.evaluator)
+        self.symmetry: SymmetricHash = SymmetricHash(self.position)
+        self.time_limit: Optional[float] = time_limit
+        self.node_limit: Optional[int] = node_limit
+        self.vcf_depth: int = vcf_depth
+        self.vct_depth: int = vct_depth
+        self.stop: Optional[Callable[[], bool]] = stop
+        # (канонический ключ, цвет атакующего, вид поиска, глубина) -> выигрывающий ход
+        # в канонической ориентации или -1
+        self.cache: Dict[Tuple[int, int, int, int], int] = {}
+        self.nodes: int = 0
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+
+    def close(self) -> None:
+        """
+        Отписывает трекер и оценщик от рабочей копии позиции.
+        """
+        self.forbidden.detach()
+        self.threats.detach()
+        self.evaluator.detach()
+        self.symmetry.detach()
+
+    def vcf(self, color: int) -> Optional[Tuple[int, int]]:
+        """
+        Ищет выигрыш цвета color сплошными четвёрками.
+
+        Возвращает:
+        tuple или None: Первый ход выигрывающей последовательности или None.
+        """
+        return self._run(self._vcf, color, self.vcf_depth)
+
+    def vct(self, color: int) -> Optional[Tuple[int, int]]:
+        """
+        Ищет выигрыш цвета color непрерывными угрозами (четвёрками и открытыми тройками).
+
+        Возвращает:
+        tuple или None: Первый ход выигрывающей последовательности или None.
+        """
+        return self._run(self._vct, color, self.vct_depth)
+
+    def _run(self, solver, color: int, depth: int) -> Optional[Tuple[int, int]]:
+        """
+        Запускает поиск с лимитами и переводит результат в координаты.
+        """
+        self._deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        self._node_limit = self.nodes + self.node_limit if self.node_limit is not None else None
+        try:
+            move = solver(color, depth)
+        except SolverTimeout:
+            return None
+        return self.position.coords(move) if move >= 0 else None
+
+    def block(self, color: int) -> Optional[Tuple[int, int]]:
+        """
+        Первая клетка выигрыша соперника (VCF, затем VCT), которую может занять цвет color,
+        или None, если выигрыша нет или клетка для color запрещена.
+        """
+        move = self.vcf(opponent(color)) or self.vct(opponent(color))
+        if move is None or not self._legal(self.position.bit(*move), color):
+            return None
+        return move
+
+    def _tick(self) -> None:
+        """
+        Считает узел и проверяет лимиты.
+        """
+        self.nodes += 1
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise SolverTimeout()
+        # Узел поиска угроз дорогой (до миллисекунды), поэтому лимиты проверяются часто
+        if not self.nodes & 7:
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                raise SolverTimeout()
+            if self.stop is not None and self.stop():
+                raise SolverTimeout()
+
+    def _attacks(self, color: int, threes: bool) -> Iterator[int]:
+        """
+        Форсирующие ходы атакующего: четвёрки и, если нужно, ходы, создающие открытую тройку.
+
+        Если у соперника есть победная клетка, атакующий обязан её закрыть, и ход годится
+        только тогда, когда он сам является угрозой.
+        """
+        threats = self.threats
+        fours = threats.fours[color]
+        forced = threats.wins[opponent(color)]
+        legal = self._legal
+        if forced:
+            if len(forced) == 1:
+                block = next(iter(forced))
+                if (block in fours or (threes and self.evaluator.move_class(block, color) <= OPEN_THREE)) \
+                        and legal(block, color):
+                    yield block
+            return
+        yield from (m for m in sorted(fours, key=lambda m: -fours[m]) if legal(m, color))
+        if threes:
+            yield from (m for m in self._three_moves(color) if m not in fours and legal(m, color))
+
+    def _legal(self, move: int, color: int) -> bool:
+        """
+        Проверяет, не запрещён ли ход по правилам рэндзю.
+        """
+        return color != BLACK or not self.forbidden.is_forbidden_index(move)
+
+    def _three_moves(self, color: int) -> Iterator[int]:
+        """
+        Ходы, после которых у цвета появляется открытая тройка, по табличной классификации.
+        """
+        move_class = self.evaluator.move_class
+        for move in sorted(self.position.candidates):
+            if move_class(move, color) == OPEN_THREE:
+                yield move
+
+    def _vcf(self, color: int, depth: int) -> int:
+        """
+        Рекурсивный VCF: атакующий ставит четвёрку, защищающийся закрывает её.
+
+        Возвращает:
+        int: Номер бита первого хода выигрыша или -1.
+        """
+        return self._attack(color, depth, threes=False)
+
+    def _vct(self, color: int, depth: int) -> int:
+        """
+        Рекурсивный VCT: атакующий ставит четвёрки и открытые тройки.
+
+        Глубина наращивается постепенно, чтобы короткие выигрыши находились первыми.
+
+        Возвращает:
+        int: Номер бита первого хода выигрыша или -1.
+        """
+        for limit in range(1, depth + 1):
+            move = self._attack(color, limit, threes=True)
+            if move >= 0:
+                return move
+        return -1
+
+    def _attack(self, color: int, depth: int, threes: bool) -> int:
+        """
+        Узел атакующего: выигрыш, если хотя бы один форсирующий ход ведёт к выигрышу.
+        """
+        threats = self.threats
+        wins = threats.wins[color]
+        if wins:
+            return min(wins)
+        other = opponent(color)
+        if not threats.wins[other]:
+            # Открытая четвёрка выигрывает сразу
+            for move in sorted(threats.straight[color]):
+                if self._legal(move, color):
+                    return move
+        if depth <= 0:
+            return -1
+        symmetry = self.symmetry
+        canonical_key, orientation = symmetry.canonical()
+        key = (canonical_key, color, threes, depth)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return symmetry.from_canonical(cached, orientation)
+        self._tick()
+
+        if threes:
+            result = self._attack(color, self.vcf_depth, threes=False)
+            if result >= 0:
+                self.cache[key] = symmetry.to_canonical(result, orientation)
+                return result
+
+        position = self.position
+        stride = position.stride
+        result = -1
+        for move in self._attacks(color, threes):
+            position.place(move % stride, move // stride, color)
+            if self._defended(color, other, depth, threes):
+                position.undo()
+                continue
+            position.undo()
+            result = move
+            break
+        self.cache[key] = symmetry.to_canonical(result, orientation)
+        return result
+
+    def _defended(self, color: int, other: int, depth: int, threes: bool) -> bool:
+        """
+        Узел защищающегося после хода атакующего: True, если есть защита.
+        """
+        threats = self.threats
+        position = self.position
+        stride = position.stride
+        wins = threats.wins[color]
+        if len(wins) >= 2:
+            return False
+        if wins:
+            replies = list(wins)
+        else:
+            if not threes or not threats.straight[color]:
+                return True
+            # Против тройки у защищающегося свободный ход: ищем у него контратаку четвёрками
+            if self._attack(other, self.vcf_depth, threes=False) >= 0:
+                return True
+            replies = set(threats.straight[color]) | set(threats.fours[color]) | set(threats.fours[other])
+        if other == BLACK:
+            # Если все защиты чёрных запрещены, защиты нет
+            replies = [reply for reply in replies if self._legal(reply, other)]
+        for reply in replies:
+            position.place(reply % stride, reply // stride, other)
+            # Если защищающийся ответил четвёркой, _attacks оставит атакующему только её закрытие
+            won = not threats.has_five(other) and self._attack(color, depth - 1, threes) >= 0
+            position.undo()
+            if not won:
+                return True
+        return False
+
+
+def find_forced_move(position: Position, color: int, time_limit: Optional[float] = 0.1,
+                     node_limit: Optional[int] = None,
+                     stop: Optional[Callable[[], bool]] = None,
+                     stats: Optional[Dict[str, float]] = None) -> Optional[Tuple[int, int]]:
+    """
+    Ищет ход по форсированным вариантам для цвета color.
+
+    Сначала ищется собственный выигрыш (VCF, затем VCT). Если его нет, ищется выигрыш
+    соперника, и возвращается первая клетка его последовательности, чтобы занять её.
+    Если занять её нельзя (для чёрных она запрещена по правилам рэндзю), возвращается None,
+    и ход выбирает обычный поиск, который запрещённых ходов не предлагает.
+
+    Параметры:
+    position (Position): Текущая позиция (не изменяется).
+    color (int): Цвет, за который ищется ход.
+    time_limit (float): Лимит времени на каждый из четырёх поисков в секундах или None.
+    node_limit (int): Лимит узлов на каждый из четырёх поисков или None.
+    stop (callable): Функция, возвращающая True, если поиск нужно прервать.
+    stats (dict): Словарь, в который записываются время поиска своего выигрыша (win_time),
+                  выигрыша соперника (block_time), число узлов (threat_nodes) и, если ход
+                  найден, фаза ('win' или 'block'), или None.
+
+    Возвращает:
+    tuple или None: Ход или None, если форсированных вариантов не найдено.
+    """
+    solver = ThreatSolver(position, time_limit=time_limit, node_limit=node_limit, stop=stop)
+    try:
+        if stats is None:
+            return solver.vcf(color) or solver.vct(color) or solver.block(color)
+        start = time.perf_counter()
+        move = solver.vcf(color) or solver.vct(color)
+        middle = time.perf_counter()
+        stats['win_time'], stats['block_time'] = middle - start, 0.0
+        if move is not None:
+            stats['phase'] = 'win'
+        else:
+            move = solver.block(color)
+            stats['block_time'] = time.perf_counter() - middle
+            if move is not None:
+                stats['phase'] = 'block'
+        stats['threat_nodes'] = solver.nodes
+        return move
+    finally:
+        solver.close()
@@ -0,0 +1,134 @@
+from typing import Callable, Optional, Tuple
+
+from patterns import PatternTracker
+from position import Position, opponent
+from search import SearchBudget
+
+# Доли базового времени хода по характеру позиции
+FORCED = 'forced'
+QUIET = 'quiet'
+CRITICAL = 'critical'
+_TIME_SHARES = {FORCED: 0.05, QUIET: 1.0, CRITICAL: 1.5}
+# Во сколько раз жёсткий лимит может превышать базовое время при игре на часах
+_HARD_FACTOR = 3.0
+# Какую часть оставшегося на часах времени можно потратить на один ход
+_MAX_CLOCK_SHARE = 0.25
+
+
+def criticality(position: Position, color: int) -> str:
+    """
+    Характер позиции для распределения времени хода цвета color.
+
+    Возвращает:
+    str: FORCED — у кого-то есть четвёрка (ход вынужден: выиграть или закрыть),
+         CRITICAL — есть открытые тройки или у обеих сторон есть четвёрки в один ход,
+         QUIET — угроз нет.
+    """
+    threats = PatternTracker(position)
+    try:
+        other = opponent(color)
+        if threats.wins[color] or threats.wins[other]:
+            return FORCED
+        if threats.straight[color] or threats.straight[other] or (threats.fours[color] and threats.fours[other]):
+            return CRITICAL
+        return QUIET
+    finally:
+        threats.detach()
+
+
+class TimeManager:
+    def __init__(self, move_time: Optional[float] = 1.0, time_left: Optional[float] = None, increment: float = 0.0,
+                 moves_to_go: int = 25, node_limit: Optional[int] = None, max_depth: int = 20,
+                 threads: int = 1) -> None:
+        """
+        Распределение времени на ход по лимиту хода или по часам партии.
+
+        Базовое время хода — половина лимита хода, а при игре на часах — оставшееся время,
+        делённое на moves_to_go, плюс добавка. Оно умножается на долю по характеру позиции
+        (criticality): почти ноль для вынужденных ходов, больше базового при угрозах.
+        Получившийся мягкий лимит Searcher ещё удваивает, пока лучший ход меняется между
+        итерациями, и сокращает, когда он устойчив. Жёсткий лимит не больше лимита хода
+        и четверти оставшегося на часах времени.
+
+        Параметры:
+        move_time (float): Лимит на один ход в секундах или None.
+        time_left (float): Оставшееся на часах время в секундах или None без часов.
+        increment (float): Добавка времени за ход.
+        moves_to_go (int): На сколько ходов вперёд рассчитывать оставшееся время.
+        node_limit (int): Лимит узлов на ход или None.
+        max_depth (int): Максимальная глубина поиска.
+        threads (int): Число процессов поиска.
+        """
+        self.move_time: Optional[float] = move_time
+        self.time_left: Optional[float] = time_left
+        self.increment: float = increment
+        self.moves_to_go: int = moves_to_go
+        self.node_limit: Optional[int] = node_limit
+        self.max_depth: int = max_depth
+        self.threads: int = threads
+
+    def limits(self, kind: str) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Мягкий и жёсткий лимиты времени для позиции характера kind (None — без ограничения).
+        """
+        if self.time_left is None:
+            if self.move_time is None:
+                return None, None
+            return self.move_time * 0.5 * _TIME_SHARES[kind], self.move_time
+        base = self.time_left / self.moves_to_go + self.increment
+        hard = min(base * _HARD_FACTOR, self.time_left * _MAX_CLOCK_SHARE)
+        if self.move_time is not None:
+            hard = min(hard, self.move_time)
+            base = min(base, self.move_time)
+        return min(base * _TIME_SHARES[kind], hard), hard
+
+    def budget(self, position: Position, color: int, stop: Optional[Callable[[], bool]] = None) -> SearchBudget:
+        """
+        Бюджет хода цвета color в позиции position.
+        """
+        soft, hard = self.limits(criticality(position, color))
+        return SearchBudget(hard, self.node_limit, self.max_depth, stop=stop, threads=self.threads, soft_limit=soft)
+
+
+class Difficulty:
+    def __init__(self, name: str, move_time: float, node_limit: Optional[int], max_depth: int) -> None:
+        """
+        Уровень сложности бота: одна и та же логика с разным бюджетом поиска.
+        Слабые уровни поэтому и дешевле в обслуживании.
+
+        Параметры:
+        name (str): Название уровня на экране настроек.
+        move_time (float): Лимит времени на ход в секундах.
+        node_limit (int): Лимит узлов на ход или None.
+        max_depth (int): Максимальная глубина поиска.
+        """
+        self.name: str = name
+        self.move_time: float = move_time
+        self.node_limit: Optional[int] = node_limit
+        self.max_depth: int = max_depth
+
+    def time_manager(self, threads: int = 1) -> TimeManager:
+        """
+        Распределение времени для этого уровня.
+        """
+        return TimeManager(self.move_time, node_limit=self.node_limit, max_depth=self.max_depth, threads=threads)
+
+
+DIFFICULTIES: Tuple[Difficulty, ...] = (
+    Difficulty('Новичок', 0.05, 300, 2),
+    Difficulty('Любитель', 0.25, 4000, 4),
+    Difficulty('Мастер', 1.0, None, 20),
+    Difficulty('Гроссмейстер', 3.0, None, 20),
+)
+# Уровень по умолчанию совпадает с прежним ботом: одна секунда на ход
+DEFAULT_DIFFICULTY = DIFFICULTIES[2]
+
+
+def difficulty_by_name(name: str) -> Difficulty:
+    """
+    Уровень сложности по названию (DEFAULT_DIFFICULTY для неизвестного названия).
+    """
+    for difficulty in DIFFICULTIES:
+        if difficulty.name == name:
+            return difficulty
+    return DEFAULT_DIFFICULTY
@@ -1,7 +1,13 @@
 import ctypes
 import pygame
+from assets import AssetCache, shared_cache
 from button import Button
-from typing import Optional, Tuple, Callable, Dict
+from typing import Optional, Tuple, Callable, Dict, List
+
+# Частота кадров, пока что-то анимируется (бот думает); в покое окно ждёт событий
+FPS = 30
+# Сторона ячейки пространственного индекса кнопок (равна клетке игрового поля)
+INDEX_CELL = 40
 
 
 class Window:
@@ -9,6 +15,9 @@ class Window:
         """
         Инициализирует окно Pygame с заданными параметрами.
 
+        Окно дисплея одно на всю программу: pygame инициализируется при создании первого
+        экрана, а следующие экраны только меняют размер, заголовок и иконку существующего окна.
+
         Параметры:
         icon (str): Путь к изображению иконки окна.
         width (int): Ширина окна в пикселях.
@@ -16,14 +25,33 @@ class Window:
         background (str): Путь к изображению фона.
         caption (str): Заголовок окна.
         """
-        pygame.init()
-        self.screen: pygame.Surface = pygame.display.set_mode((width, height), 0, 32)
+        first = not pygame.get_init() or pygame.display.get_surface() is None
+        if first:
+            pygame.init()
+            ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(icon)
+        screen = pygame.display.get_surface()
+        if screen is None or screen.get_size() != (width, height):
+            screen = pygame.display.set_mode((width, height), 0, 32)
+        self.screen: pygame.Surface = screen
         pygame.display.set_caption(caption)
-        self.background: pygame.Surface = pygame.image.load(background).convert()
-        pygame.display.set_icon(pygame.image.load(icon))
-        ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(icon)
+        self.assets: AssetCache = shared_cache()
+        if first:
+            self.assets.preload()
+        self.background: pygame.Surface = self.assets.image(background, alpha=False)
+        pygame.display.set_icon(self.assets.image(icon))
         self.buttons: Dict[Tuple[int, int], Button] = {}
+        # Равномерная сетка: ячейка -> кнопки, пересекающие её, в порядке добавления
+        self._index: Dict[Tuple[int, int], List[Button]] = {}
+        self._order: Dict[Button, int] = {}
+        self._hovered: List[Button] = []
         self.running: bool = True
+        # Постоянные изображения поверх кнопок: ключ -> (изображение, позиция)
+        self.figures: Dict[str, Tuple[pygame.Surface, Tuple[int, int]]] = {}
+        self._dirty: List[pygame.Rect] = []
+        self._full_redraw: bool = True
+        # Число изображений, выведенных последним render (для статистики кадров)
+        self.blits: int = 0
+        self._clock: pygame.time.Clock = pygame.time.Clock()
 
     def add_button(self, x: int, y: int, width: int, height: int, size: int, color: Tuple[int, int, int],
                    hover_color: Tuple[int, int, int], function: Callable[[Optional[Tuple]], None],
@@ -34,28 +62,143 @@ class Window:
         """
         button = Button(x, y, width, height, size, color, hover_color,
                         function, on_close, args, is_transparent, obj, text)
-        self.buttons.setdefault(button.get_pos, button)
+        if button.get_pos in self.buttons:
+            return
+        self.buttons[button.get_pos] = button
+        self._order[button] = len(self._order)
+        for cell in self._cells(button.rect):
+            self._index.setdefault(cell, []).append(button)
+
+    @staticmethod
+    def _cells(rect: pygame.Rect) -> List[Tuple[int, int]]:
+        """
+        Ячейки индекса, которые пересекает прямоугольник.
+        """
+        return [(cx, cy)
+                for cx in range(rect.left // INDEX_CELL, (rect.right - 1) // INDEX_CELL + 1)
+                for cy in range(rect.top // INDEX_CELL, (rect.bottom - 1) // INDEX_CELL + 1)]
+
+    def buttons_at(self, pos: Tuple[int, int]) -> List[Button]:
+        """
+        Кнопки под точкой pos: проверяются только кнопки из одной ячейки индекса.
+        """
+        bucket = self._index.get((pos[0] // INDEX_CELL, pos[1] // INDEX_CELL), ())
+        return [button for button in bucket if button.rect.collidepoint(pos)]
+
+    def buttons_in(self, rect: pygame.Rect) -> List[Button]:
+        """
+        Кнопки, пересекающие прямоугольник, в порядке добавления (порядке отрисовки).
+        """
+        found = {button for cell in self._cells(rect) for button in self._index.get(cell, ())
+                 if button.rect.colliderect(rect)}
+        return sorted(found, key=self._order.__getitem__)
 
     def update_buttons(self, pos: Tuple[int, int]) -> None:
         """
         Обновляет состояние кнопок в зависимости от позиции мыши.
-        """
-        for button in self.buttons.values():
-            button.update(pos)
+
+        Кнопки под курсором находятся по индексу, а меняются и перерисовываются только те,
+        на которые курсор вошёл или с которых ушёл.
+        """
+        hovered = self.buttons_at(pos)
+        for button in self._hovered:
+            if button not in hovered:
+                button.is_hovered = False
+                self.invalidate(button.rect)
+        for button in hovered:
+            if not button.is_hovered:
+                button.is_hovered = True
+                self.invalidate(button.rect)
+        self._hovered = hovered
 
     def change_background(self, theme: pygame.Surface) -> None:
         """
         Изменяет фоновое изображение окна.
         """
         self.background = theme
+        self.invalidate()
+
+    def invalidate(self, rect: Optional[pygame.Rect] = None) -> None:
+        """
+        Отмечает область для перерисовки в следующем render (None — всё окно).
+        """
+        if rect is None:
+            self._full_redraw = True
+        else:
+            self._dirty.append(pygame.Rect(rect))
+
+    def set_figure(self, key: str, figure: pygame.Surface, x: int, y: int) -> None:
+        """
+        Показывает постоянное изображение поверх кнопок (заменяет прежнее с тем же ключом).
+        """
+        self.remove_figure(key)
+        self.figures[key] = (figure, (x, y))
+        self.invalidate(figure.get_rect(topleft=(x, y)))
 
-    def draw_interface(self, x_screen: int, y_screen: int) -> None:
+    def remove_figure(self, key: str) -> None:
+        """
+        Убирает постоянное изображение, если оно показано.
+        """
+        if key in self.figures:
+            figure, pos = self.figures.pop(key)
+            self.invalidate(figure.get_rect(topleft=pos))
+
+    def render(self) -> None:
+        """
+        Перерисовывает изменившиеся области и выводит на экран только их.
+
+        Если отмечено всё окно, рисуется весь кадр. Иначе для каждой грязной области
+        заново рисуются фон, кнопки и изображения, пересекающие её, с отсечением по ней,
+        и в pygame.display.update передаётся список этих областей.
+        """
+        blits = 0
+        if self._full_redraw:
+            self.screen.fill((0, 0, 0))
+            blits = self.draw_interface(0, 0)
+            for figure, pos in self.figures.values():
+                self.screen.blit(figure, pos)
+            blits += len(self.figures)
+            pygame.display.update()
+        elif self._dirty:
+            screen = self.screen
+            for rect in self._dirty:
+                screen.set_clip(rect)
+                screen.fill((0, 0, 0), rect)
+                screen.blit(self.background, rect, rect)
+                blits += 1
+                for button in self.buttons_in(rect):
+                    blits += button.draw(screen)
+                for figure, pos in self.figures.values():
+                    if figure.get_rect(topleft=pos).colliderect(rect):
+                        screen.blit(figure, pos)
+                        blits += 1
+            screen.set_clip(None)
+            pygame.display.update(self._dirty)
+        self._full_redraw = False
+        self._dirty = []
+        self.blits = blits
+
+    def wait_events(self, animating: bool = False) -> List[pygame.event.Event]:
+        """
+        Возвращает события для обработки.
+
+        Если ничего не анимируется, поток засыпает до первого события, не занимая процессор;
+        иначе кадры идут с частотой FPS.
+        """
+        if animating:
+            self._clock.tick(FPS)
+            return pygame.event.get()
+        return [pygame.event.wait()] + pygame.event.get()
+
+    def draw_interface(self, x_screen: int, y_screen: int) -> int:
         """
         Рисует интерфейс окна, включая фон и кнопки.
+
+        Возвращает:
+        int: Сколько изображений выведено на экран.
         """
         self.screen.blit(self.background, (x_screen, y_screen))
-        for button in self.buttons.values():
-            button.draw(self.screen)
+        return 1 + sum(button.draw(self.screen) for button in self.buttons.values())
 
     def draw_figure(self, figure: pygame.Surface, x: int, y: int) -> None:
         """
@@ -65,9 +208,9 @@ class Window:
 
     def clicked(self, pos: Tuple[int, int]) -> None:
         """
-        Обрабатывает нажатия на кнопки.
+        Обрабатывает нажатия на кнопки под курсором, найденные по индексу.
         """
-        for button in self.buttons.values():
+        for button in self.buttons_at(pos):
             if button.is_clicked(pos):
                 if button.on_close:
                     self.on_close()
@@ -75,7 +218,6 @@ class Window:
 
     def on_close(self) -> None:
         """
-        Закрывает окно и завершает работу Pygame.
+        Закрывает экран. Само окно дисплея остаётся открытым до выхода из SceneManager.
         """
         self.running = False
-        pygame.quit()